@@ -3,23 +3,49 @@ Sunlight Analysis API Routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from datetime import date, timedelta
 from typing import List
+import numpy as np
+import shapely
+from shapely.geometry import Point
 
+from app.config import settings
+from app.core.time_utils import build_local_time_grid, local_to_unixtime, parse_date
 from app.database import get_db
 from app.models.building import Building
 from app.schemas.analysis import (
+    FacadeSunlightRequest,
+    GridSunlightRequest,
     PointSunlightRequest,
     PointSunlightResponse,
+    SunlightIntervalRequest,
+    SunlightRangeRequest,
     ShadowOverlapRequest,
     ShadowOverlapResponse
 )
-from app.services.solar_service import calculate_solar_position
-from app.services.shadow_service import calculate_building_shadow
+from app.services.solar_service import calculate_solar_positions_batch
+from app.services.shadow_service import shading_search_bounds, to_polygon
+from app.services.horizon import HorizonMask
+from app.services.projection import get_site_projection
+from app.services.spatial_index import BuildingIndex, query_buildings_in_bbox
+from app.services.sunlight_events import solve_sunlit_intervals, summarize_intervals
+from app.services.sunlight_service import (
+    calculate_facade_sunlight,
+    calculate_grid_sunlight,
+    generate_facade_points,
+    sample_grid
+)
 from app.core.deps import get_current_user
 from app.models.user import User
 
 router = APIRouter(prefix="/analysis", tags=["Analysis"])
 
+# Upper bound on days x sun positions per sunlight-range request
+MAX_RANGE_SAMPLES = 200000
+
+# Points of one sunlight-range request must lie within this extent (meters)
+MAX_RANGE_SITE_EXTENT = 5000.0
+
 
 @router.post("/point-sunlight", response_model=dict)
 async def analyze_point_sunlight(
@@ -34,57 +60,163 @@ async def analyze_point_sunlight(
     - **start_hour**: Start hour (default: 6)
     - **end_hour**: End hour (default: 18)
 
-    Returns total sunlight hours and hourly breakdown
+    Returns total sunlight hours and hourly breakdown; blocked_by is the
+    first building between the point and the sun
     """
-    total_hours = request.end_hour - request.start_hour
-    sunlight_hours = 0
-    hourly_breakdown = []
-
-    # Get buildings near the point (simplified - in production, use spatial query)
-    # For now, we'll just check if the point has direct sunlight based on solar position
-    # TODO: Implement actual shadow checking against building footprints
-
-    for hour in range(request.start_hour, request.end_hour + 1):
-        # Calculate solar position for this hour
-        try:
-            solar_pos = calculate_solar_position(
-                request.point.lat,
-                request.point.lng,
-                request.date,
-                hour,
-                0
-            )
-
-            # Check if sun is above horizon
-            is_sunny = solar_pos["solar_altitude"] > 0
-
-            if is_sunny:
-                sunlight_hours += 1
-
-            hourly_breakdown.append({
-                "hour": hour,
-                "is_sunny": is_sunny,
-                "blocked_by": None  # TODO: implement building shadow detection
-            })
-
-        except Exception as e:
-            print(f"Error calculating solar position for hour {hour}: {str(e)}")
-            hourly_breakdown.append({
-                "hour": hour,
-                "is_sunny": False,
-                "blocked_by": None
-            })
+    result = calculate_point_sunlight(db, request)
 
-    sunlight_rate = sunlight_hours / total_hours if total_hours > 0 else 0
+    return {
+        "code": 200,
+        "data": result
+    }
+
+
+@router.post("/sunlight-intervals", response_model=dict)
+async def analyze_sunlight_intervals(
+    request: SunlightIntervalRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Find the exact sunlit intervals of a point
+
+    - **point**: {lat, lng} coordinates of the point to analyze
+    - **height**: Height of the point above ground in meters (default: 0)
+    - **date**: Analysis date in YYYY-MM-DD format (default: today)
+    - **start_hour**: Window start hour (default: 0)
+    - **end_hour**: Window end hour (default: 24)
+    - **min_continuous_hours**: Required continuous sunlight in hours (optional)
+
+    Returns sunlit intervals with second-level boundaries, the building
+    ending each interval, and whether the continuous-sunlight requirement
+    is met
+    """
+    if request.end_hour <= request.start_hour:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_hour must be greater than start_hour"
+        )
+
+    result = calculate_sunlight_intervals(db, request)
 
     return {
         "code": 200,
-        "data": {
-            "total_hours": total_hours,
-            "sunlight_hours": round(sunlight_hours, 2),
-            "sunlight_rate": round(sunlight_rate, 3),
-            "hourly_breakdown": hourly_breakdown
-        }
+        "data": result
+    }
+
+
+@router.post("/sunlight-range", response_model=dict)
+async def analyze_sunlight_range(
+    request: SunlightRangeRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Analyze daily sunlight duration of points over a date range
+
+    - **points**: List of {lat, lng} points of one site
+    - **height**: Height of the points above ground in meters (default: 0)
+    - **start_date**: Start date in YYYY-MM-DD format
+    - **end_date**: End date in YYYY-MM-DD format (inclusive)
+    - **step_minutes**: Minutes between sun positions (default: 10)
+
+    Returns sunlight hours per point and day; each point's horizon mask is
+    built once and reused for every date
+    """
+    try:
+        first_date = parse_date(request.start_date)
+        last_date = parse_date(request.end_date)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+
+    if last_date < first_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be earlier than start_date"
+        )
+
+    sample_count = ((last_date - first_date).days + 1) * (1440 // request.step_minutes)
+    if sample_count > MAX_RANGE_SAMPLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Requested range exceeds {MAX_RANGE_SAMPLES} samples; increase step_minutes or shorten the range"
+        )
+
+    result = calculate_sunlight_range(db, request, first_date, last_date)
+
+    return {
+        "code": 200,
+        "data": result
+    }
+
+
+@router.post("/grid-sunlight", response_model=dict)
+async def analyze_grid_sunlight(
+    request: GridSunlightRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Analyze sunlight duration on a grid of sample points over an area
+
+    - **bbox**: [min_lng, min_lat, max_lng, max_lat] of the area (or give polygon)
+    - **polygon**: GeoJSON Polygon of the area (or give bbox)
+    - **spacing**: Distance between sample points in meters (default: 10)
+    - **date**: Analysis date in YYYY-MM-DD format (default: today)
+    - **step_minutes**: Minutes between sun positions (default: 10)
+
+    Returns sunlight hours per point as [lng, lat, sunlight_hours] rows
+    """
+    if (request.bbox is None) == (request.polygon is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either bbox or polygon"
+        )
+
+    try:
+        area = shapely.box(*request.bbox) if request.bbox else to_polygon(request.polygon)
+    except (ValueError, TypeError, shapely.errors.GEOSException) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid analysis area: {e}"
+        )
+
+    result = calculate_grid_sunlight_map(db, area, request)
+
+    return {
+        "code": 200,
+        "data": result
+    }
+
+
+@router.post("/facade-sunlight", response_model=dict)
+async def analyze_facade_sunlight(
+    request: FacadeSunlightRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Analyze direct sunlight on every facade and floor of a building
+
+    - **building_id**: Building ID to analyze
+    - **date**: Analysis date in YYYY-MM-DD format (default: today)
+    - **step_minutes**: Minutes between sun positions (default: 10)
+    - **spacing**: Distance between sample points along a wall in meters
+    - **include_points**: Also return every sample point (default: false)
+
+    Returns per-facade, per-floor sunlight hours
+    """
+    building = db.query(Building).filter(Building.id == request.building_id).first()
+    if not building:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Building not found"
+        )
+
+    result = calculate_facade_sunlight_map(db, building, request)
+
+    return {
+        "code": 200,
+        "data": result
     }
 
 
@@ -97,73 +229,375 @@ async def analyze_shadow_overlap(
     Analyze shadow overlap on target building from surrounding buildings
 
     - **target_building_id**: Building ID to analyze
-    - **surrounding_building_ids**: List of surrounding building IDs
+    - **surrounding_building_ids**: List of surrounding building IDs (optional; discovered automatically when omitted)
     - **date**: Analysis date in YYYY-MM-DD format (default: today)
     - **hour**: Hour (0-23, default: 12)
 
     Returns self-shadow area, projected shadow area, and overlap details
     """
-    from app.api.shadows import calculate_shadow_overlap
-    from geoalchemy2.shape import to_shape
+    from app.api.shadows import calculate_target_overlap
 
-    # Get target building
-    target_building = db.query(Building).filter(Building.id == request.target_building_id).first()
-    if not target_building:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Target building not found"
+    result = calculate_target_overlap(db, request)
+
+    return {
+        "code": 200,
+        "data": result
+    }
+
+
+def calculate_point_sunlight(db: Session, request: PointSunlightRequest) -> dict:
+    """
+    Cast the point's sun rays for every requested hour against nearby buildings
+
+    Buildings are loaded with one spatial query sized by the longest shadow
+    reach, and all hourly rays are tested in one vectorized pass.
+
+    Args:
+        db: Database session
+        request: Point sunlight request
+
+    Returns:
+        Sunlight totals and hourly breakdown with the blocking building ID
+    """
+    lat = request.point.lat
+    lng = request.point.lng
+    total_hours = request.end_hour - request.start_hour
+    hours = np.arange(request.start_hour, request.end_hour + 1)
+
+    # Sun vectors for all hours at once
+    unixtime, _ = local_to_unixtime(parse_date(request.date, settings.tz), hours * 3600, settings.tz)
+    sun = calculate_solar_positions_batch(lat, lng, unixtime)
+    altitudes = sun["altitude"]
+
+    blocker = np.full(len(hours), -1, dtype=np.int64)
+    index = None
+    if (altitudes > 0).any():
+        # Only buildings within the longest possible shadow can block the point
+        bounds = shading_search_bounds(
+            Point(lng, lat),
+            settings.shadow_max_building_height,
+            max(altitudes[altitudes > 0].min(), settings.shadow_min_sun_altitude)
         )
+        buildings = query_buildings_in_bbox(db, bounds)
+        if buildings:
+            projection = get_site_projection(lat, lng)
+            index = BuildingIndex.from_buildings(buildings, projection)
+            origin = projection.to_local_coords([lng, lat])
+            blocker, _ = index.cast_sun_rays(origin, altitudes, sun["azimuth"])
+
+    is_sunny = (altitudes > 0) & (blocker < 0)
+    sunlight_hours = int(is_sunny.sum())
+    sunlight_rate = sunlight_hours / total_hours if total_hours > 0 else 0
 
-    # Convert footprint to GeoJSON
-    target_footprint_shape = to_shape(target_building.footprint)
-    target_footprint_geojson = {
-        "type": "Polygon",
-        "coordinates": [list(target_footprint_shape.exterior.coords)]
+    return {
+        "total_hours": total_hours,
+        "sunlight_hours": round(sunlight_hours, 2),
+        "sunlight_rate": round(sunlight_rate, 3),
+        "hourly_breakdown": [
+            {
+                "hour": int(hour),
+                "is_sunny": bool(sunny),
+                "blocked_by": index.building_ids[building] if building >= 0 else None
+            }
+            for hour, sunny, building in zip(hours, is_sunny, blocker)
+        ]
     }
 
-    # Get location
-    centroid = target_footprint_shape.centroid
-    lat = centroid.y
-    lng = centroid.x
 
-    # Calculate shadows for surrounding buildings
-    surrounding_shadows = []
+def calculate_sunlight_intervals(db: Session, request: SunlightIntervalRequest) -> dict:
+    """
+    Solve the sunlit intervals of a point against nearby buildings
+
+    Args:
+        db: Database session
+        request: Sunlight interval request
+
+    Returns:
+        Sunlight totals, intervals and the requirement check
+    """
+    lat = request.point.lat
+    lng = request.point.lng
+    day = parse_date(request.date, settings.tz)
 
-    for building_id in request.surrounding_building_ids:
-        building = db.query(Building).filter(Building.id == building_id).first()
-        if not building:
-            continue
+    bounds = shading_search_bounds(
+        Point(lng, lat),
+        settings.shadow_max_building_height,
+        settings.shadow_min_sun_altitude
+    )
+    buildings = query_buildings_in_bbox(db, bounds)
+    projection = get_site_projection(lat, lng)
+    index = BuildingIndex.from_buildings(buildings, projection)
 
-        try:
-            from app.services.shadow_service import calculate_building_shadow
+    solved = solve_sunlit_intervals(
+        index,
+        projection.to_local_coords([lng, lat]),
+        lat,
+        lng,
+        day,
+        request.height,
+        request.start_hour * 3600.0,
+        request.end_hour * 3600.0,
+        timezone=settings.tz
+    )
+    result = summarize_intervals(solved["intervals"], day, settings.tz)
+
+    # Each interval ends when a building takes the sun (None at sunset or the window end)
+    for interval, blocker in zip(result["intervals"], solved["blocked_by"]):
+        interval["ended_by"] = index.building_ids[blocker] if blocker >= 0 else None
+
+    result["date"] = day.isoformat()
+    result["evaluations"] = solved["evaluations"]
+    if request.min_continuous_hours is not None:
+        result["meets_requirement"] = result["longest_continuous_hours"] >= request.min_continuous_hours
+    return result
+
+
+def calculate_sunlight_range(
+    db: Session,
+    request: SunlightRangeRequest,
+    first_date: date,
+    last_date: date
+) -> dict:
+    """
+    Calculate daily sunlight hours of points over a date range
+
+    The buildings around the points are loaded with one spatial query and
+    each point's horizon mask is built once; every sun position of the range
+    is then tested against the masks in one array comparison.
+
+    Args:
+        db: Database session
+        request: Sunlight range request
+        first_date: First date
+        last_date: Last date (inclusive)
+
+    Returns:
+        Dates and per-point daily sunlight hours with totals
+    """
+    points = shapely.multipoints([[point.lng, point.lat] for point in request.points])
+    centroid = points.centroid
+    projection = get_site_projection(centroid.y, centroid.x)
+    origins = projection.to_local_coords([[point.lng, point.lat] for point in request.points])
+
+    if np.ptp(origins, axis=0).max() > MAX_RANGE_SITE_EXTENT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Points must lie within {MAX_RANGE_SITE_EXTENT:.0f} m of each other"
+        )
+
+    # Sun vectors of the whole range, daylight only
+    time_grid = build_local_time_grid(first_date, last_date, request.step_minutes, settings.tz)
+    sun = calculate_solar_positions_batch(centroid.y, centroid.x, time_grid["unixtime"])
+    daylight = sun["altitude"] > 0
+    altitudes = sun["altitude"][daylight]
+
+    buildings = []
+    if daylight.any():
+        search_bounds = shading_search_bounds(
+            points,
+            settings.shadow_max_building_height,
+            max(altitudes.min(), settings.shadow_min_sun_altitude)
+        )
+        buildings = query_buildings_in_bbox(db, search_bounds)
 
-            building_footprint_shape = to_shape(building.footprint)
-            building_footprint_geojson = {
-                "type": "Polygon",
-                "coordinates": [list(building_footprint_shape.exterior.coords)]
+    index = BuildingIndex.from_buildings(buildings, projection)
+    mask = HorizonMask.build(index, origins, np.full(len(origins), request.height))
+    sunlit = mask.is_sunlit(altitudes, sun["azimuth"][daylight])
+
+    # Sum sunlit steps per day
+    days = (time_grid["date"][daylight] - np.datetime64(first_date, "D")).astype(np.int64)
+    day_count = (last_date - first_date).days + 1
+    daily_hours = np.stack([
+        np.bincount(days, weights=point_sunlit, minlength=day_count) for point_sunlit in sunlit
+    ]) * request.step_minutes / 60.0
+
+    return {
+        "start_date": first_date.isoformat(),
+        "end_date": last_date.isoformat(),
+        "step_minutes": request.step_minutes,
+        "dates": [(first_date + timedelta(days=day)).isoformat() for day in range(day_count)],
+        "points": [
+            {
+                "lat": point.lat,
+                "lng": point.lng,
+                "daily_sunlight_hours": [round(float(hours), 2) for hours in point_hours],
+                "total_sunlight_hours": round(float(point_hours.sum()), 2),
+                "mean_sunlight_hours": round(float(point_hours.mean()), 2)
             }
+            for point, point_hours in zip(request.points, daily_hours)
+        ]
+    }
+
 
-            shadow_geojson, _ = calculate_building_shadow(
-                building_footprint_geojson,
-                float(building.total_height),
-                lat,
-                lng,
-                request.date,
-                request.hour,
-                0
-            )
+def calculate_grid_sunlight_map(db: Session, area: "shapely.Polygon", request: GridSunlightRequest) -> dict:
+    """
+    Calculate sunlight hours for every sample point of an area
 
-            if shadow_geojson:
-                surrounding_shadows.append(shadow_geojson)
+    One spatial query loads the buildings that can shade the area; all
+    points share one building index and one array of sun vectors.
 
-        except Exception as e:
-            print(f"Error calculating shadow for building {building_id}: {str(e)}")
-            continue
+    Args:
+        db: Database session
+        area: Analysis area (lng/lat)
+        request: Grid sunlight request
+
+    Returns:
+        Summary statistics and [lng, lat, sunlight_hours] per point
+    """
+    centroid = area.centroid
+    projection = get_site_projection(centroid.y, centroid.x)
+    local_area = projection.to_local(area)
+
+    min_x, min_y, max_x, max_y = local_area.bounds
+    grid_points = np.ceil((max_x - min_x) / request.spacing) * np.ceil((max_y - min_y) / request.spacing)
+    if grid_points > settings.grid_sunlight_max_points:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many sample points ({int(grid_points)}, max {settings.grid_sunlight_max_points}); increase spacing"
+        )
 
-    # Calculate overlap
-    result = calculate_shadow_overlap(target_footprint_geojson, surrounding_shadows)
+    bounds, inside = sample_grid(local_area, request.spacing)
+
+    # Sun vectors of the whole day, daylight only
+    day = parse_date(request.date, settings.tz)
+    time_grid = build_local_time_grid(day, day, request.step_minutes, settings.tz)
+    sun = calculate_solar_positions_batch(centroid.y, centroid.x, time_grid["unixtime"])
+    daylight = sun["altitude"] > 0
+    altitudes = sun["altitude"][daylight]
+
+    buildings = []
+    if daylight.any():
+        search_bounds = shading_search_bounds(
+            area,
+            settings.shadow_max_building_height,
+            max(altitudes.min(), settings.shadow_min_sun_altitude)
+        )
+        buildings = query_buildings_in_bbox(db, search_bounds)
+
+    index = BuildingIndex.from_buildings(buildings, projection)
+    minutes = calculate_grid_sunlight(
+        index, bounds, request.spacing, altitudes, sun["azimuth"][daylight], request.step_minutes
+    )
+
+    rows, cols = np.nonzero(inside)
+    coords = projection.to_geographic_coords(np.column_stack([
+        bounds[0] + (cols + 0.5) * request.spacing,
+        bounds[1] + (rows + 0.5) * request.spacing
+    ]))
+    hours = minutes[inside] / 60.0
 
     return {
-        "code": 200,
-        "data": result
+        "date": day.isoformat(),
+        "spacing": request.spacing,
+        "step_minutes": request.step_minutes,
+        "point_count": len(hours),
+        "daylight_hours": round(len(altitudes) * request.step_minutes / 60.0, 2),
+        "min_sunlight_hours": round(float(hours.min()), 2) if len(hours) else 0.0,
+        "mean_sunlight_hours": round(float(hours.mean()), 2) if len(hours) else 0.0,
+        "max_sunlight_hours": round(float(hours.max()), 2) if len(hours) else 0.0,
+        "points": [
+            [round(float(lng), 7), round(float(lat), 7), round(float(hour), 2)]
+            for (lng, lat), hour in zip(coords, hours)
+        ]
     }
+
+
+def calculate_facade_sunlight_map(db: Session, building: Building, request: FacadeSunlightRequest) -> dict:
+    """
+    Calculate sunlight hours on the facades of a building, per floor
+
+    One spatial query loads the buildings that can shade the building
+    (itself included); all facade points share one building index and are
+    evaluated in one batch of sun rays.
+
+    Args:
+        db: Database session
+        building: Building to analyze
+        request: Facade sunlight request
+
+    Returns:
+        Per-facade orientation, length and per-floor min/mean sunlight hours
+    """
+    from geoalchemy2.shape import to_shape
+
+    footprint = to_shape(building.footprint)
+    centroid = footprint.centroid
+    projection = get_site_projection(centroid.y, centroid.x)
+
+    points = generate_facade_points(
+        projection.to_local(footprint),
+        float(building.total_height),
+        building.floor_count,
+        request.spacing
+    )
+    if len(points["z"]) > settings.facade_sunlight_max_points:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Too many sample points ({len(points['z'])}, max {settings.facade_sunlight_max_points}); increase spacing"
+        )
+
+    # Sun vectors of the whole day, daylight only
+    day = parse_date(request.date, settings.tz)
+    time_grid = build_local_time_grid(day, day, request.step_minutes, settings.tz)
+    sun = calculate_solar_positions_batch(centroid.y, centroid.x, time_grid["unixtime"])
+    daylight = sun["altitude"] > 0
+    altitudes = sun["altitude"][daylight]
+
+    buildings = [building]
+    if daylight.any():
+        search_bounds = shading_search_bounds(
+            footprint,
+            settings.shadow_max_building_height,
+            max(altitudes.min(), settings.shadow_min_sun_altitude)
+        )
+        buildings = query_buildings_in_bbox(db, search_bounds)
+
+    index = BuildingIndex.from_buildings(buildings, projection)
+    hours = calculate_facade_sunlight(
+        index, points, altitudes, sun["azimuth"][daylight], request.step_minutes
+    ) / 60.0
+
+    # Min and mean hours per (facade, floor)
+    floor_count = int(points["floor"].max()) + 1 if len(hours) else 0
+    facade_count = len(points["facade_length"])
+    cell = points["facade"] * floor_count + points["floor"]
+    min_hours = np.full(facade_count * floor_count, np.inf)
+    np.minimum.at(min_hours, cell, hours)
+    mean_hours = np.bincount(cell, hours, facade_count * floor_count) / np.bincount(cell, minlength=facade_count * floor_count)
+
+    facades = [
+        {
+            "facade": facade,
+            "azimuth": round(float(points["facade_azimuth"][facade]), 1),
+            "length": round(float(points["facade_length"][facade]), 2),
+            "floors": [
+                {
+                    "floor": floor + 1,
+                    "min_sunlight_hours": round(float(min_hours[facade * floor_count + floor]), 2),
+                    "mean_sunlight_hours": round(float(mean_hours[facade * floor_count + floor]), 2)
+                }
+                for floor in range(floor_count)
+            ]
+        }
+        for facade in range(facade_count)
+    ]
+
+    result = {
+        "building_id": building.id,
+        "date": day.isoformat(),
+        "step_minutes": request.step_minutes,
+        "floor_count": floor_count,
+        "floor_height": round(float(building.total_height) / floor_count, 2) if floor_count else 0.0,
+        "point_count": len(hours),
+        "daylight_hours": round(len(altitudes) * request.step_minutes / 60.0, 2),
+        "facades": facades
+    }
+
+    if request.include_points:
+        coords = projection.to_geographic_coords(points["xy"])
+        result["points"] = [
+            [round(float(lng), 7), round(float(lat), 7), round(float(z), 2), int(facade), int(floor) + 1, round(float(hour), 2)]
+            for (lng, lat), z, facade, floor, hour in zip(coords, points["z"], points["facade"], points["floor"], hours)
+        ]
+
+    return result
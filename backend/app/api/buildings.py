@@ -1,6 +1,8 @@
 """
 Building Data API Routes
 """
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
@@ -12,6 +14,9 @@ from app.models.building import Building
 from app.schemas.building import BuildingResponse, BuildingCreate, BuildingListResponse
 from app.core.deps import get_current_user
 from app.models.user import User
+from app.services.shading_graph import refresh_shading_graph
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/buildings", tags=["Buildings"])
 
@@ -138,6 +143,7 @@ async def import_buildings(
     success_count = 0
     failed_count = 0
     errors = []
+    new_buildings = []
 
     for building_data in buildings_data:
         try:
@@ -163,6 +169,7 @@ async def import_buildings(
             )
 
             db.add(new_building)
+            new_buildings.append(new_building)
             success_count += 1
 
         except Exception as e:
@@ -181,12 +188,22 @@ async def import_buildings(
             detail=f"Failed to save buildings: {str(e)}"
         )
 
+    # Link the new buildings into the shading graph; analyses fall back to a
+    # spatial search for buildings whose graph node is missing
+    try:
+        shading_edges = refresh_shading_graph(db, new_buildings)
+    except Exception:
+        logger.exception(f"Failed to refresh the shading graph of {len(new_buildings)} imported buildings")
+        db.rollback()
+        shading_edges = None
+
     return {
         "code": 201,
         "data": {
             "success_count": success_count,
             "failed_count": failed_count,
-            "errors": errors
+            "errors": errors,
+            "shading_edges": shading_edges
         }
     }
 
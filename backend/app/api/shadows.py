@@ -2,24 +2,40 @@
 Shadow Calculation API Routes
 """
 import time
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends
 from sqlalchemy.orm import Session
 from typing import List
 
 from app.database import get_db
 from app.models.building import Building
 from app.schemas.analysis import (
+    HeightFieldShadowRequest,
     ShadowCalculationRequest,
     ShadowCalculationResponse,
     ShadowOverlapRequest,
     ShadowOverlapResponse,
-    ShadowComparisonResponse
+    ShadowComparisonResponse,
+    ShadowSweepRequest,
+    ShadingGraphRebuildRequest
 )
 from app.services.shadow_service import (
     calculate_building_shadow,
+    calculate_building_shadows_cached,
+    calculate_building_shadow_overlap,
     calculate_shadow_overlap,
-    calculate_shadow_comparison
+    calculate_shadow_comparison,
+    calculate_daily_shadow_sweep,
+    filter_shading_candidates,
+    get_shadow_memo_stats,
+    get_sun_vector,
+    shading_search_bounds,
+    store_cached_shadows
 )
+from app.services.height_field import calculate_height_field_shadows
+from app.services.shading_graph import get_shading_neighbours, get_shading_sources, refresh_shading_graph
+from app.services.spatial_index import query_buildings_in_bbox
+from app.config import settings
+from app.core.time_utils import parse_date
 from app.core.deps import get_current_user
 from app.models.user import User
 
@@ -29,6 +45,7 @@ router = APIRouter(prefix="/shadows", tags=["Shadows"])
 @router.post("/calculate", response_model=dict)
 async def calculate_shadows(
     request: ShadowCalculationRequest,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -38,55 +55,49 @@ async def calculate_shadows(
     - **date**: Analysis date in YYYY-MM-DD format (default: today)
     - **hour**: Hour (0-23, default: 12)
     - **minute**: Minute (0-59, default: 0)
+
+    Whole-hour frames are served from shadow_analysis_cache when available;
+    newly computed shadows are written back after the response is sent.
     """
     start_time = time.time()
 
+    from geoalchemy2.shape import to_shape
+
+    # Load all requested buildings with a single query
+    buildings = _get_buildings_by_ids(db, request.building_ids)
+    footprints = [to_shape(building.footprint) for building in buildings]
+
     shadows = []
 
-    for building_id in request.building_ids:
-        # Get building from database
-        building = db.query(Building).filter(Building.id == building_id).first()
-
-        if not building:
-            continue
-
-        try:
-            # Convert footprint to GeoJSON
-            from geoalchemy2.shape import to_shape
-            footprint_shape = to_shape(building.footprint)
-            footprint_geojson = {
-                "type": "Polygon",
-                "coordinates": [list(footprint_shape.exterior.coords)]
-            }
-
-            # Get center coordinates
-            centroid = footprint_shape.centroid
-            lat = centroid.y
-            lng = centroid.x
-
-            # Calculate shadow
-            shadow_geojson, shadow_area = calculate_building_shadow(
-                footprint_geojson,
-                float(building.total_height),
-                lat,
-                lng,
-                request.date,
-                request.hour,
-                request.minute
-            )
+    if buildings:
+        # One sun position for the whole request, taken at the site center
+        lat, lng = _site_center(footprints)
+
+        analysis_date = parse_date(request.date)
+        results, new_entries = calculate_building_shadows_cached(
+            db,
+            [building.id for building in buildings],
+            footprints,
+            [float(building.total_height) for building in buildings],
+            lat,
+            lng,
+            analysis_date,
+            request.hour,
+            request.minute,
+            building_keys=[(building.id, building.updated_at) for building in buildings]
+        )
+
+        if new_entries:
+            background_tasks.add_task(store_cached_shadows, analysis_date, request.hour, new_entries)
 
+        for building, (shadow_geojson, shadow_area) in zip(buildings, results):
             if shadow_geojson:
                 shadows.append({
-                    "building_id": building_id,
+                    "building_id": building.id,
                     "shadow_polygon": shadow_geojson,
                     "area": shadow_area
                 })
 
-        except Exception as e:
-            # Log error but continue processing other buildings
-            print(f"Error calculating shadow for building {building_id}: {str(e)}")
-            continue
-
     calculation_time_ms = int((time.time() - start_time) * 1000)
 
     return {
@@ -98,74 +109,202 @@ async def calculate_shadows(
     }
 
 
-@router.post("/overlap", response_model=dict)
-async def get_shadow_overlap(
-    request: ShadowOverlapRequest,
+@router.post("/sweep", response_model=dict)
+async def sweep_shadows(
+    request: ShadowSweepRequest,
     db: Session = Depends(get_db)
 ):
     """
-    Calculate shadow overlap on target building
+    Calculate a day of shadow frames for buildings in one request
 
-    - **target_building_id**: Building ID to analyze
-    - **surrounding_building_ids**: List of surrounding building IDs
+    - **building_ids**: List of building IDs
     - **date**: Analysis date in YYYY-MM-DD format (default: today)
-    - **hour**: Hour (0-23, default: 12)
+    - **step_minutes**: Minutes between frames (1-60, default: 5)
+    - **min_altitude**: Skip frames with the sun at or below this altitude (default: 0)
+    - **include_envelope**: Return each building's swept shadow envelope (default: true)
+    - **include_frame_areas**: Return each building's shadow area per frame (default: true)
+    - **include_frame_polygons**: Return each building's shadow polygon per frame (default: false)
     """
-    # Get target building
-    target_building = db.query(Building).filter(Building.id == request.target_building_id).first()
-    if not target_building:
+    start_time = time.time()
+
+    from geoalchemy2.shape import to_shape
+
+    buildings = _get_buildings_by_ids(db, request.building_ids)
+    if not buildings:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Target building not found"
+            detail="Buildings not found"
         )
 
-    # Convert target building footprint to GeoJSON
+    footprints = [to_shape(building.footprint) for building in buildings]
+    lat, lng = _site_center(footprints)
+
+    result = calculate_daily_shadow_sweep(
+        footprints,
+        [float(building.total_height) for building in buildings],
+        lat,
+        lng,
+        request.date,
+        request.step_minutes,
+        request.min_altitude,
+        request.include_envelope,
+        request.include_frame_areas,
+        request.include_frame_polygons,
+        timezone=settings.tz
+    )
+    result["buildings"] = [
+        {"building_id": building.id, **entry}
+        for building, entry in zip(buildings, result["buildings"])
+    ]
+    result["calculation_time_ms"] = int((time.time() - start_time) * 1000)
+
+    return {
+        "code": 200,
+        "data": result
+    }
+
+
+@router.post("/height-field", response_model=dict)
+async def height_field_shadows(
+    request: HeightFieldShadowRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Calculate a shadow raster of an area from a building height field
+
+    - **bbox**: [min_lng, min_lat, max_lng, max_lat] of the area
+    - **date**: Analysis date in YYYY-MM-DD format (default: today)
+    - **hour**: Hour (0-23, default: 12)
+    - **minute**: Minute (0-59, default: 0)
+    - **resolution**: Cell size in meters (default: HEIGHT_FIELD_RESOLUTION_M)
+
+    Returns shaded cells and shadow heights as rows running north to south;
+    the cost depends on the number of cells, not on the number of buildings
+    """
+    start_time = time.time()
+
     from geoalchemy2.shape import to_shape
-    target_footprint_shape = to_shape(target_building.footprint)
-    target_footprint_geojson = {
-        "type": "Polygon",
-        "coordinates": [list(target_footprint_shape.exterior.coords)]
+    from shapely.geometry import box
+
+    min_lng, min_lat, max_lng, max_lat = request.bbox
+    if min_lng >= max_lng or min_lat >= max_lat:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid bbox"
+        )
+
+    # Buildings that can shade the area at the lowest sun considered
+    buildings = query_buildings_in_bbox(db, shading_search_bounds(
+        box(*request.bbox),
+        settings.shadow_max_building_height,
+        settings.shadow_min_sun_altitude
+    ))
+
+    try:
+        result = calculate_height_field_shadows(
+            [to_shape(building.footprint) for building in buildings],
+            [float(building.total_height) for building in buildings],
+            (min_lat + max_lat) / 2,
+            (min_lng + max_lng) / 2,
+            tuple(request.bbox),
+            request.date,
+            request.hour,
+            request.minute,
+            request.resolution
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    result["building_count"] = len(buildings)
+    result["calculation_time_ms"] = int((time.time() - start_time) * 1000)
+
+    return {
+        "code": 200,
+        "data": result
     }
 
-    # Get location
-    centroid = target_footprint_shape.centroid
-    lat = centroid.y
-    lng = centroid.x
 
-    # Calculate shadows for surrounding buildings
-    surrounding_shadows = []
-
-    for building_id in request.surrounding_building_ids:
-        building = db.query(Building).filter(Building.id == building_id).first()
-        if not building:
-            continue
-
-        try:
-            building_footprint_shape = to_shape(building.footprint)
-            building_footprint_geojson = {
-                "type": "Polygon",
-                "coordinates": [list(building_footprint_shape.exterior.coords)]
-            }
-
-            shadow_geojson, _ = calculate_building_shadow(
-                building_footprint_geojson,
-                float(building.total_height),
-                lat,
-                lng,
-                request.date,
-                request.hour,
-                0
-            )
+@router.post("/shading-graph/rebuild", response_model=dict)
+async def rebuild_shading_graph(
+    request: ShadingGraphRebuildRequest,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Recompute the shading graph edges of the buildings in an area
 
-            if shadow_geojson:
-                surrounding_shadows.append(shadow_geojson)
+    - **bbox**: [min_lng, min_lat, max_lng, max_lat] of the buildings to refresh
 
-        except Exception as e:
-            print(f"Error calculating shadow for building {building_id}: {str(e)}")
-            continue
+    Edges to and from buildings outside the area are refreshed as well
+    """
+    start_time = time.time()
 
-    # Calculate overlap
-    result = calculate_shadow_overlap(target_footprint_geojson, surrounding_shadows)
+    min_lng, min_lat, max_lng, max_lat = request.bbox
+    if min_lng >= max_lng or min_lat >= max_lat:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid bbox"
+        )
+
+    buildings = query_buildings_in_bbox(db, tuple(request.bbox))
+    edge_count = refresh_shading_graph(db, buildings)
+
+    return {
+        "code": 200,
+        "data": {
+            "building_count": len(buildings),
+            "edge_count": edge_count,
+            "calculation_time_ms": int((time.time() - start_time) * 1000)
+        }
+    }
+
+
+@router.get("/shading-graph/{building_id}", response_model=dict)
+async def get_shading_graph_neighbours(
+    building_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    List the buildings that can shade a building and that it can shade
+
+    - **building_id**: Building ID
+
+    "up_to_date" is false when the building changed after its edges were computed
+    """
+    building = db.query(Building).filter(Building.id == building_id).first()
+    if not building:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Building not found"
+        )
+
+    result = get_shading_neighbours(db, building_id)
+    result["building_id"] = building_id
+    result["up_to_date"] = get_shading_sources(db, [building])[building_id] is not None
+
+    return {
+        "code": 200,
+        "data": result
+    }
+
+
+@router.post("/overlap", response_model=dict)
+async def get_shadow_overlap(
+    request: ShadowOverlapRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Calculate shadow overlap on target building
+
+    - **target_building_id**: Building ID to analyze
+    - **surrounding_building_ids**: List of surrounding building IDs (optional; discovered automatically when omitted)
+    - **date**: Analysis date in YYYY-MM-DD format (default: today)
+    - **hour**: Hour (0-23, default: 12)
+    """
+    result = calculate_target_overlap(db, request)
 
     return {
         "code": 200,
@@ -222,3 +361,116 @@ async def compare_shadow_extremes(
         "code": 200,
         "data": result
     }
+
+
+@router.get("/cache-stats", response_model=dict)
+async def get_shadow_cache_statistics():
+    """
+    Get in-process shadow memo statistics
+
+    Returns memo size, memory use, hit/miss counters and hit rate
+    """
+    return {
+        "code": 200,
+        "data": get_shadow_memo_stats()
+    }
+
+
+def calculate_target_overlap(db: Session, request: ShadowOverlapRequest) -> dict:
+    """
+    Load the target and surrounding buildings and compute the shadow overlap
+
+    Args:
+        db: Database session
+        request: Shadow overlap request
+
+    Returns:
+        Overlap analysis with real building IDs in overlap_details
+    """
+    from geoalchemy2.shape import to_shape
+
+    # Get target building
+    target_building = db.query(Building).filter(Building.id == request.target_building_id).first()
+    if not target_building:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Target building not found"
+        )
+
+    target_footprint_shape = to_shape(target_building.footprint)
+
+    # Get location
+    centroid = target_footprint_shape.centroid
+    lat = centroid.y
+    lng = centroid.x
+
+    # The sun altitude bounds how far any shadow can reach
+    solar_altitude, _ = get_sun_vector(lat, lng, request.date, request.hour, 0)
+
+    buildings = []
+    if solar_altitude > 0:
+        if request.surrounding_building_ids is None:
+            # Buildings that can ever shade the target, from the shading graph
+            source_ids = get_shading_sources(db, [target_building])[target_building.id]
+            if source_ids is not None:
+                buildings = _get_buildings_by_ids(db, source_ids)
+            else:
+                # No up-to-date graph node: single spatial query around the target
+                bounds = shading_search_bounds(
+                    target_footprint_shape,
+                    settings.shadow_max_building_height,
+                    max(solar_altitude, settings.shadow_min_sun_altitude)
+                )
+                buildings = query_buildings_in_bbox(db, bounds)
+        else:
+            buildings = _get_buildings_by_ids(db, request.surrounding_building_ids)
+
+    # The target never shades itself here
+    buildings = [building for building in buildings if building.id != target_building.id]
+    footprints = [to_shape(building.footprint) for building in buildings]
+    heights = [float(building.total_height) for building in buildings]
+
+    # Drop buildings whose shadow cannot reach the target
+    keep = filter_shading_candidates(target_footprint_shape, footprints, heights, solar_altitude)
+    buildings = [buildings[i] for i in keep]
+
+    return calculate_building_shadow_overlap(
+        target_footprint_shape,
+        [footprints[i] for i in keep],
+        [heights[i] for i in keep],
+        [building.id for building in buildings],
+        lat,
+        lng,
+        request.date,
+        request.hour
+    )
+
+
+def _get_buildings_by_ids(db: Session, building_ids: List[str]) -> List[Building]:
+    """
+    Fetch buildings by ID with a single IN query, preserving request order
+
+    Unknown IDs are skipped.
+    """
+    if not building_ids:
+        return []
+
+    rows = db.query(Building).filter(Building.id.in_(set(building_ids))).all()
+    by_id = {building.id: building for building in rows}
+
+    buildings = []
+    seen = set()
+    for building_id in building_ids:
+        if building_id in by_id and building_id not in seen:
+            seen.add(building_id)
+            buildings.append(by_id[building_id])
+    return buildings
+
+
+def _site_center(footprints: list) -> tuple:
+    """Return (lat, lng) of the center of the footprints' bounding box"""
+    min_x = min(footprint.bounds[0] for footprint in footprints)
+    min_y = min(footprint.bounds[1] for footprint in footprints)
+    max_x = max(footprint.bounds[2] for footprint in footprints)
+    max_y = max(footprint.bounds[3] for footprint in footprints)
+    return (min_y + max_y) / 2, (min_x + max_x) / 2
@@ -1,22 +1,38 @@
 """
 Solar Position Calculation API Routes
 """
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
 from typing import Optional
+from datetime import datetime, time
 
+from app.core.time_utils import get_timezone, parse_date
+from app.database import get_db
 from app.schemas.solar import (
     SolarPositionRequest,
     SolarPositionResponse,
     SolarDailyPositionsRequest,
-    SolarDailyPositionsResponse
+    SolarDailyPositionsResponse,
+    SolarPrecision,
+    SolarBatchRequest
 )
 from app.services.solar_service import (
     calculate_solar_position,
-    calculate_daily_solar_positions
+    calculate_daily_solar_positions,
+    calculate_range_solar_positions,
+    calculate_multi_location_positions,
+    calculate_yearly_sunrise_sunset,
+    get_solar_cache_stats
 )
 
 router = APIRouter(prefix="/solar", tags=["Solar Position"])
 
+# Upper bound on samples returned by a single range request
+MAX_RANGE_SAMPLES = 100000
+
+# Upper bound on points x timestamps evaluated by a single batch request
+MAX_BATCH_SAMPLES = 1000000
+
 
 @router.get("/position", response_model=dict)
 async def get_solar_position(
@@ -25,7 +41,9 @@ async def get_solar_position(
     date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
     hour: Optional[int] = Query(None, ge=0, le=23, description="Hour (0-23)"),
     minute: Optional[int] = Query(0, ge=0, le=59, description="Minute (0-59)"),
-    timezone: Optional[str] = Query("Asia/Shanghai", description="Timezone")
+    timezone: Optional[str] = Query("Asia/Shanghai", description="Timezone"),
+    precision: SolarPrecision = Query(SolarPrecision.SPA, description="Solar engine precision tier (spa, noaa or ephemeris)"),
+    db: Session = Depends(get_db)
 ):
     """
     Calculate solar position (altitude and azimuth angles) for a given location and time
@@ -36,10 +54,11 @@ async def get_solar_position(
     - **hour**: Hour (0-23, default: current hour)
     - **minute**: Minute (0-59, default: 0)
     - **timezone**: Timezone string (default: Asia/Shanghai)
+    - **precision**: Solar engine precision tier (spa: full NREL SPA, noaa: fast approximation, ephemeris: interpolated yearly SPA table)
 
     Returns solar altitude angle, solar azimuth angle, sunrise/sunset times
     """
-    result = calculate_solar_position(lat, lng, date, hour, minute, timezone)
+    result = calculate_solar_position(lat, lng, date, hour, minute, timezone, precision.value, db)
 
     return {
         "code": 200,
@@ -52,7 +71,9 @@ async def get_daily_solar_positions(
     lat: float = Query(..., ge=-90, le=90, description="Latitude in degrees"),
     lng: float = Query(..., ge=-180, le=180, description="Longitude in degrees"),
     date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
-    timezone: Optional[str] = Query("Asia/Shanghai", description="Timezone")
+    timezone: Optional[str] = Query("Asia/Shanghai", description="Timezone"),
+    precision: SolarPrecision = Query(SolarPrecision.SPA, description="Solar engine precision tier (spa, noaa or ephemeris)"),
+    db: Session = Depends(get_db)
 ):
     """
     Calculate solar positions for all 24 hours of a day
@@ -61,12 +82,155 @@ async def get_daily_solar_positions(
     - **lng**: Longitude (-180 to 180)
     - **date**: Date in YYYY-MM-DD format (default: today)
     - **timezone**: Timezone string (default: Asia/Shanghai)
+    - **precision**: Solar engine precision tier (spa: full NREL SPA, noaa: fast approximation, ephemeris: interpolated yearly SPA table)
 
     Returns hourly solar positions including altitude and azimuth angles
     """
-    result = calculate_daily_solar_positions(lat, lng, date, timezone)
+    result = calculate_daily_solar_positions(lat, lng, date, timezone, precision.value, db)
+
+    return {
+        "code": 200,
+        "data": result
+    }
+
+
+@router.get("/range-positions", response_model=dict)
+async def get_range_solar_positions(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude in degrees"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude in degrees"),
+    start_date: str = Query(..., description="Start date in YYYY-MM-DD format"),
+    end_date: str = Query(..., description="End date in YYYY-MM-DD format (inclusive)"),
+    step_minutes: int = Query(60, ge=1, le=1440, description="Sampling step in minutes"),
+    timezone: Optional[str] = Query("Asia/Shanghai", description="Timezone"),
+    precision: SolarPrecision = Query(SolarPrecision.SPA, description="Solar engine precision tier (spa, noaa or ephemeris)")
+):
+    """
+    Calculate solar positions over a date range in a single vectorized pass
+
+    - **lat**: Latitude (-90 to 90)
+    - **lng**: Longitude (-180 to 180)
+    - **start_date**: Start date in YYYY-MM-DD format
+    - **end_date**: End date in YYYY-MM-DD format (inclusive)
+    - **step_minutes**: Sampling step in minutes (1-1440, default: 60)
+    - **timezone**: Timezone string (default: Asia/Shanghai)
+    - **precision**: Solar engine precision tier (spa: full NREL SPA, noaa: fast approximation, ephemeris: interpolated yearly SPA table)
+
+    Returns columnar timestamps, altitude and azimuth arrays
+    """
+    try:
+        first_date = parse_date(start_date)
+        last_date = parse_date(end_date)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+
+    if last_date < first_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must not be earlier than start_date"
+        )
+
+    sample_count = ((last_date - first_date).days + 1) * (1440 // step_minutes)
+    if sample_count > MAX_RANGE_SAMPLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Requested range exceeds {MAX_RANGE_SAMPLES} samples; increase step_minutes or shorten the range"
+        )
+
+    result = calculate_range_solar_positions(
+        lat, lng, start_date, end_date, step_minutes, timezone, precision.value
+    )
+
+    return {
+        "code": 200,
+        "data": result
+    }
+
+
+@router.post("/batch", response_model=dict)
+async def get_batch_solar_positions(request: SolarBatchRequest):
+    """
+    Calculate solar positions for many locations (and timestamps) in one call
+
+    - **points**: List of {lat, lng} locations
+    - **timestamps**: Optional list of ISO timestamps (naive values use the request timezone)
+    - **date** / **hour** / **minute**: Single local time used when timestamps is omitted
+    - **timezone**: Timezone string (default: Asia/Shanghai)
+    - **precision**: Solar engine precision tier (spa, noaa or ephemeris)
+
+    Returns columnar altitude/azimuth arrays with one row per point and one
+    column per timestamp
+    """
+    if request.timestamps:
+        timestamps = request.timestamps
+    else:
+        now = datetime.now(get_timezone(request.timezone))
+        try:
+            local_date = parse_date(request.date) if request.date else now.date()
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid date format. Use YYYY-MM-DD"
+            )
+        hour = request.hour if request.hour is not None else now.hour
+        minute = request.minute if request.hour is not None else now.minute
+        timestamps = [datetime.combine(local_date, time(hour, minute))]
+
+    if len(request.points) * len(timestamps) > MAX_BATCH_SAMPLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch exceeds {MAX_BATCH_SAMPLES} point-timestamp samples"
+        )
+
+    result = calculate_multi_location_positions(
+        [point.lat for point in request.points],
+        [point.lng for point in request.points],
+        timestamps,
+        request.timezone,
+        request.precision.value
+    )
+
+    return {
+        "code": 200,
+        "data": result
+    }
+
+
+@router.get("/sun-times/yearly", response_model=dict)
+async def get_yearly_sun_times(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude in degrees"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude in degrees"),
+    year: int = Query(..., ge=1900, le=2100, description="Calendar year"),
+    timezone: Optional[str] = Query("Asia/Shanghai", description="Timezone")
+):
+    """
+    Get sunrise/sunset times for every day of a year
+
+    - **lat**: Latitude (-90 to 90)
+    - **lng**: Longitude (-180 to 180)
+    - **year**: Calendar year
+    - **timezone**: Timezone string (default: Asia/Shanghai)
+
+    Returns columnar dates, sunrise/sunset times and day lengths
+    """
+    result = calculate_yearly_sunrise_sunset(lat, lng, year, timezone)
 
     return {
         "code": 200,
         "data": result
     }
+
+
+@router.get("/cache-stats", response_model=dict)
+async def get_solar_cache_statistics():
+    """
+    Get solar position cache statistics
+
+    Returns cache size, hit/miss counters and hit rate
+    """
+    return {
+        "code": 200,
+        "data": get_solar_cache_stats()
+    }
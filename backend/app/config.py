@@ -1,7 +1,7 @@
 """
 Application Configuration
 """
-from typing import List
+from typing import List, Tuple
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -45,6 +45,43 @@ class Settings(BaseSettings):
     # Timezone
     tz: str = Field(default="Asia/Shanghai", description="Timezone")
 
+    # Solar position cache
+    solar_cache_size: int = Field(default=8192, description="Max entries in the in-process solar position cache (0 disables)")
+    solar_cache_ttl_seconds: int = Field(default=86400, description="Solar position cache TTL in seconds (0 = no expiry)")
+    solar_cache_coord_step: float = Field(default=0.0001, description="Coordinate quantization step in degrees for cache keys")
+    solar_cache_time_step_minutes: int = Field(default=1, description="Time quantization step in minutes for cache keys")
+
+    # Solar position pre-calculation table
+    solar_precalc_enabled: bool = Field(default=False, description="Read solar positions from solar_positions_precalc before computing")
+    solar_precalc_sites: str = Field(
+        default="",
+        description="Semicolon-separated lat,lng sites to pre-calculate (e.g. 39.9042,116.4074;31.2304,121.4737)"
+    )
+    solar_precalc_years: str = Field(default="", description="Years to pre-calculate (e.g. 2024,2025 or 2024-2026)")
+
+    # Shadow analysis
+    shadow_max_building_height: float = Field(default=600.0, description="Height ceiling in meters used to size the shading-candidate search window")
+    shadow_min_sun_altitude: float = Field(default=5.0, description="Solar altitude floor in degrees used to bound the maximum shadow reach")
+    shadow_cache_enabled: bool = Field(default=True, description="Read and write computed hourly shadows in shadow_analysis_cache")
+    shadow_memo_max_bytes: int = Field(default=67108864, description="Memory budget in bytes of the in-process sun-vector shadow memo (0 disables)")
+    shadow_memo_sun_step_degrees: float = Field(default=0.05, description="Sun altitude/azimuth quantization step in degrees for shadow memo keys")
+    shadow_heatmap_resolution_m: float = Field(default=5.0, description="Cell size in meters of report shadow-hour heatmaps")
+    shadow_raster_chunk_cells: int = Field(default=16000000, description="Working-array budget in cells per chunk of the shadow raster engine")
+    sunlight_event_coarse_minutes: float = Field(default=10.0, description="Spacing in minutes of the coarse sun-path samples of the sunlight interval solver")
+    sunlight_event_tolerance_seconds: float = Field(default=5.0, description="Accuracy in seconds of sunlit interval boundaries")
+    height_field_resolution_m: float = Field(default=2.0, description="Cell size in meters of height-field (DSM) shadow rasters")
+    height_field_max_cells: int = Field(default=4000000, description="Maximum cells of a height-field raster, shadow padding included")
+    grid_sunlight_max_points: int = Field(default=50000, description="Maximum sample points per grid sunlight request")
+    grid_sunlight_tile_size: int = Field(default=128, description="Grid sunlight tile edge in sample points (tiles are processed in parallel)")
+    grid_sunlight_workers: int = Field(default=1, description="Worker processes for grid sunlight analysis (1 = in-process, 0 = CPU count)")
+    facade_sample_spacing_m: float = Field(default=3.0, description="Distance in meters between facade sample points along a wall")
+    facade_default_floor_height_m: float = Field(default=3.0, description="Floor height in meters used when a building has no floor_count")
+    facade_sunlight_max_points: int = Field(default=20000, description="Maximum facade sample points per facade sunlight request")
+    shadow_cache_ttl_hours: int = Field(default=168, description="Lifetime in hours of rows written to shadow_analysis_cache")
+
+    # Startup
+    warmup_heavy_imports: bool = Field(default=True, description="Import pandas/pvlib/astral/reportlab in the background after startup")
+
     # Logging
     log_level: str = Field(default="INFO", description="Log level")
     log_format: str = Field(default="json", description="Log format")
@@ -57,6 +94,31 @@ class Settings(BaseSettings):
         """Parse CORS origins string to list"""
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
+    @property
+    def solar_precalc_sites_list(self) -> List[Tuple[float, float]]:
+        """Parse pre-calculation sites string to list of (lat, lng)"""
+        sites = []
+        for site in self.solar_precalc_sites.split(";"):
+            if site.strip():
+                lat, lng = site.split(",")
+                sites.append((float(lat), float(lng)))
+        return sites
+
+    @property
+    def solar_precalc_years_list(self) -> List[int]:
+        """Parse pre-calculation years string to list of years"""
+        years = []
+        for part in self.solar_precalc_years.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if "-" in part:
+                first, last = part.split("-")
+                years.extend(range(int(first), int(last) + 1))
+            else:
+                years.append(int(part))
+        return years
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
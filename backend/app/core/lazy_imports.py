@@ -0,0 +1,93 @@
+"""
+Lazy loading of heavy optional dependencies
+
+Scientific and reporting packages (pandas, pvlib, astral, reportlab) are
+only needed on a few code paths but dominate start-up time. They are
+imported on first use through ``optional_import`` and can be pre-loaded in
+the background with ``warm_up`` once the application is serving requests.
+"""
+import importlib
+import importlib.util
+import logging
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Modules loaded on first use instead of at import time
+HEAVY_MODULES = (
+    "pandas",
+    "pvlib.solarposition",
+    "astral.sun",
+    "reportlab.platypus"
+)
+
+_import_lock = threading.RLock()
+_missing = set()
+
+
+def is_available(name: str) -> bool:
+    """
+    Check whether a package is installed without importing it
+
+    Args:
+        name: Module name (only the top-level package is checked)
+
+    Returns:
+        True if the package can be imported
+    """
+    package = name.split(".")[0]
+    if package in sys.modules:
+        return True
+    try:
+        return importlib.util.find_spec(package) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def optional_import(name: str) -> Optional[ModuleType]:
+    """
+    Import a module on first use
+
+    Always goes through ``importlib.import_module``: a module appears in
+    ``sys.modules`` before its body has run, and the import system's
+    per-module lock makes callers wait until a concurrent import (e.g. by
+    ``warm_up``) has finished. Once loaded this is a dictionary lookup.
+
+    Args:
+        name: Module name, e.g. "pvlib.solarposition"
+
+    Returns:
+        The module, or None if it is not installed
+    """
+    if name in _missing:
+        return None
+
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        with _import_lock:
+            _missing.add(name)
+        logger.warning(f"Optional dependency {name} not available: {e}")
+        return None
+
+
+def warm_up(modules: Iterable[str] = HEAVY_MODULES) -> Dict[str, Optional[float]]:
+    """
+    Import heavy modules ahead of their first use
+
+    Args:
+        modules: Module names to load
+
+    Returns:
+        Mapping of module name to load time in seconds (None if unavailable)
+    """
+    timings = {}
+    for name in modules:
+        started = time.perf_counter()
+        module = optional_import(name)
+        timings[name] = round(time.perf_counter() - started, 4) if module is not None else None
+    return timings
@@ -0,0 +1,245 @@
+"""
+Time handling utilities
+
+Cached timezone lookup and vectorized conversion between local wall-clock
+times and UTC epoch seconds. DST transitions are resolved from the pytz
+transition tables with NumPy, so whole timelines are converted without
+per-timestamp ``localize``/``astimezone`` calls. Ambiguous and nonexistent
+local times follow ``pytz`` ``localize(..., is_dst=False)`` semantics
+(standard time is chosen).
+"""
+from datetime import date, datetime, timedelta, tzinfo
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pytz
+
+_EPOCH_DAY = np.datetime64("1970-01-01", "D")
+
+
+@lru_cache(maxsize=128)
+def get_timezone(name: str) -> tzinfo:
+    """
+    Get a cached pytz timezone object
+
+    Args:
+        name: IANA timezone name
+
+    Returns:
+        pytz timezone
+    """
+    return pytz.timezone(name)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def parse_date(value: Optional[str], timezone: str = "Asia/Shanghai") -> date:
+    """
+    Parse a YYYY-MM-DD string (cached), defaulting to today in the timezone
+
+    Args:
+        value: Date string or None
+        timezone: Timezone used to determine "today"
+
+    Returns:
+        Date object
+    """
+    if value:
+        return _parse_date(value)
+    return datetime.now(get_timezone(timezone)).date()
+
+
+@lru_cache(maxsize=128)
+def _transition_table(name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Build (transition_utc_seconds, utc_offset_seconds, is_dst) arrays for a zone
+    """
+    tz = get_timezone(name)
+    transitions = getattr(tz, "_utc_transition_times", None)
+    info = getattr(tz, "_transition_info", None)
+
+    if not transitions or not info:
+        offset = tz.utcoffset(datetime(2000, 1, 1))
+        seconds = int(offset.total_seconds()) if offset is not None else 0
+        return (
+            np.array([np.iinfo(np.int64).min // 2], dtype=np.int64),
+            np.array([seconds], dtype=np.int64),
+            np.array([False])
+        )
+
+    epoch = datetime(1970, 1, 1)
+    starts = [np.iinfo(np.int64).min // 2]
+    starts.extend(int((t - epoch).total_seconds()) for t in transitions[1:])
+    offsets = [int(utcoffset.total_seconds()) for utcoffset, _, _ in info]
+    is_dst = [dst != timedelta(0) for _, dst, _ in info]
+
+    return (
+        np.array(starts, dtype=np.int64),
+        np.array(offsets, dtype=np.int64),
+        np.array(is_dst, dtype=bool)
+    )
+
+
+def utc_offsets(unixtime: np.ndarray, timezone: str) -> np.ndarray:
+    """
+    Get UTC offsets (seconds) in effect at UTC instants
+
+    Args:
+        unixtime: Seconds since 1970-01-01 UTC
+        timezone: Timezone name
+
+    Returns:
+        Integer offset array with the same shape as unixtime
+    """
+    starts, offsets, _ = _transition_table(timezone)
+    unixtime = np.asarray(unixtime)
+    index = np.searchsorted(starts, np.floor(unixtime).astype(np.int64), side="right") - 1
+    return offsets[np.clip(index, 0, len(offsets) - 1)]
+
+
+def local_to_unixtime(
+    dates: Sequence,
+    seconds_of_day: Sequence,
+    timezone: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Convert local wall-clock times to UTC epoch seconds (vectorized)
+
+    Args:
+        dates: Local dates (date objects, ISO strings or datetime64[D]),
+            broadcastable against seconds_of_day
+        seconds_of_day: Seconds after local midnight
+        timezone: Timezone name
+
+    Returns:
+        Tuple of (unixtime float array, utc_offset seconds int array)
+    """
+    day_numbers = (np.asarray(dates, dtype="datetime64[D]") - _EPOCH_DAY).astype(np.int64)
+    seconds = np.asarray(seconds_of_day)
+    local_seconds = day_numbers * 86400 + np.floor(seconds).astype(np.int64)
+    fraction = seconds - np.floor(seconds)
+
+    starts, offsets, is_dst = _transition_table(timezone)
+    last = len(offsets) - 1
+
+    # The true period lies between the periods found with the largest and
+    # smallest offsets; check the first few candidates from there.
+    base = np.searchsorted(starts, local_seconds - offsets.max(), side="right") - 1
+    chosen = np.full(local_seconds.shape, -1, dtype=np.int64)
+    chosen_dst = np.zeros(local_seconds.shape, dtype=bool)
+
+    for step in range(3):
+        candidate = np.clip(base + step, 0, last)
+        utc = local_seconds - offsets[candidate]
+        next_start = np.where(candidate < last, starts[np.minimum(candidate + 1, last)], np.iinfo(np.int64).max)
+        valid = (utc >= starts[candidate]) & (utc < next_start)
+        # Ambiguous local times prefer standard time, then the later period
+        better = valid & ((chosen < 0) | chosen_dst | ~is_dst[candidate])
+        chosen = np.where(better, candidate, chosen)
+        chosen_dst = np.where(better, is_dst[candidate], chosen_dst)
+
+    # Nonexistent local times (spring-forward gap) use the standard offset
+    gap = chosen < 0
+    if np.any(gap):
+        first = np.clip(base, 0, last)
+        second = np.clip(base + 1, 0, last)
+        fallback = np.where(is_dst[first] & ~is_dst[second], second, first)
+        chosen = np.where(gap, fallback, chosen)
+
+    offset = offsets[chosen]
+    return (local_seconds - offset).astype(float) + fraction, offset
+
+
+def build_local_time_grid(
+    start_date: date,
+    end_date: date,
+    step_minutes: int,
+    timezone: str
+) -> Dict[str, np.ndarray]:
+    """
+    Build a grid of local wall-clock times and their UTC epoch seconds
+
+    Every date gets the same wall-clock samples (00:00, step, ...), so DST
+    days keep the same number of samples as any other day.
+
+    Args:
+        start_date: First date
+        end_date: Last date (inclusive)
+        step_minutes: Step between samples in minutes
+        timezone: Timezone name
+
+    Returns:
+        Dictionary of arrays: date (datetime64[D]), minute (minute of day),
+        unixtime (float seconds) and utc_offset (seconds)
+    """
+    if step_minutes <= 0:
+        raise ValueError("step_minutes must be positive")
+
+    days = np.arange(np.datetime64(start_date, "D"), np.datetime64(end_date, "D") + 1)
+    minutes = np.arange(0, 1440, step_minutes, dtype=np.int64)
+
+    grid_days = np.repeat(days, len(minutes))
+    grid_minutes = np.tile(minutes, len(days))
+    unixtime, offsets = local_to_unixtime(grid_days, grid_minutes * 60, timezone)
+
+    return {
+        "date": grid_days,
+        "minute": grid_minutes,
+        "unixtime": unixtime,
+        "utc_offset": offsets
+    }
+
+
+def datetimes_to_unixtime(values: Sequence[datetime], timezone: str) -> np.ndarray:
+    """
+    Convert datetimes to UTC epoch seconds; naive values are local to timezone
+
+    Args:
+        values: Datetimes (aware or naive)
+        timezone: Timezone name for naive values
+
+    Returns:
+        Float array of epoch seconds
+    """
+    result = np.empty(len(values), dtype=float)
+    naive_index = []
+    for i, value in enumerate(values):
+        if value.tzinfo is not None:
+            result[i] = value.timestamp()
+        else:
+            naive_index.append(i)
+
+    if naive_index:
+        naive = [values[i] for i in naive_index]
+        dates = np.array([v.date() for v in naive], dtype="datetime64[D]")
+        seconds = np.array(
+            [v.hour * 3600 + v.minute * 60 + v.second + v.microsecond / 1e6 for v in naive],
+            dtype=float
+        )
+        result[naive_index] = local_to_unixtime(dates, seconds, timezone)[0]
+
+    return result
+
+
+def format_local_iso(unixtime: np.ndarray, offsets: np.ndarray) -> List[str]:
+    """
+    Format epoch seconds as local ISO 8601 strings with UTC offsets
+
+    Args:
+        unixtime: Seconds since 1970-01-01 UTC
+        offsets: UTC offsets in seconds (same shape)
+
+    Returns:
+        List of strings like 2024-06-21T12:00:00+08:00
+    """
+    local = (np.floor(unixtime).astype(np.int64) + offsets).astype("datetime64[s]")
+    suffix = {}
+    for offset in np.unique(offsets):
+        sign = "+" if offset >= 0 else "-"
+        hours, remainder = divmod(abs(int(offset)), 3600)
+        suffix[int(offset)] = f"{sign}{hours:02d}:{remainder // 60:02d}"
+    return [f"{text}{suffix[int(offset)]}" for text, offset in zip(np.datetime_as_string(local), offsets)]
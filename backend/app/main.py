@@ -6,6 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 from datetime import datetime
 
@@ -13,6 +14,7 @@ from app.config import settings
 from app.database import engine, Base
 from app.api import auth, buildings, solar, shadows, analysis, reports
 from app.core.exceptions import BaseAPIException
+from app.core.lazy_imports import warm_up
 from app.core.responses import error_response
 
 # Configure logging
@@ -40,14 +42,33 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Failed to create database tables: {e}")
 
+    # Load heavy scientific/reporting modules off the event loop
+    warmup_task = None
+    if settings.warmup_heavy_imports:
+        warmup_task = asyncio.create_task(_warm_up_imports())
+
     logger.info("SolarArc Pro backend started successfully")
 
     yield
 
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+
     # Shutdown
     logger.info("Shutting down SolarArc Pro backend...")
 
 
+async def _warm_up_imports():
+    """
+    Import lazily loaded dependencies in a worker thread
+    """
+    try:
+        timings = await asyncio.to_thread(warm_up)
+        logger.info(f"Warm-up imports finished: {timings}")
+    except Exception as e:
+        logger.warning(f"Warm-up imports failed: {e}")
+
+
 # Create FastAPI application
 app = FastAPI(
     title="SolarArc Pro API",
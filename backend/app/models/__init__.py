@@ -5,6 +5,7 @@ from app.models.user import User, PasswordReset
 from app.models.building import Building
 from app.models.solar_position import SolarPositionPrecalc
 from app.models.shadow_analysis import ShadowAnalysisCache
+from app.models.shading_graph import BuildingShadingEdge, BuildingShadingNode
 from app.models.project import Project
 from app.models.analysis_report import AnalysisReport
 from app.models.building_score import BuildingScore
@@ -15,6 +16,8 @@ __all__ = [
     "Building",
     "SolarPositionPrecalc",
     "ShadowAnalysisCache",
+    "BuildingShadingEdge",
+    "BuildingShadingNode",
     "Project",
     "AnalysisReport",
     "BuildingScore",
@@ -0,0 +1,41 @@
+"""
+Building Shading Graph Models
+"""
+from sqlalchemy import Column, Numeric, DateTime, ForeignKey
+from sqlalchemy.dialects.mysql import VARCHAR
+from datetime import datetime
+
+from app.database import Base
+
+
+class BuildingShadingEdge(Base):
+    """Directed edge: the source building can shade the target at some time of the year"""
+
+    __tablename__ = "building_shading_edges"
+
+    source_building_id = Column(
+        VARCHAR(36), ForeignKey("buildings.id", ondelete="CASCADE"), primary_key=True, comment="遮挡源建筑ID"
+    )
+    target_building_id = Column(
+        VARCHAR(36), ForeignKey("buildings.id", ondelete="CASCADE"), primary_key=True, index=True, comment="被遮挡建筑ID"
+    )
+    distance = Column(Numeric(10, 2), nullable=False, comment="底面最近距离(米)")
+    created_at = Column(DateTime, default=datetime.utcnow, comment="创建时间")
+
+    def __repr__(self):
+        return f"<BuildingShadingEdge(source={self.source_building_id}, target={self.target_building_id})>"
+
+
+class BuildingShadingNode(Base):
+    """Building whose shading edges (in and out) are up to date"""
+
+    __tablename__ = "building_shading_nodes"
+
+    building_id = Column(
+        VARCHAR(36), ForeignKey("buildings.id", ondelete="CASCADE"), primary_key=True, comment="建筑ID"
+    )
+    building_updated_at = Column(DateTime, nullable=True, comment="计算时建筑的更新时间")
+    computed_at = Column(DateTime, default=datetime.utcnow, comment="计算时间")
+
+    def __repr__(self):
+        return f"<BuildingShadingNode(building_id={self.building_id}, computed_at={self.computed_at})>"
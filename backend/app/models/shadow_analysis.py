@@ -1,7 +1,7 @@
 """
 Shadow Analysis Models
 """
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, Date, ForeignKey
+from sqlalchemy import Column, String, Integer, Numeric, DateTime, Date, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.mysql import VARCHAR
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -49,5 +49,10 @@ class ShadowAnalysisCache(Base):
     # Relationships
     building = relationship("Building", backref="shadow_analyses")
 
+    # One row per building frame
+    __table_args__ = (
+        UniqueConstraint('building_id', 'analysis_date', 'analysis_hour', name='idx_building_datetime'),
+    )
+
     def __repr__(self):
         return f"<ShadowAnalysisCache(id={self.id}, building_id={self.building_id}, date={self.analysis_date})>"
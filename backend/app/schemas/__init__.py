@@ -24,7 +24,11 @@ from app.schemas.solar import (
     SolarPositionResponse,
     SolarDailyPositionsRequest,
     SolarDailyPositionsResponse,
-    SolarHourlyPosition
+    SolarHourlyPosition,
+    SolarRangePositionsResponse,
+    SolarPrecision,
+    SolarBatchRequest,
+    SolarBatchResponse
 )
 from app.schemas.analysis import (
     PointSunlightRequest,
@@ -57,6 +61,10 @@ __all__ = [
     "SolarDailyPositionsRequest",
     "SolarDailyPositionsResponse",
     "SolarHourlyPosition",
+    "SolarRangePositionsResponse",
+    "SolarPrecision",
+    "SolarBatchRequest",
+    "SolarBatchResponse",
     "PointSunlightRequest",
     "PointSunlightResponse",
     "ShadowOverlapRequest",
@@ -20,6 +20,49 @@ class PointSunlightRequest(BaseModel):
     end_hour: int = Field(18, ge=0, le=23)
 
 
+class SunlightIntervalRequest(BaseModel):
+    """Exact sunlit-interval analysis request for one point"""
+    point: PointLocation
+    height: float = Field(0.0, ge=0, le=1000, description="Height of the point above ground in meters")
+    date: Optional[str] = Field(None, description="Date in YYYY-MM-DD format")
+    start_hour: int = Field(0, ge=0, le=24, description="Window start hour")
+    end_hour: int = Field(24, ge=0, le=24, description="Window end hour")
+    min_continuous_hours: Optional[float] = Field(
+        None, gt=0, le=24, description="Required continuous sunlight in hours (e.g. a daylight regulation)"
+    )
+
+
+class SunlightRangeRequest(BaseModel):
+    """Multi-date sunlight analysis request for points of one site"""
+    points: List[PointLocation] = Field(..., min_length=1, max_length=200, description="Points to analyze")
+    height: float = Field(0.0, ge=0, le=1000, description="Height of the points above ground in meters")
+    start_date: str = Field(..., description="Start date in YYYY-MM-DD format")
+    end_date: str = Field(..., description="End date in YYYY-MM-DD format (inclusive)")
+    step_minutes: int = Field(10, ge=1, le=60, description="Minutes between sun positions")
+
+
+class GridSunlightRequest(BaseModel):
+    """Grid sunlight analysis request (give either bbox or polygon)"""
+    bbox: Optional[List[float]] = Field(
+        None, min_length=4, max_length=4, description="[min_lng, min_lat, max_lng, max_lat] of the analysis area"
+    )
+    polygon: Optional[Dict[str, Any]] = Field(None, description="GeoJSON Polygon of the analysis area")
+    spacing: float = Field(10.0, gt=0, le=1000, description="Distance between sample points in meters")
+    date: Optional[str] = Field(None, description="Date in YYYY-MM-DD format")
+    step_minutes: int = Field(10, ge=1, le=60, description="Minutes between sun positions")
+
+
+class FacadeSunlightRequest(BaseModel):
+    """Facade sunlight analysis request"""
+    building_id: str
+    date: Optional[str] = Field(None, description="Date in YYYY-MM-DD format")
+    step_minutes: int = Field(10, ge=1, le=60, description="Minutes between sun positions")
+    spacing: Optional[float] = Field(
+        None, gt=0, le=100, description="Distance between sample points along a wall in meters (default: FACADE_SAMPLE_SPACING_M)"
+    )
+    include_points: bool = Field(False, description="Return every sample point with its sunlight hours")
+
+
 class HourlyBreakdown(BaseModel):
     """Hourly sunlight breakdown"""
     hour: int
@@ -38,7 +81,10 @@ class PointSunlightResponse(BaseModel):
 class ShadowOverlapRequest(BaseModel):
     """Shadow overlap analysis request"""
     target_building_id: str
-    surrounding_building_ids: List[str]
+    surrounding_building_ids: Optional[List[str]] = Field(
+        None,
+        description="Surrounding building IDs (default: discovered from the maximum shadow reach)"
+    )
     date: Optional[str] = Field(None, description="Date in YYYY-MM-DD format")
     hour: int = Field(12, ge=0, le=23)
 
@@ -65,6 +111,37 @@ class ShadowCalculationRequest(BaseModel):
     minute: int = Field(0, ge=0, le=59)
 
 
+class ShadowSweepRequest(BaseModel):
+    """Whole-day shadow sweep request"""
+    building_ids: List[str]
+    date: Optional[str] = Field(None, description="Date in YYYY-MM-DD format")
+    step_minutes: int = Field(5, ge=1, le=60, description="Minutes between frames")
+    min_altitude: float = Field(0.0, ge=0, le=90, description="Skip frames with the sun at or below this altitude (degrees)")
+    include_envelope: bool = Field(True, description="Return each building's swept shadow envelope for the day")
+    include_frame_areas: bool = Field(True, description="Return each building's shadow area per frame")
+    include_frame_polygons: bool = Field(False, description="Return each building's shadow polygon per frame")
+
+
+class HeightFieldShadowRequest(BaseModel):
+    """Height-field (DSM) shadow raster request"""
+    bbox: List[float] = Field(
+        ..., min_length=4, max_length=4, description="[min_lng, min_lat, max_lng, max_lat] of the area"
+    )
+    date: Optional[str] = Field(None, description="Date in YYYY-MM-DD format")
+    hour: int = Field(12, ge=0, le=23)
+    minute: int = Field(0, ge=0, le=59)
+    resolution: Optional[float] = Field(
+        None, gt=0, le=100, description="Cell size in meters (default: HEIGHT_FIELD_RESOLUTION_M)"
+    )
+
+
+class ShadingGraphRebuildRequest(BaseModel):
+    """Shading graph rebuild request"""
+    bbox: List[float] = Field(
+        ..., min_length=4, max_length=4, description="[min_lng, min_lat, max_lng, max_lat] of the buildings to refresh"
+    )
+
+
 class ShadowPolygon(BaseModel):
     """Shadow polygon"""
     building_id: str
@@ -4,6 +4,14 @@ Solar Position Schemas
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+from enum import Enum
+
+
+class SolarPrecision(str, Enum):
+    """Solar engine precision tier"""
+    SPA = "spa"
+    NOAA = "noaa"
+    EPHEMERIS = "ephemeris"
 
 
 class SolarPositionRequest(BaseModel):
@@ -14,6 +22,7 @@ class SolarPositionRequest(BaseModel):
     hour: Optional[int] = Field(None, ge=0, le=23, description="Hour (0-23)")
     minute: Optional[int] = Field(0, ge=0, le=59, description="Minute (0-59)")
     timezone: Optional[str] = Field("Asia/Shanghai", description="Timezone")
+    precision: SolarPrecision = Field(SolarPrecision.SPA, description="Solar engine precision tier")
 
 
 class SolarHourlyPosition(BaseModel):
@@ -44,3 +53,40 @@ class SolarDailyPositionsResponse(BaseModel):
     """Daily solar positions response"""
     date: str
     positions: List[SolarHourlyPosition]
+
+
+class SolarRangePositionsResponse(BaseModel):
+    """Columnar solar positions over a date range"""
+    start_date: str
+    end_date: str
+    step_minutes: int
+    timestamps: List[str]
+    altitude: List[float] = Field(..., description="Solar altitude angles in degrees")
+    azimuth: List[float] = Field(..., description="Solar azimuth angles in degrees")
+
+
+class SolarBatchPoint(BaseModel):
+    """Point location for batch solar calculation"""
+    lat: float = Field(..., ge=-90, le=90)
+    lng: float = Field(..., ge=-180, le=180)
+
+
+class SolarBatchRequest(BaseModel):
+    """Multi-location batch solar position request"""
+    points: List[SolarBatchPoint] = Field(..., min_length=1, description="Locations to evaluate")
+    timestamps: Optional[List[datetime]] = Field(
+        None,
+        description="ISO timestamps; naive values are interpreted in the request timezone"
+    )
+    date: Optional[str] = Field(None, description="Date in YYYY-MM-DD format (used when timestamps is omitted)")
+    hour: Optional[int] = Field(None, ge=0, le=23, description="Hour (used when timestamps is omitted)")
+    minute: int = Field(0, ge=0, le=59, description="Minute (used when timestamps is omitted)")
+    timezone: str = Field("Asia/Shanghai", description="Timezone")
+    precision: SolarPrecision = Field(SolarPrecision.SPA, description="Solar engine precision tier")
+
+
+class SolarBatchResponse(BaseModel):
+    """Columnar batch solar positions (one row per point, one column per timestamp)"""
+    timestamps: List[str]
+    altitude: List[List[float]]
+    azimuth: List[List[float]]
@@ -11,10 +11,19 @@ from app.services.auth_service import (
 from app.services.solar_service import (
     calculate_solar_position,
     calculate_daily_solar_positions,
-    get_sunrise_sunset
+    calculate_range_solar_positions,
+    calculate_solar_positions_batch,
+    calculate_multi_location_positions,
+    get_sunrise_sunset,
+    calculate_yearly_sunrise_sunset,
+    get_solar_cache_stats
 )
 from app.services.shadow_service import (
     calculate_building_shadow,
+    calculate_building_shadows_batch,
+    calculate_building_shadows_cached,
+    calculate_daily_shadow_sweep,
+    calculate_building_shadow_overlap,
     calculate_shadow_overlap,
     calculate_shadow_comparison
 )
@@ -32,8 +41,17 @@ __all__ = [
     "verify_password_reset_token",
     "calculate_solar_position",
     "calculate_daily_solar_positions",
+    "calculate_range_solar_positions",
+    "calculate_solar_positions_batch",
+    "calculate_multi_location_positions",
     "get_sunrise_sunset",
+    "calculate_yearly_sunrise_sunset",
+    "get_solar_cache_stats",
     "calculate_building_shadow",
+    "calculate_building_shadows_batch",
+    "calculate_building_shadows_cached",
+    "calculate_daily_shadow_sweep",
+    "calculate_building_shadow_overlap",
     "calculate_shadow_overlap",
     "calculate_shadow_comparison",
     "create_analysis_report",
@@ -0,0 +1,153 @@
+"""
+Horizon Masks
+
+For a fixed point, every surrounding building is summarized by the
+elevation angle of the skyline it forms in each azimuth direction. The
+highest elevation per azimuth bin is the point's horizon mask: the sun is
+blocked exactly when it is below the horizon of its azimuth bin, so a mask
+built once answers sun occlusion for every date and time with one array
+comparison.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+import shapely
+
+from app.services.spatial_index import BuildingIndex
+
+DEFAULT_BINS = 720
+
+# Elevations are stored as unsigned centidegrees
+_SCALE = 100.0
+
+
+class HorizonMask:
+    """
+    Horizon elevation per azimuth bin for a set of points
+
+    Bin k covers azimuths [k * width, (k + 1) * width) clockwise from north
+    and holds the horizon elevation in the direction of its center.
+    """
+
+    def __init__(self, elevations: np.ndarray):
+        """
+        Args:
+            elevations: Horizon elevation in degrees, shape (points, bins)
+        """
+        elevations = np.atleast_2d(np.asarray(elevations, dtype=float))
+        self.elevations = np.round(np.clip(elevations, 0.0, 90.0) * _SCALE).astype(np.uint16)
+
+    @property
+    def bins(self) -> int:
+        return self.elevations.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.elevations.nbytes
+
+    def __len__(self) -> int:
+        return self.elevations.shape[0]
+
+    @classmethod
+    def build(
+        cls,
+        index: BuildingIndex,
+        origins: np.ndarray,
+        origin_heights: Optional[Sequence[float]] = None,
+        bins: int = DEFAULT_BINS
+    ) -> "HorizonMask":
+        """
+        Build the horizon masks of points from the buildings in an index
+
+        A prism seen from a point rises highest where the line of sight first
+        enters its footprint, so the horizon in a direction is the largest
+        atan((height - origin_height) / distance) over the footprint edges
+        that direction crosses.
+
+        Args:
+            index: Surrounding buildings (local meters)
+            origins: (x, y) of each point in local meters, shape (n, 2)
+            origin_heights: Height of each point above ground in meters (default: 0)
+            bins: Number of azimuth bins
+
+        Returns:
+            HorizonMask of the points
+        """
+        origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+        if origin_heights is None:
+            origin_heights = np.zeros(len(origins))
+        origin_heights = np.asarray(origin_heights, dtype=float)
+
+        elevations = np.zeros((len(origins), bins))
+        if not len(index):
+            return cls(elevations)
+
+        width = 360.0 / bins
+        centers = np.radians((np.arange(bins) + 0.5) * width)
+        directions = np.column_stack([np.sin(centers), np.cos(centers)])
+        edge_height = np.repeat(index.heights, np.diff(index.edge_offsets))
+
+        for point, (origin, height) in enumerate(zip(origins, origin_heights)):
+            # A point inside a building sees nothing but its walls
+            if shapely.contains_xy(index.footprints, origin[0], origin[1]).any():
+                elevations[point] = 90.0
+                continue
+
+            taller = edge_height > height
+            start = index.edge_start[taller] - origin
+            end = index.edge_end[taller] - origin
+            rise = edge_height[taller] - height
+
+            # Bins whose center direction lies within each edge's angular span
+            start_azimuth = np.degrees(np.arctan2(start[:, 0], start[:, 1]))
+            sweep = (np.degrees(np.arctan2(end[:, 0], end[:, 1])) - start_azimuth + 180.0) % 360.0 - 180.0
+            low = np.where(sweep >= 0, start_azimuth, start_azimuth + sweep)
+            first = np.ceil(low / width - 0.5).astype(np.int64)
+            counts = np.maximum(np.floor((low + np.abs(sweep)) / width - 0.5).astype(np.int64) - first + 1, 0)
+
+            edge = np.repeat(np.arange(len(counts)), counts)
+            bin_index = (first[edge] + np.arange(len(edge)) - np.repeat(np.cumsum(counts) - counts, counts)) % bins
+
+            # Distance along the bin direction to the edge
+            d = directions[bin_index]
+            a = start[edge]
+            e = end[edge] - a
+            denom = d[:, 0] * e[:, 1] - d[:, 1] * e[:, 0]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                t = (a[:, 0] * e[:, 1] - a[:, 1] * e[:, 0]) / denom
+            valid = (denom != 0) & (t >= 0)
+
+            np.maximum.at(
+                elevations[point],
+                bin_index[valid],
+                np.degrees(np.arctan2(rise[edge[valid]], t[valid]))
+            )
+
+        return cls(elevations)
+
+    def horizon(self, solar_azimuths: np.ndarray) -> np.ndarray:
+        """
+        Look up the horizon elevation towards each azimuth
+
+        Args:
+            solar_azimuths: Azimuths in degrees clockwise from north
+
+        Returns:
+            Horizon elevation in degrees, shape (points, len(solar_azimuths))
+        """
+        bin_index = (np.asarray(solar_azimuths, dtype=float) % 360.0 * (self.bins / 360.0)).astype(np.int64)
+        return self.elevations[:, np.minimum(bin_index, self.bins - 1)] / _SCALE
+
+    def is_sunlit(self, solar_altitudes: np.ndarray, solar_azimuths: np.ndarray) -> np.ndarray:
+        """
+        Test whether the sun is above each point's horizon
+
+        Args:
+            solar_altitudes: Solar altitude per time step in degrees
+            solar_azimuths: Solar azimuth per time step in degrees
+
+        Returns:
+            Boolean array of shape (points, time steps)
+        """
+        altitudes = np.asarray(solar_altitudes, dtype=float)
+        return (altitudes > 0) & (altitudes >= self.horizon(solar_azimuths))
@@ -0,0 +1,106 @@
+"""
+Local Metric Projection
+
+Shadow geometry is computed in a local east/north tangent plane (meters)
+around the analysis site instead of raw WGS84 degrees. The plane uses the
+WGS84 radii of curvature at the origin, which keeps distances and areas
+within a few parts in 10^5 over a city district. Projections are cached per
+(snapped) site so repeated requests reuse the same origin and scale, and
+areas are comparable across requests.
+"""
+from functools import lru_cache
+from typing import Tuple
+
+import math
+import numpy as np
+import shapely
+
+# WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_E2 = 6.69437999014e-3
+
+# Site origins are snapped to this grid (degrees) so nearby requests share a projection
+SITE_GRID_DEGREES = 0.01
+
+
+class LocalProjection:
+    """
+    Local tangent-plane projection around an origin
+
+    x is meters east and y is meters north of the origin.
+    """
+
+    def __init__(self, lat: float, lng: float):
+        self.origin_lat = lat
+        self.origin_lng = lng
+
+        sin_lat = math.sin(math.radians(lat))
+        w = 1.0 - WGS84_E2 * sin_lat * sin_lat
+        prime_vertical = WGS84_A / math.sqrt(w)
+        meridional = WGS84_A * (1.0 - WGS84_E2) / w ** 1.5
+
+        self.meters_per_degree_lng = math.radians(1.0) * prime_vertical * math.cos(math.radians(lat))
+        self.meters_per_degree_lat = math.radians(1.0) * meridional
+
+        self._origin = np.array([lng, lat])
+        self._scale = np.array([self.meters_per_degree_lng, self.meters_per_degree_lat])
+
+    def to_local_coords(self, coords: np.ndarray) -> np.ndarray:
+        """Convert (lng, lat) coordinate rows to (east, north) meters"""
+        return (np.asarray(coords, dtype=float) - self._origin) * self._scale
+
+    def to_geographic_coords(self, coords: np.ndarray) -> np.ndarray:
+        """Convert (east, north) meter rows to (lng, lat) degrees"""
+        return np.asarray(coords, dtype=float) / self._scale + self._origin
+
+    def to_local(self, geometries):
+        """
+        Project geometries (single or array) from lng/lat to local meters
+
+        Args:
+            geometries: Shapely geometry or array of geometries
+
+        Returns:
+            Geometries in local meters
+        """
+        return shapely.transform(geometries, self.to_local_coords)
+
+    def to_geographic(self, geometries):
+        """
+        Project geometries (single or array) from local meters to lng/lat
+
+        Args:
+            geometries: Shapely geometry or array of geometries
+
+        Returns:
+            Geometries in lng/lat degrees
+        """
+        return shapely.transform(geometries, self.to_geographic_coords)
+
+
+@lru_cache(maxsize=256)
+def _cached_projection(lat: float, lng: float) -> LocalProjection:
+    return LocalProjection(lat, lng)
+
+
+def get_site_projection(lat: float, lng: float) -> LocalProjection:
+    """
+    Get the cached local projection for the site containing a point
+
+    Args:
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+
+    Returns:
+        LocalProjection whose origin is the snapped site center
+    """
+    origin_lat, origin_lng = snap_site(lat, lng)
+    return _cached_projection(origin_lat, origin_lng)
+
+
+def snap_site(lat: float, lng: float) -> Tuple[float, float]:
+    """Snap a point to the site grid used as projection origin"""
+    return (
+        round(round(lat / SITE_GRID_DEGREES) * SITE_GRID_DEGREES, 6),
+        round(round(lng / SITE_GRID_DEGREES) * SITE_GRID_DEGREES, 6)
+    )
@@ -1,17 +1,23 @@
 """
 Report Generation Service
 """
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 import json
 
+from app.config import settings
 from app.models.analysis_report import AnalysisReport, AnalysisType
 from app.models.building_score import BuildingScore, GradeType
 from app.models.building import Building
 from app.schemas.analysis import PointSunlightRequest, ShadowOverlapRequest
 from app.services.solar_service import calculate_daily_solar_positions
 from app.services.shadow_service import calculate_shadow_overlap
+from app.services.shadow_raster import calculate_shadow_heatmap
+from app.services.shading_graph import get_shading_sources
+
+# Days sampled (evenly across the report range) for the shadow-hour heatmap
+HEATMAP_MAX_DAYS = 12
 
 
 def create_analysis_report(
@@ -106,6 +112,10 @@ def generate_building_scores(
     """
     scores = []
 
+    # Buildings that can shade each scored building (None when not in the graph)
+    buildings = db.query(Building).filter(Building.id.in_(building_ids)).all() if building_ids else []
+    shading_sources = get_shading_sources(db, buildings)
+
     for building_id in building_ids:
         # Get building
         building = db.query(Building).filter(Building.id == building_id).first()
@@ -142,7 +152,7 @@ def generate_building_scores(
             peak_sunlight_hours=peak_sunlight,
             continuous_sunlight_hours=continuous_sunlight,
             shadow_frequency=shadow_frequency,
-            shading_buildings=[]  # TODO: implement
+            shading_buildings=shading_sources.get(building_id)
         )
 
         db.add(score)
@@ -264,12 +274,30 @@ def _perform_analysis(
         "building_details": {}
     }
 
-    # TODO: Implement actual analysis logic
-    # For now, return placeholder data
+    # Shadow-hour heatmap over the analyzed buildings
+    buildings = db.query(Building).filter(Building.id.in_(set(building_ids))).all() if building_ids else []
+    if buildings:
+        from geoalchemy2.shape import to_shape
+
+        results["shadow_heatmap"] = calculate_shadow_heatmap(
+            [to_shape(building.footprint) for building in buildings],
+            [float(building.total_height) for building in buildings],
+            latitude,
+            longitude,
+            _sample_dates(date_start, date_end, HEATMAP_MAX_DAYS),
+            timezone=settings.tz
+        )
 
     return results
 
 
+def _sample_dates(date_start: date, date_end: date, max_days: int) -> List[date]:
+    """Pick up to max_days dates spread evenly over a range (both ends included)"""
+    days = max((date_end - date_start).days, 0)
+    offsets = sorted({round(i * days / (max_days - 1)) for i in range(max_days)}) if max_days > 1 else [0]
+    return [date_start + timedelta(days=offset) for offset in offsets]
+
+
 def _calculate_avg_sunlight_hours(
     building_id: str,
     analysis_results: Dict[str, Any]
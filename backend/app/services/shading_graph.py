@@ -0,0 +1,307 @@
+"""
+Building Shading Graph
+
+A directed graph of "building A can shade building B at some time of the
+year", persisted in building_shading_edges. Over a year the sun's shadow
+vectors per meter of height (above the altitude floor) sweep a region
+around the origin; a building's shadow can only fall inside its footprint
+grown by that region scaled by its height. The grown footprints are tested
+against all footprints with one STRtree query, so a district is linked in
+near-linear time instead of checking every pair.
+"""
+import logging
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry import box
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.time_utils import local_to_unixtime
+from app.models.building import Building
+from app.models.shading_graph import BuildingShadingEdge, BuildingShadingNode
+from app.services.projection import get_site_projection, snap_site
+from app.services.shadow_service import shading_search_bounds
+from app.services.solar_service import calculate_solar_positions_batch
+from app.services.spatial_index import query_buildings_in_bbox
+
+logger = logging.getLogger(__name__)
+
+# Sampling of the annual sun path (the path repeats yearly, any year will do)
+SUN_PATH_YEAR = 2024
+SUN_PATH_STEP_DAYS = 3
+SUN_PATH_STEP_MINUTES = 5
+
+# Azimuth bins of the annual shadow envelope
+SHADOW_SECTORS = 72
+
+# Edge rows per bulk insert statement
+EDGE_INSERT_CHUNK = 1000
+
+
+def annual_shadow_sectors(lat: float, lng: float, min_solar_altitude: Optional[float] = None) -> np.ndarray:
+    """
+    Region swept by a year of shadow vectors per meter of height
+
+    Shadow directions are binned by azimuth; each bin the sun passes becomes
+    a triangle from the origin wide enough to contain the circular sector of
+    the longest shadow in that bin. The union of the triangles contains every
+    shadow vector of the year but, unlike a convex hull, stays empty towards
+    the sun side (no shadow ever points due south north of the tropics).
+
+    Args:
+        lat: Site latitude
+        lng: Site longitude
+        min_solar_altitude: Lower sun positions are treated as being at
+            this altitude in degrees (default: shadow_min_sun_altitude)
+
+    Returns:
+        Array of shape (sectors, 2, 2) with the two outer vertices (x east,
+        y north) of each triangle in meters per meter of height
+    """
+    if min_solar_altitude is None:
+        min_solar_altitude = settings.shadow_min_sun_altitude
+    site_lat, site_lng = snap_site(lat, lng)
+    return _annual_shadow_sectors(site_lat, site_lng, float(min_solar_altitude))
+
+
+@lru_cache(maxsize=256)
+def _annual_shadow_sectors(lat: float, lng: float, min_solar_altitude: float) -> np.ndarray:
+    """Cached per snapped site and altitude floor"""
+    days = np.arange(np.datetime64(f"{SUN_PATH_YEAR}-01-01"), np.datetime64(f"{SUN_PATH_YEAR + 1}-01-01"), SUN_PATH_STEP_DAYS)
+    seconds = np.arange(0, 86400, SUN_PATH_STEP_MINUTES * 60)
+    unixtime, _ = local_to_unixtime(np.repeat(days, len(seconds)), np.tile(seconds, len(days)), "UTC")
+    sun = calculate_solar_positions_batch(lat, lng, unixtime)
+
+    # Clamping low suns to the floor keeps their azimuths in the envelope
+    up = sun["altitude"] > 0
+    length = 1.0 / np.tan(np.radians(np.maximum(sun["altitude"][up], min_solar_altitude)))
+    shadow_azimuth = (sun["azimuth"][up] + 180.0) % 360.0
+
+    width = 360.0 / SHADOW_SECTORS
+    sector = np.minimum((shadow_azimuth / width).astype(np.int64), SHADOW_SECTORS - 1)
+    longest = np.zeros(SHADOW_SECTORS)
+    np.maximum.at(longest, sector, length)
+
+    # The sun moves between samples; widen every bin to its neighbours'
+    # lengths so bins it crossed between two samples are covered too
+    reach = np.maximum.reduce([longest, np.roll(longest, 1), np.roll(longest, -1)])
+    passed = np.flatnonzero(reach > 0)
+    reach = reach[passed] / np.cos(np.radians(width / 2))
+    edges = np.radians(np.column_stack([passed, passed + 1]) * width)
+    return np.stack([np.sin(edges), np.cos(edges)], axis=-1) * reach[:, None, None]
+
+
+def shading_envelopes(
+    footprints: np.ndarray,
+    heights: np.ndarray,
+    sectors: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Regions each building's shadow can reach over a year
+
+    Each building gets one convex piece per sector: the hull of its footprint
+    and the footprint moved to the sector's two outer vertices (scaled by the
+    building height). The union of a building's pieces is its envelope.
+
+    Args:
+        footprints: Footprint Polygons in local meters
+        heights: Building heights in meters
+        sectors: Sector triangles from annual_shadow_sectors
+
+    Returns:
+        Tuple of (convex Polygons, index of the building of each Polygon)
+    """
+    heights = np.maximum(np.asarray(heights, dtype=float), 0.0)
+    coords, owner = shapely.get_coordinates(shapely.get_exterior_ring(footprints), return_index=True)
+
+    # Offsets per sector: the origin and the two outer vertices
+    offsets = np.concatenate([np.zeros((len(sectors), 1, 2)), sectors], axis=1)
+    grown = coords[:, None, None, :] + offsets[None] * heights[owner][:, None, None, None]
+    piece = owner[:, None, None] * len(sectors) + np.arange(len(sectors))[None, :, None]
+
+    order = np.argsort(np.broadcast_to(piece, grown.shape[:3]).ravel(), kind="stable")
+    points = shapely.multipoints(
+        grown.reshape(-1, 2)[order],
+        indices=np.broadcast_to(piece, grown.shape[:3]).ravel()[order]
+    )
+    return shapely.convex_hull(points), np.repeat(np.arange(len(footprints)), len(sectors))
+
+
+def build_shading_edges(
+    footprints: np.ndarray,
+    heights: np.ndarray,
+    sectors: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find every (source, target) pair where the source can shade the target
+
+    Args:
+        footprints: Footprint Polygons in local meters
+        heights: Building heights in meters
+        sectors: Sector triangles from annual_shadow_sectors
+
+    Returns:
+        Tuple of (source indices, target indices, footprint distances in meters)
+    """
+    footprints = np.asarray(footprints, dtype=object)
+    heights = np.asarray(heights, dtype=float)
+    casting = np.flatnonzero(heights > 0)
+    if not len(casting) or not len(sectors):
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, np.array([])
+
+    envelopes, owner = shading_envelopes(footprints[casting], heights[casting], sectors)
+    tree = shapely.STRtree(footprints)
+    piece, target = tree.query(envelopes, predicate="intersects")
+
+    pairs = np.unique(casting[owner[piece]] * len(footprints) + target)
+    source, target = np.divmod(pairs, len(footprints))
+    other = source != target
+    source, target = source[other], target[other]
+    return source, target, shapely.distance(footprints[source], footprints[target])
+
+
+def refresh_shading_graph(db: Session, buildings: Sequence[Building]) -> int:
+    """
+    Recompute the incoming and outgoing shading edges of buildings
+
+    Neighbours are loaded with one spatial query around the buildings; the
+    edges touching the buildings are replaced and the buildings are marked
+    up to date in building_shading_nodes. Call this after buildings are
+    added or changed; deleting a building removes its edges by cascade.
+
+    Args:
+        db: Database session
+        buildings: Buildings to refresh (committed rows)
+
+    Returns:
+        Number of edges written
+    """
+    if not buildings:
+        return 0
+
+    from geoalchemy2.shape import to_shape
+
+    refreshed = {building.id for building in buildings}
+    area = box(*shapely.total_bounds([to_shape(building.footprint) for building in buildings]))
+    neighbours = query_buildings_in_bbox(db, shading_search_bounds(
+        area, settings.shadow_max_building_height, settings.shadow_min_sun_altitude
+    ))
+    by_id = {building.id: building for building in neighbours}
+    by_id.update({building.id: building for building in buildings})
+    nodes = list(by_id.values())
+
+    centroid = area.centroid
+    projection = get_site_projection(centroid.y, centroid.x)
+    footprints = projection.to_local(np.array([to_shape(node.footprint) for node in nodes], dtype=object))
+    heights = np.array([float(node.total_height) for node in nodes])
+
+    source, target, distance = build_shading_edges(
+        footprints, heights, annual_shadow_sectors(centroid.y, centroid.x)
+    )
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "source_building_id": nodes[s].id,
+            "target_building_id": nodes[t].id,
+            "distance": round(float(d), 2),
+            "created_at": now
+        }
+        for s, t, d in zip(source, target, distance)
+        if nodes[s].id in refreshed or nodes[t].id in refreshed
+    ]
+
+    # Replace edges and nodes in one transaction so a failure keeps the old graph
+    ids = list(refreshed)
+    try:
+        db.query(BuildingShadingNode).filter(
+            BuildingShadingNode.building_id.in_(ids)
+        ).delete(synchronize_session=False)
+        db.query(BuildingShadingEdge).filter(
+            BuildingShadingEdge.source_building_id.in_(ids) | BuildingShadingEdge.target_building_id.in_(ids)
+        ).delete(synchronize_session=False)
+        for i in range(0, len(rows), EDGE_INSERT_CHUNK):
+            db.bulk_insert_mappings(BuildingShadingEdge, rows[i:i + EDGE_INSERT_CHUNK])
+        db.add_all([
+            BuildingShadingNode(building_id=building.id, building_updated_at=building.updated_at, computed_at=now)
+            for building in buildings
+        ])
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+
+    logger.info(f"Refreshed shading graph of {len(buildings)} buildings: {len(rows)} edges")
+    return len(rows)
+
+
+def get_shading_sources(db: Session, buildings: Sequence[Building]) -> Dict[str, Optional[List[str]]]:
+    """
+    Look up the buildings that can shade each building
+
+    Args:
+        db: Database session
+        buildings: Target buildings
+
+    Returns:
+        Source building IDs per target ID, or None for a target whose
+        graph node is missing or older than the building (callers then
+        fall back to a spatial search)
+    """
+    if not buildings:
+        return {}
+
+    ids = [building.id for building in buildings]
+    versions = dict(
+        db.query(BuildingShadingNode.building_id, BuildingShadingNode.building_updated_at)
+        .filter(BuildingShadingNode.building_id.in_(ids))
+        .all()
+    )
+    sources = {
+        building.id: [] if building.id in versions and versions[building.id] == building.updated_at else None
+        for building in buildings
+    }
+
+    current = [building_id for building_id, value in sources.items() if value is not None]
+    if current:
+        edges = db.query(BuildingShadingEdge.source_building_id, BuildingShadingEdge.target_building_id).filter(
+            BuildingShadingEdge.target_building_id.in_(current)
+        ).all()
+        for source_id, target_id in edges:
+            sources[target_id].append(source_id)
+    return sources
+
+
+def get_shading_neighbours(db: Session, building_id: str) -> Dict[str, List[Dict[str, float]]]:
+    """
+    List the buildings a building can shade and be shaded by
+
+    Args:
+        db: Database session
+        building_id: Building ID
+
+    Returns:
+        Dictionary with "shaded_by" and "shades" lists of
+        {building_id, distance}
+    """
+    edges = db.query(BuildingShadingEdge).filter(
+        (BuildingShadingEdge.source_building_id == building_id) |
+        (BuildingShadingEdge.target_building_id == building_id)
+    ).all()
+
+    return {
+        "shaded_by": [
+            {"building_id": edge.source_building_id, "distance": float(edge.distance)}
+            for edge in edges if edge.target_building_id == building_id
+        ],
+        "shades": [
+            {"building_id": edge.target_building_id, "distance": float(edge.distance)}
+            for edge in edges if edge.source_building_id == building_id
+        ]
+    }
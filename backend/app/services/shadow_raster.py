@@ -0,0 +1,336 @@
+"""
+Shadow Raster Engine
+
+Burns building shadows into a metric grid and accumulates shaded minutes per
+cell. A prism's shadow is the union of its footprint and the parallelograms
+swept by the footprint edges facing the shadow direction, so every shadow of
+every time step is rasterized straight from edge arrays with a scanline
+winding count (NumPy only, no per-polygon geometry). Time steps are processed
+in chunks whose size is bounded by ``shadow_raster_chunk_cells``.
+"""
+from datetime import date
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon
+
+from app.config import settings
+from app.core.time_utils import build_local_time_grid
+from app.services.projection import get_site_projection
+from app.services.shadow_service import max_shadow_reach, to_polygon
+from app.services.solar_service import calculate_solar_positions_batch
+
+
+def calculate_shadow_heatmap(
+    building_footprints: Sequence[Union[Dict[str, Any], Polygon]],
+    building_heights: Sequence[float],
+    lat: float,
+    lng: float,
+    analysis_dates: Sequence[date],
+    step_minutes: int = 10,
+    resolution: Optional[float] = None,
+    bounds: Optional[Tuple[float, float, float, float]] = None,
+    timezone: str = "Asia/Shanghai"
+) -> Dict[str, Any]:
+    """
+    Calculate average daily shadow hours per grid cell over a set of dates
+
+    Args:
+        building_footprints: GeoJSON Polygons or shapely Polygons (lng/lat)
+        building_heights: Building heights in meters (same length)
+        lat: Site latitude
+        lng: Site longitude
+        analysis_dates: Dates to sample (e.g. every day of a range, or a
+            few representative days)
+        step_minutes: Minutes between time steps
+        resolution: Cell size in meters (default: shadow_heatmap_resolution_m)
+        bounds: (min_lng, min_lat, max_lng, max_lat) of the grid
+            (default: bounding box of the footprints padded by the longest
+            shadow, at the lowest sampled sun but no lower than
+            shadow_min_sun_altitude)
+        timezone: Timezone string (default: Asia/Shanghai)
+
+    Returns:
+        Dictionary with the grid geometry and "shadow_hours", a row-major
+        list of rows running north to south, west to east
+    """
+    if len(building_footprints) != len(building_heights):
+        raise ValueError("building_footprints and building_heights must have the same length")
+
+    if not len(analysis_dates):
+        raise ValueError("analysis_dates must not be empty")
+
+    resolution = resolution or settings.shadow_heatmap_resolution_m
+
+    heights = np.asarray(building_heights, dtype=float)
+    footprints = np.array([to_polygon(footprint) for footprint in building_footprints], dtype=object)
+    projection = get_site_projection(lat, lng)
+
+    unixtime = np.concatenate([
+        build_local_time_grid(day, day, step_minutes, timezone)["unixtime"] for day in analysis_dates
+    ])
+    sun = calculate_solar_positions_batch(lat, lng, unixtime)
+    daylight = sun["altitude"] > 0
+
+    if bounds is None:
+        if not len(footprints):
+            raise ValueError("bounds are required when no buildings are given")
+        # Shadows reach beyond the buildings; grow the grid by the longest one
+        reach = 0.0
+        if daylight.any():
+            lowest = max(float(sun["altitude"][daylight].min()), settings.shadow_min_sun_altitude)
+            reach = float(max_shadow_reach(heights.max(), lowest))
+        min_lng, min_lat, max_lng, max_lat = shapely.total_bounds(footprints)
+        pad_lng = reach / projection.meters_per_degree_lng
+        pad_lat = reach / projection.meters_per_degree_lat
+        bounds = (min_lng - pad_lng, min_lat - pad_lat, max_lng + pad_lng, max_lat + pad_lat)
+
+    min_x, min_y = projection.to_local_coords([bounds[0], bounds[1]])
+    max_x, max_y = projection.to_local_coords([bounds[2], bounds[3]])
+
+    minutes = rasterize_shadow_minutes(
+        projection.to_local(footprints),
+        heights,
+        sun["altitude"][daylight],
+        sun["azimuth"][daylight],
+        (min_x, min_y, max_x, max_y),
+        resolution,
+        step_minutes
+    )
+
+    hours = minutes / 60.0 / len(analysis_dates)
+
+    return {
+        "bounds": [round(float(value), 7) for value in bounds],
+        "resolution_m": resolution,
+        "rows": hours.shape[0],
+        "cols": hours.shape[1],
+        "dates": [day.isoformat() for day in analysis_dates],
+        "step_minutes": step_minutes,
+        "max_shadow_hours": round(float(hours.max()), 2) if hours.size else 0.0,
+        "mean_shadow_hours": round(float(hours.mean()), 2) if hours.size else 0.0,
+        "shadow_hours": np.round(hours[::-1], 2).tolist()
+    }
+
+
+def rasterize_shadow_minutes(
+    footprints: np.ndarray,
+    heights: np.ndarray,
+    solar_altitudes: np.ndarray,
+    solar_azimuths: np.ndarray,
+    bounds: Tuple[float, float, float, float],
+    resolution: float,
+    frame_minutes: float,
+    max_cells: Optional[int] = None
+) -> np.ndarray:
+    """
+    Accumulate shaded minutes per cell over many time steps
+
+    A cell counts as shaded in a time step when its center lies in the
+    shadow of at least one building.
+
+    Args:
+        footprints: Array of footprint Polygons in local meters
+        heights: Building heights in meters
+        solar_altitudes: Solar altitude per time step in degrees (> 0)
+        solar_azimuths: Solar azimuth per time step in degrees
+        bounds: (min_x, min_y, max_x, max_y) of the grid in local meters
+        resolution: Cell size in meters
+        frame_minutes: Minutes represented by each time step
+        max_cells: Working-array budget in cells per chunk
+            (default: shadow_raster_chunk_cells)
+
+    Returns:
+        Array of shape (rows, cols) with shaded minutes; row 0 is the
+        southernmost row
+    """
+    if resolution <= 0:
+        raise ValueError("resolution must be positive")
+
+    max_cells = max_cells or settings.shadow_raster_chunk_cells
+    min_x, min_y, max_x, max_y = bounds
+    cols = max(int(np.ceil((max_x - min_x) / resolution)), 1)
+    rows = max(int(np.ceil((max_y - min_y) / resolution)), 1)
+    minutes = np.zeros((rows, cols))
+
+    edges = _footprint_edges(footprints, heights)
+    if edges is None or not len(solar_altitudes):
+        return minutes
+
+    start, end, factor, height, next_edge, previous_edge = edges
+    # Grid coordinates: one unit per cell, origin at the south-west corner
+    start = (start - [min_x, min_y]) / resolution
+    end = (end - [min_x, min_y]) / resolution
+
+    # Shadow vectors per unit height, in cells
+    length = 1.0 / np.tan(np.radians(solar_altitudes)) / resolution
+    azimuth = np.radians(solar_azimuths)
+    unit_shift = np.column_stack([-length * np.sin(azimuth), -length * np.cos(azimuth)])
+
+    frame_cells = rows * (cols + 1)
+    frames_per_chunk = max(1, max_cells // frame_cells)
+
+    for first in range(0, len(unit_shift), frames_per_chunk):
+        chunk = unit_shift[first:first + frames_per_chunk]
+        segments = _frame_segments(start, end, factor, height, next_edge, previous_edge, chunk)
+        winding = _burn_segments(*segments, len(chunk), rows, cols, max_cells)
+        minutes += (winding > 0).sum(axis=0) * frame_minutes
+
+    return minutes
+
+
+def _footprint_edges(
+    footprints: np.ndarray,
+    heights: np.ndarray
+) -> Optional[Tuple[np.ndarray, ...]]:
+    """
+    Extract footprint ring edges with a winding factor and ring neighbours
+
+    The factor makes every exterior contribute +1 inside and every hole -1,
+    whatever the ring orientation.
+
+    Returns:
+        (start, end, factor, height, next_edge, previous_edge) edge arrays,
+        or None if no building casts a shadow
+    """
+    casting = np.asarray(heights) > 0
+    if not casting.any():
+        return None
+
+    rings, ring_owner = shapely.get_rings(footprints[casting], return_index=True)
+    coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+
+    same_ring = coord_ring[:-1] == coord_ring[1:]
+    start = coords[:-1][same_ring]
+    end = coords[1:][same_ring]
+    edge_ring = coord_ring[:-1][same_ring]
+
+    signed_area = np.bincount(
+        edge_ring, weights=start[:, 0] * end[:, 1] - end[:, 0] * start[:, 1], minlength=len(rings)
+    )
+    is_exterior = np.r_[True, ring_owner[1:] != ring_owner[:-1]]
+    factor = (np.sign(signed_area) * np.where(is_exterior, 1.0, -1.0))[edge_ring]
+
+    # Edges of a ring are consecutive; the last one wraps around to the first
+    is_first = np.r_[True, edge_ring[1:] != edge_ring[:-1]]
+    is_last = np.r_[edge_ring[1:] != edge_ring[:-1], True]
+    next_edge = np.arange(1, len(start) + 1)
+    next_edge[is_last] = np.flatnonzero(is_first)
+    previous_edge = np.arange(-1, len(start) - 1)
+    previous_edge[is_first] = np.flatnonzero(is_last)
+
+    return start, end, factor, heights[casting][ring_owner[edge_ring]], next_edge, previous_edge
+
+
+def _frame_segments(
+    start: np.ndarray,
+    end: np.ndarray,
+    factor: np.ndarray,
+    height: np.ndarray,
+    next_edge: np.ndarray,
+    previous_edge: np.ndarray,
+    unit_shift: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Build the boundary segments of every shadow in a chunk of time steps
+
+    Each shadow is the footprint plus one parallelogram per edge facing the
+    shadow direction. Boundaries shared by two of these pieces carry
+    opposite winding and are left out, which leaves the non-facing
+    footprint edges, the shifted facing edges and one connector at each
+    silhouette vertex.
+
+    Returns:
+        (frame, start, end, weight) segment arrays
+    """
+    # (frame, edge) shadow vectors
+    shift = unit_shift[:, None, :] * height[None, :, None]
+    edge = end - start
+    cross = edge[None, :, 0] * shift[..., 1] - edge[None, :, 1] * shift[..., 0]
+
+    # An edge faces the shadow when its outward normal points along the shadow
+    facing = -cross * factor[None, :] > 0
+
+    back_frame, back_edge = np.nonzero(~facing)
+    front_frame, front_edge = np.nonzero(facing)
+    front_shift = shift[front_frame, front_edge]
+    a = start[front_edge]
+    b = end[front_edge]
+    # A parallelogram has the opposite winding of its footprint ring
+    front_weight = -factor[front_edge]
+
+    # Connectors between neighbouring facing edges cancel out
+    end_side = ~facing[front_frame, next_edge[front_edge]]
+    start_side = ~facing[front_frame, previous_edge[front_edge]]
+
+    segment_frames = np.concatenate([
+        back_frame, front_frame, front_frame[end_side], front_frame[start_side]
+    ])
+    segment_start = np.concatenate([
+        start[back_edge], b + front_shift, b[end_side], (a + front_shift)[start_side]
+    ])
+    segment_end = np.concatenate([
+        end[back_edge], a + front_shift, (b + front_shift)[end_side], a[start_side]
+    ])
+    segment_weight = np.concatenate([
+        factor[back_edge], front_weight, front_weight[end_side], front_weight[start_side]
+    ])
+
+    return segment_frames, segment_start, segment_end, segment_weight
+
+
+def _burn_segments(
+    frames: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray,
+    weight: np.ndarray,
+    frame_count: int,
+    rows: int,
+    cols: int,
+    max_cells: int
+) -> np.ndarray:
+    """
+    Scanline-rasterize segments into per-frame winding numbers
+
+    Every segment adds its signed weight at the first cell right of where it
+    crosses each row center; a cumulative sum along the row then gives the
+    winding number of every cell center.
+
+    Returns:
+        Array of shape (frame_count, rows, cols) with winding numbers
+    """
+    y0 = start[:, 1]
+    y1 = end[:, 1]
+    low = np.clip(np.ceil(np.minimum(y0, y1) - 0.5), 0, rows).astype(np.int64)
+    high = np.clip(np.ceil(np.maximum(y0, y1) - 0.5), 0, rows).astype(np.int64)
+
+    # Segments right of the grid never change a cell
+    keep = (high > low) & (np.minimum(start[:, 0], end[:, 0]) < cols)
+    frames, start, end, weight, low, high = (
+        frames[keep], start[keep], end[keep], weight[keep], low[keep], high[keep]
+    )
+    # Downward segments add +1 on a counter-clockwise ring
+    weight = np.where(end[:, 1] < start[:, 1], weight, -weight)
+    slope = (end[:, 0] - start[:, 0]) / (end[:, 1] - start[:, 1])
+
+    width = cols + 1
+    diff = np.zeros(frame_count * rows * width)
+
+    # Expand segments to row crossings in batches bounded by max_cells
+    counts = high - low
+    bounds = np.searchsorted(np.cumsum(counts), np.arange(max_cells, counts.sum() + max_cells, max_cells), side="right")
+    first = 0
+    for last in np.append(bounds, len(counts)):
+        if last <= first:
+            continue
+        batch = slice(first, last)
+        n = counts[batch]
+        owner = np.repeat(np.arange(first, last), n)
+        row = low[owner] + np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        x = start[owner, 0] + (row + 0.5 - start[owner, 1]) * slope[owner]
+        col = np.clip(np.ceil(x - 0.5), 0, cols).astype(np.int64)
+        diff += np.bincount((frames[owner] * rows + row) * width + col, weights=weight[owner], minlength=diff.size)
+        first = last
+
+    return np.cumsum(diff.reshape(frame_count, rows, width), axis=2)[..., :cols]
@@ -1,20 +1,51 @@
 """
 Shadow Calculation Service
 """
-from datetime import datetime, date
-from typing import List, Dict, Any, Tuple, Optional
+from datetime import datetime, date, timedelta
+from typing import List, Dict, Any, Hashable, Tuple, Optional, Sequence, Union
+import logging
+import sys
 import numpy as np
+from sqlalchemy.orm import Session
 
 try:
-    from shapely.geometry import Polygon, Point, MultiPolygon
+    import shapely
+    from shapely.geometry import Polygon, Point, MultiPolygon, shape
     from shapely.ops import unary_union
     SHAPELY_AVAILABLE = True
 except ImportError:
     SHAPELY_AVAILABLE = False
     print("Warning: shapely not available. Shadow calculations will be limited.")
 
-from app.services.solar_service import calculate_solar_position
-from app.core.utils import calculate_shadow_coefficient
+from app.services.solar_service import calculate_solar_position, calculate_solar_positions_batch
+from app.services.projection import LocalProjection, get_site_projection
+from app.core.utils import calculate_shadow_coefficient, geojson_to_wkt
+from app.core.db_utils import get_db_context
+from app.models.building import Building
+from app.models.shadow_analysis import ShadowAnalysisCache, generate_uuid
+from app.core.cache import LRUCache, quantize
+from app.core.time_utils import build_local_time_grid, format_local_iso, parse_date
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Rows per upsert statement of the shadow cache write-behind
+SHADOW_CACHE_WRITE_CHUNK = 1000
+
+
+def _shadow_memo_nbytes(entry: Tuple[Optional["Polygon"], float]) -> int:
+    """Approximate memory held by a memo entry (GEOS stores 16 bytes per 2D coordinate)"""
+    shadow, _ = entry
+    return 128 + (16 * int(shapely.get_num_coordinates(shadow)) if shadow is not None else 0)
+
+
+# Shadows in lng/lat keyed by (building key, quantized sun altitude, quantized sun azimuth).
+# Bounded by memory rather than entry count, since shadow sizes vary widely.
+_shadow_memo = LRUCache(
+    max_size=sys.maxsize if settings.shadow_memo_max_bytes > 0 else 0,
+    max_bytes=settings.shadow_memo_max_bytes,
+    sizeof=_shadow_memo_nbytes
+)
 
 
 def calculate_building_shadow(
@@ -41,56 +72,749 @@ def calculate_building_shadow(
     Returns:
         Tuple of (shadow_polygon_geojson, shadow_area_sqm)
     """
+    return calculate_building_shadows_batch(
+        [building_footprint],
+        [building_height],
+        lat,
+        lng,
+        analysis_date,
+        hour,
+        minute
+    )[0]
+
+
+def calculate_building_shadows_batch(
+    building_footprints: Sequence[Union[Dict[str, Any], "Polygon"]],
+    building_heights: Sequence[float],
+    lat: float,
+    lng: float,
+    analysis_date: Optional[str] = None,
+    hour: int = 12,
+    minute: int = 0,
+    building_keys: Optional[Sequence[Hashable]] = None
+) -> List[Tuple[Optional[Dict[str, Any]], float]]:
+    """
+    Calculate shadow polygons for many buildings at one instant
+
+    The sun position is computed once for the site; all footprints are
+    projected to the site's local metric plane and swept together as one
+    coordinate array.
+
+    When building_keys are given, shadows are memoized in-process by
+    (building key, quantized sun altitude and azimuth), so any date and
+    time with nearly the same sun position reuses them. The key must change
+    whenever the footprint or height changes, e.g. (id, updated_at).
+
+    Args:
+        building_footprints: GeoJSON Polygons or shapely Polygons
+        building_heights: Building heights in meters (same length)
+        lat: Site latitude
+        lng: Site longitude
+        analysis_date: Analysis date (YYYY-MM-DD)
+        hour: Hour (0-23)
+        minute: Minute (0-59)
+        building_keys: Optional version keys identifying each building
+
+    Returns:
+        List of (shadow_polygon_geojson, shadow_area_sqm) per building, in
+        input order; (None, 0.0) where no shadow is cast
+    """
+    if building_keys is None:
+        projection, local_shadows = calculate_local_shadows(
+            building_footprints, building_heights, lat, lng, analysis_date, hour, minute
+        )
+        shadows = projection.to_geographic(local_shadows)
+        areas = shapely.area(local_shadows)
+    else:
+        shadows, areas = _memoized_shadows(
+            building_keys, building_footprints, building_heights, lat, lng, analysis_date, hour, minute
+        )
+
+    results = [(None, 0.0)] * len(building_footprints)
+    has_shadow = ~shapely.is_missing(shadows)
+    if not has_shadow.any():
+        return results
+
+    # Convert to GeoJSON only for output
+    geojsons = _polygons_to_geojson(shadows[has_shadow])
+
+    for i, geojson, area in zip(np.flatnonzero(has_shadow), geojsons, areas[has_shadow]):
+        results[i] = (geojson, round(float(area), 2))
+    return results
+
+
+def _memoized_shadows(
+    building_keys: Sequence[Hashable],
+    building_footprints: Sequence[Union[Dict[str, Any], "Polygon"]],
+    building_heights: Sequence[float],
+    lat: float,
+    lng: float,
+    analysis_date: Optional[str],
+    hour: int,
+    minute: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Look up shadows in the sun-vector memo and sweep only the misses
+
+    Misses are swept with the quantized sun vector, so a memo entry is
+    exactly what any instant mapping to the same key would compute.
+
+    Returns:
+        Tuple of (object array of lng/lat shadows or None, areas in m²)
+    """
+    if len(building_keys) != len(building_footprints):
+        raise ValueError("building_keys and building_footprints must have the same length")
+
+    shadows = np.full(len(building_footprints), None, dtype=object)
+    areas = np.zeros(len(building_footprints))
+    if not len(building_footprints):
+        return shadows, areas
+
+    solar_altitude, solar_azimuth = get_sun_vector(lat, lng, analysis_date, hour, minute)
+    step = settings.shadow_memo_sun_step_degrees
+    solar_altitude = quantize(solar_altitude, step)
+    solar_azimuth = quantize(solar_azimuth % 360.0, step)
+    if solar_altitude <= 0:
+        return shadows, areas
+
+    missing = []
+    for i, building_key in enumerate(building_keys):
+        entry = _shadow_memo.get((building_key, solar_altitude, solar_azimuth))
+        if entry is None:
+            missing.append(i)
+        else:
+            shadows[i], areas[i] = entry
+
+    if missing:
+        projection = get_site_projection(lat, lng)
+        local_shadows = _sweep_footprints(
+            projection,
+            [building_footprints[i] for i in missing],
+            np.asarray([building_heights[i] for i in missing], dtype=float),
+            solar_altitude,
+            solar_azimuth
+        )
+        computed = projection.to_geographic(local_shadows)
+        computed_areas = np.nan_to_num(shapely.area(local_shadows))
+
+        for i, shadow, area in zip(missing, computed, computed_areas):
+            shadows[i], areas[i] = shadow, area
+            _shadow_memo.set((building_keys[i], solar_altitude, solar_azimuth), (shadow, float(area)))
+
+    return shadows, areas
+
+
+def get_shadow_memo_stats() -> Dict[str, Any]:
+    """
+    Get sun-vector shadow memo statistics
+
+    Returns:
+        Dictionary with size, bytes, hit/miss counters and hit rate
+    """
+    return _shadow_memo.stats()
+
+
+def clear_shadow_memo() -> None:
+    """Clear the sun-vector shadow memo"""
+    _shadow_memo.clear()
+
+
+def calculate_local_shadows(
+    building_footprints: Sequence[Union[Dict[str, Any], "Polygon"]],
+    building_heights: Sequence[float],
+    lat: float,
+    lng: float,
+    analysis_date: Optional[str] = None,
+    hour: int = 12,
+    minute: int = 0
+) -> Tuple["LocalProjection", np.ndarray]:
+    """
+    Calculate shadows in the site's local metric plane
+
+    Args:
+        building_footprints: GeoJSON Polygons or shapely Polygons (lng/lat)
+        building_heights: Building heights in meters (same length)
+        lat: Site latitude
+        lng: Site longitude
+        analysis_date: Analysis date (YYYY-MM-DD)
+        hour: Hour (0-23)
+        minute: Minute (0-59)
+
+    Returns:
+        Tuple of (site projection, object array of shadow polygons in
+        meters with None where no shadow is cast)
+    """
     if not SHAPELY_AVAILABLE:
         raise Exception("Shapely library is required for shadow calculations")
 
-    # Get solar position
-    solar_pos = calculate_solar_position(lat, lng, analysis_date, hour, minute)
-    solar_altitude = solar_pos["solar_altitude"]
-    solar_azimuth = solar_pos["solar_azimuth"]
+    if len(building_footprints) != len(building_heights):
+        raise ValueError("building_footprints and building_heights must have the same length")
+
+    projection = get_site_projection(lat, lng)
+    shadows = np.full(len(building_footprints), None, dtype=object)
+    if not len(building_footprints):
+        return projection, shadows
+
+    # Get solar position once for the whole batch
+    solar_altitude, solar_azimuth = get_sun_vector(lat, lng, analysis_date, hour, minute)
 
     # If sun is below horizon, no shadow
     if solar_altitude <= 0:
-        return None, 0.0
+        return projection, shadows
 
-    # Parse building footprint
-    if building_footprint.get("type") != "Polygon":
-        raise ValueError("Building footprint must be a Polygon")
+    shadows = _sweep_footprints(
+        projection,
+        building_footprints,
+        np.asarray(building_heights, dtype=float),
+        solar_altitude,
+        solar_azimuth
+    )
+    return projection, shadows
 
-    coordinates = building_footprint.get("coordinates", [])
-    if not coordinates:
-        raise ValueError("No coordinates in building footprint")
 
-    # Get exterior ring
-    exterior_coords = coordinates[0]
+def _sweep_footprints(
+    projection: "LocalProjection",
+    building_footprints: Sequence[Union[Dict[str, Any], "Polygon"]],
+    heights: np.ndarray,
+    solar_altitude: float,
+    solar_azimuth: float
+) -> np.ndarray:
+    """
+    Sweep lng/lat footprints in the projection's metric plane
+
+    Returns:
+        Object array of shadow polygons in meters, None where no shadow is cast
+    """
+    shadows = np.full(len(building_footprints), None, dtype=object)
+    casting = heights > 0
+    if not casting.any():
+        return shadows
+
+    footprints = np.array([to_polygon(footprint) for footprint in building_footprints], dtype=object)
+    local_footprints = projection.to_local(footprints[casting])
+    swept = project_shadows(local_footprints, heights[casting], solar_altitude, solar_azimuth)
+    swept[shapely.is_empty(swept)] = None
+
+    shadows[casting] = swept
+    return shadows
+
+
+def calculate_daily_shadow_sweep(
+    building_footprints: Sequence[Union[Dict[str, Any], "Polygon"]],
+    building_heights: Sequence[float],
+    lat: float,
+    lng: float,
+    analysis_date: Optional[str] = None,
+    step_minutes: int = 5,
+    min_altitude: float = 0.0,
+    include_envelope: bool = True,
+    include_frame_areas: bool = True,
+    include_frame_polygons: bool = False,
+    timezone: str = "Asia/Shanghai"
+) -> Dict[str, Any]:
+    """
+    Calculate every shadow frame of a day for many buildings in one pass
+
+    The sun vectors of the whole day come from one batch solar calculation
+    and the footprints are projected once; the shadows of all daylight
+    frames and buildings are then swept in a single vectorized call.
+
+    Args:
+        building_footprints: GeoJSON Polygons or shapely Polygons
+        building_heights: Building heights in meters (same length)
+        lat: Site latitude
+        lng: Site longitude
+        analysis_date: Analysis date (YYYY-MM-DD, default: today)
+        step_minutes: Minutes between frames
+        min_altitude: Frames with the sun at or below this altitude are skipped
+        include_envelope: Return each building's union of shadows over the day
+        include_frame_areas: Return each building's shadow area per frame
+        include_frame_polygons: Return each building's shadow polygon per frame
+        timezone: Timezone string (default: Asia/Shanghai)
+
+    Returns:
+        Dictionary with the daylight "frames" (timestamp, solar_altitude,
+        solar_azimuth) and per-building results in input order
+    """
+    if not SHAPELY_AVAILABLE:
+        raise Exception("Shapely library is required for shadow calculations")
+
+    if len(building_footprints) != len(building_heights):
+        raise ValueError("building_footprints and building_heights must have the same length")
+
+    day = parse_date(analysis_date, timezone)
+    grid = build_local_time_grid(day, day, step_minutes, timezone)
+    sun = calculate_solar_positions_batch(lat, lng, grid["unixtime"])
+
+    daylight = sun["altitude"] > max(min_altitude, 0.0)
+    altitudes = sun["altitude"][daylight]
+    azimuths = sun["azimuth"][daylight]
+    timestamps = format_local_iso(grid["unixtime"][daylight], grid["utc_offset"][daylight])
+
+    frame_count = len(altitudes)
+    projection = get_site_projection(lat, lng)
+    heights = np.asarray(building_heights, dtype=float)
+    casting = np.flatnonzero(heights > 0)
+
+    # Rows are frames, columns are buildings
+    shadows = np.full((frame_count, len(building_footprints)), None, dtype=object)
+    if frame_count and len(casting):
+        footprints = projection.to_local(
+            np.array([to_polygon(building_footprints[i]) for i in casting], dtype=object)
+        )
+        swept = project_shadows(
+            np.tile(footprints, frame_count),
+            np.tile(heights[casting], frame_count),
+            np.repeat(altitudes, len(casting)),
+            np.repeat(azimuths, len(casting))
+        )
+        swept[shapely.is_empty(swept)] = None
+        shadows[:, casting] = swept.reshape(frame_count, len(casting))
+
+    buildings = [{} for _ in building_footprints]
+
+    if include_frame_areas:
+        areas = np.round(np.nan_to_num(shapely.area(shadows)), 2)
+        for building, frame_areas in zip(buildings, areas.T):
+            building["frame_areas"] = frame_areas.tolist()
+
+    if include_envelope:
+        envelopes = shapely.union_all(shadows, axis=0)
+        envelopes[shapely.is_empty(envelopes)] = None
+        envelope_areas = np.nan_to_num(shapely.area(envelopes))
+        geojsons = iter(_polygons_to_geojson(projection.to_geographic(envelopes[~shapely.is_missing(envelopes)])))
+        for building, envelope, area in zip(buildings, envelopes, envelope_areas):
+            building["envelope"] = next(geojsons) if envelope is not None else None
+            building["envelope_area"] = round(float(area), 2)
+
+    if include_frame_polygons:
+        has_shadow = ~shapely.is_missing(shadows)
+        geojsons = iter(_polygons_to_geojson(projection.to_geographic(shadows.T[has_shadow.T])))
+        for building, frame_shadows in zip(buildings, has_shadow.T):
+            building["frame_polygons"] = [next(geojsons) if present else None for present in frame_shadows]
+
+    return {
+        "date": day.isoformat(),
+        "step_minutes": step_minutes,
+        "frames": [
+            {
+                "timestamp": timestamp,
+                "solar_altitude": round(float(altitude), 6),
+                "solar_azimuth": round(float(azimuth), 6)
+            }
+            for timestamp, altitude, azimuth in zip(timestamps, altitudes, azimuths)
+        ],
+        "buildings": buildings
+    }
+
+
+def calculate_building_shadows_cached(
+    db: Session,
+    building_ids: Sequence[str],
+    building_footprints: Sequence[Union[Dict[str, Any], "Polygon"]],
+    building_heights: Sequence[float],
+    lat: float,
+    lng: float,
+    analysis_date: date,
+    hour: int = 12,
+    minute: int = 0,
+    building_keys: Optional[Sequence[Hashable]] = None
+) -> Tuple[List[Tuple[Optional[Dict[str, Any]], float]], List[Tuple[str, Dict[str, Any], float]]]:
+    """
+    Calculate shadows for many buildings, reading through shadow_analysis_cache
+
+    Whole-hour frames are looked up with one query per (date, hour); only
+    the buildings without a live cache row are computed. Other frames are
+    always computed, since the cache table is keyed by hour.
+
+    Args:
+        db: Database session
+        building_ids: Building IDs (same order as footprints)
+        building_footprints: GeoJSON Polygons or shapely Polygons
+        building_heights: Building heights in meters
+        lat: Site latitude
+        lng: Site longitude
+        analysis_date: Analysis date
+        hour: Hour (0-23)
+        minute: Minute (0-59)
+        building_keys: Optional version keys for the in-process sun-vector memo
+
+    Returns:
+        Tuple of (results in input order as returned by
+        calculate_building_shadows_batch, newly computed
+        (building_id, shadow_geojson, area) entries to write back with
+        store_cached_shadows)
+    """
+    cacheable = settings.shadow_cache_enabled and minute == 0
+    cached = get_cached_shadows(db, building_ids, analysis_date, hour) if cacheable else {}
+
+    missing = [i for i, building_id in enumerate(building_ids) if building_id not in cached]
+    computed = calculate_building_shadows_batch(
+        [building_footprints[i] for i in missing],
+        [building_heights[i] for i in missing],
+        lat,
+        lng,
+        analysis_date.isoformat(),
+        hour,
+        minute,
+        [building_keys[i] for i in missing] if building_keys is not None else None
+    ) if missing else []
+
+    results = [cached.get(building_id, (None, 0.0)) for building_id in building_ids]
+    new_entries = []
+    for i, (shadow_geojson, shadow_area) in zip(missing, computed):
+        results[i] = (shadow_geojson, shadow_area)
+        # The cache column holds single polygons only
+        if cacheable and shadow_geojson and shadow_geojson["type"] == "Polygon":
+            new_entries.append((building_ids[i], shadow_geojson, shadow_area))
+
+    return results, new_entries
+
+
+def get_cached_shadows(
+    db: Session,
+    building_ids: Sequence[str],
+    analysis_date: date,
+    hour: int
+) -> Dict[str, Tuple[Dict[str, Any], float]]:
+    """
+    Load unexpired cached shadows for many buildings in a single query
+
+    Rows computed before the building was last updated are ignored.
+
+    Args:
+        db: Database session
+        building_ids: Building IDs to look up
+        analysis_date: Analysis date
+        hour: Hour (0-23)
+
+    Returns:
+        Mapping of building ID to (shadow_polygon_geojson, shadow_area_sqm)
+    """
+    if not building_ids:
+        return {}
+
+    from geoalchemy2.shape import to_shape
+
+    rows = db.query(
+        ShadowAnalysisCache.building_id,
+        ShadowAnalysisCache.shadow_polygon,
+        ShadowAnalysisCache.shadow_area
+    ).join(
+        Building, Building.id == ShadowAnalysisCache.building_id
+    ).filter(
+        ShadowAnalysisCache.building_id.in_(set(building_ids)),
+        ShadowAnalysisCache.analysis_date == analysis_date,
+        ShadowAnalysisCache.analysis_hour == hour,
+        ShadowAnalysisCache.expires_at > datetime.utcnow(),
+        ShadowAnalysisCache.created_at >= Building.updated_at
+    ).all()
+
+    return {
+        building_id: (_shapely_to_geojson(to_shape(polygon)), float(area or 0.0))
+        for building_id, polygon, area in rows
+    }
+
+
+def store_cached_shadows(
+    analysis_date: date,
+    hour: int,
+    entries: Sequence[Tuple[str, Dict[str, Any], float]]
+) -> int:
+    """
+    Write computed shadows to shadow_analysis_cache and purge expired rows
+
+    Runs after the response is sent (write-behind), so it opens its own
+    session and never raises. Rows are upserted on (building, date, hour),
+    so concurrent misses for the same frame leave a single row.
+
+    Args:
+        analysis_date: Analysis date
+        hour: Hour (0-23)
+        entries: (building_id, shadow_geojson, area) tuples
+
+    Returns:
+        Number of rows written
+    """
+    if not entries:
+        return 0
+
+    from geoalchemy2.elements import WKTElement
+    from sqlalchemy.dialects.mysql import insert
+
+    now = datetime.utcnow()
+    expires_at = now + timedelta(hours=settings.shadow_cache_ttl_hours)
+    rows = [
+        {
+            "id": generate_uuid(),
+            "building_id": building_id,
+            "analysis_date": analysis_date,
+            "analysis_hour": hour,
+            "shadow_polygon": WKTElement(geojson_to_wkt(shadow_geojson), srid=4326),
+            "shadow_area": shadow_area,
+            "created_at": now,
+            "expires_at": expires_at
+        }
+        for building_id, shadow_geojson, shadow_area in entries
+    ]
+
+    try:
+        with get_db_context() as db:
+            db.query(ShadowAnalysisCache).filter(
+                ShadowAnalysisCache.expires_at <= now
+            ).delete(synchronize_session=False)
+            for i in range(0, len(rows), SHADOW_CACHE_WRITE_CHUNK):
+                statement = insert(ShadowAnalysisCache).values(rows[i:i + SHADOW_CACHE_WRITE_CHUNK])
+                db.execute(statement.on_duplicate_key_update(
+                    shadow_polygon=statement.inserted.shadow_polygon,
+                    shadow_area=statement.inserted.shadow_area,
+                    created_at=statement.inserted.created_at,
+                    expires_at=statement.inserted.expires_at
+                ))
+            db.commit()
+            return len(rows)
+    except Exception as e:
+        logger.warning(f"Failed to write shadow cache for {analysis_date} {hour}:00: {e}")
+        return 0
+
+
+def max_shadow_reach(heights: Any, solar_altitude: float) -> np.ndarray:
+    """
+    Longest shadow (meters) cast by buildings of given heights
+
+    Args:
+        heights: Building heights in meters
+        solar_altitude: Lowest solar altitude considered, in degrees (> 0)
+
+    Returns:
+        Array of shadow lengths in meters
+    """
+    return np.maximum(np.asarray(heights, dtype=float), 0.0) / np.tan(np.radians(solar_altitude))
+
+
+def shading_search_bounds(
+    target_footprint: "Polygon",
+    max_height: float,
+    min_solar_altitude: float
+) -> Tuple[float, float, float, float]:
+    """
+    Bounding box that contains every building able to shade the target
+
+    Args:
+        target_footprint: Target footprint (lng/lat)
+        max_height: Tallest building height to account for, in meters
+        min_solar_altitude: Lowest solar altitude considered, in degrees
+
+    Returns:
+        (min_lng, min_lat, max_lng, max_lat) in degrees
+    """
+    centroid = target_footprint.centroid
+    projection = get_site_projection(centroid.y, centroid.x)
+    reach = float(max_shadow_reach(max_height, min_solar_altitude))
+
+    min_lng, min_lat, max_lng, max_lat = target_footprint.bounds
+    pad_lng = reach / projection.meters_per_degree_lng
+    pad_lat = reach / projection.meters_per_degree_lat
+    return min_lng - pad_lng, min_lat - pad_lat, max_lng + pad_lng, max_lat + pad_lat
+
+
+def filter_shading_candidates(
+    target_footprint: "Polygon",
+    building_footprints: Sequence["Polygon"],
+    building_heights: Sequence[float],
+    min_solar_altitude: float
+) -> np.ndarray:
+    """
+    Select the buildings whose shadow can reach the target
+
+    A building can only shade the target if its footprint lies within its
+    own maximum shadow reach (height / tan(lowest altitude)) of the target.
+    Candidates are pre-selected with an STRtree distance query for the
+    tallest reach, then checked against their own reach.
+
+    Args:
+        target_footprint: Target footprint (lng/lat)
+        building_footprints: Candidate footprints (lng/lat)
+        building_heights: Candidate heights in meters
+        min_solar_altitude: Lowest solar altitude considered, in degrees (> 0)
+
+    Returns:
+        Sorted indices of the buildings that may shade the target
+    """
+    if not len(building_footprints) or min_solar_altitude <= 0:
+        return np.array([], dtype=np.int64)
 
-    # Convert to Shapely polygon
-    building_poly = Polygon(exterior_coords)
+    centroid = target_footprint.centroid
+    projection = get_site_projection(centroid.y, centroid.x)
+    target = projection.to_local(target_footprint)
+    footprints = projection.to_local(np.array(building_footprints, dtype=object))
+    reach = max_shadow_reach(building_heights, min_solar_altitude)
 
-    # Calculate shadow
-    shadow_poly = _project_shadow(building_poly, building_height, solar_altitude, solar_azimuth)
+    tree = shapely.STRtree(footprints)
+    candidates = tree.query(target, predicate="dwithin", distance=float(reach.max()))
+    within = shapely.distance(target, footprints[candidates]) <= reach[candidates]
+    return np.sort(candidates[within])
 
-    if shadow_poly is None or shadow_poly.is_empty:
-        return None, 0.0
 
-    # Convert to GeoJSON
-    shadow_geojson = _shapely_to_geojson(shadow_poly)
+def get_sun_vector(
+    lat: float,
+    lng: float,
+    analysis_date: Optional[str] = None,
+    hour: int = 12,
+    minute: int = 0
+) -> Tuple[float, float]:
+    """
+    Get the solar altitude and azimuth used for shadow projection
 
-    # Calculate area (approximate, in square degrees)
-    # For accurate area in square meters, need to use projection
-    area = shadow_poly.area
+    Args:
+        lat: Site latitude
+        lng: Site longitude
+        analysis_date: Analysis date (YYYY-MM-DD)
+        hour: Hour (0-23)
+        minute: Minute (0-59)
 
-    # Rough conversion to square meters (at the given latitude)
-    # This is an approximation
-    meters_per_degree = 111320 * np.cos(np.radians(lat))
-    area_sqm = area * (meters_per_degree ** 2)
+    Returns:
+        Tuple of (solar_altitude, solar_azimuth) in degrees
+    """
+    solar_pos = calculate_solar_position(lat, lng, analysis_date, hour, minute, timezone=settings.tz, include_sun_times=False)
+    return solar_pos["solar_altitude"], solar_pos["solar_azimuth"]
 
-    return shadow_geojson, round(area_sqm, 2)
+
+def project_shadows(
+    footprints: np.ndarray,
+    heights: np.ndarray,
+    solar_altitude: Union[float, np.ndarray],
+    solar_azimuth: Union[float, np.ndarray]
+) -> np.ndarray:
+    """
+    Build swept shadow polygons for many buildings (vectorized)
+
+    A prism's ground shadow is the footprint swept along the shadow vector
+    (the Minkowski sum of the footprint with the shadow segment). For convex
+    footprints this is the convex hull of footprint and roof vertices; for
+    concave footprints (or footprints with courtyards) it is the union of
+    the footprint and the parallelograms swept by the edges facing the
+    shadow direction.
+
+    Args:
+        footprints: Array of footprint Polygons in local meters (x east, y north)
+        heights: Building heights in meters
+        solar_altitude: Solar altitude angle in degrees (> 0), scalar or one per footprint
+        solar_azimuth: Solar azimuth angle in degrees (clockwise from north), scalar or one per footprint
+
+    Returns:
+        Array of shadow Polygons (same order as footprints)
+    """
+    offsets = _shadow_offsets(heights, solar_altitude, solar_azimuth)
+
+    coords, owner = shapely.get_coordinates(footprints, return_index=True)
+    shifted = coords + offsets[owner]
+
+    shadows = np.empty(len(footprints), dtype=object)
+
+    convex = (
+        (shapely.get_num_interior_rings(footprints) == 0)
+        & np.isclose(shapely.area(shapely.convex_hull(footprints)), shapely.area(footprints), rtol=1e-9, atol=0)
+    )
+
+    # Convex footprints: hull of footprint and roof vertices, one call
+    if convex.any():
+        compact = np.cumsum(convex) - 1
+        selected = convex[owner]
+        point_owner = np.concatenate([compact[owner[selected]], compact[owner[selected]]])
+        order = np.argsort(point_owner, kind="stable")
+        points = np.vstack([coords[selected], shifted[selected]])[order]
+        hulls = shapely.convex_hull(shapely.multipoints(points, indices=point_owner[order]))
+        shadows[convex] = hulls
+
+    # Concave footprints: union of footprint and the quads swept by the
+    # edges facing the shadow direction (they also cover the roof)
+    if (~convex).any():
+        concave_index = np.flatnonzero(~convex)
+        concave = footprints[concave_index]
+
+        rings, ring_owner = shapely.get_rings(concave, return_index=True)
+        ring_coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+
+        # Consecutive vertices on the same ring form an edge
+        same_ring = coord_ring[:-1] == coord_ring[1:]
+        start = ring_coords[:-1][same_ring]
+        end = ring_coords[1:][same_ring]
+        edge_ring = coord_ring[:-1][same_ring]
+        edge_building = ring_owner[edge_ring]
+        shift = offsets[concave_index[edge_building]]
+
+        # The polygon interior lies left of counter-clockwise exteriors and
+        # clockwise holes; an edge faces the shadow when its outward normal
+        # points along the shadow vector
+        signed_area = np.bincount(
+            edge_ring, weights=start[:, 0] * end[:, 1] - end[:, 0] * start[:, 1], minlength=len(rings)
+        )
+        is_exterior = np.r_[True, ring_owner[1:] != ring_owner[:-1]]
+        interior_left = np.where((signed_area > 0) == is_exterior, 1.0, -1.0)[edge_ring]
+
+        edge = end - start
+        cross = edge[:, 0] * shift[:, 1] - edge[:, 1] * shift[:, 0]
+        facing = -cross * interior_left > 0
+
+        quads = shapely.polygons(np.stack([start, end, end + shift, start + shift, start], axis=1)[facing])
+        quad_building = edge_building[facing]
+
+        order = np.argsort(quad_building, kind="stable")
+        groups = np.split(quads[order], np.cumsum(np.bincount(quad_building, minlength=len(concave)))[:-1])
+        for local, building in enumerate(concave_index):
+            shadows[building] = shapely.union_all(np.concatenate([[concave[local]], groups[local]]))
+
+    return shadows
+
+
+def _shadow_offsets(
+    heights: np.ndarray,
+    solar_altitude: Union[float, np.ndarray],
+    solar_azimuth: Union[float, np.ndarray]
+) -> np.ndarray:
+    """
+    Shadow vectors (dx east, dy north) in meters for each building height
+
+    Returns:
+        Array of shape (N, 2)
+    """
+    # shadow_length = height / tan(altitude), cast away from the sun
+    shadow_length = np.maximum(heights, 0.0) / np.tan(np.radians(solar_altitude))
+    az_rad = np.radians(solar_azimuth)
+    dx = -shadow_length * np.sin(az_rad)
+    dy = -shadow_length * np.cos(az_rad)
+    return np.column_stack([dx, dy])
+
+
+def to_polygon(footprint: Union[Dict[str, Any], "Polygon"]) -> "Polygon":
+    """
+    Convert a GeoJSON Polygon (or pass through a shapely Polygon)
+
+    Args:
+        footprint: GeoJSON Polygon dictionary or shapely Polygon
+
+    Returns:
+        Shapely Polygon
+    """
+    if not isinstance(footprint, dict):
+        return footprint
+
+    # Parse building footprint
+    if footprint.get("type") != "Polygon":
+        raise ValueError("Building footprint must be a Polygon")
+
+    coordinates = footprint.get("coordinates", [])
+    if not coordinates:
+        raise ValueError("No coordinates in building footprint")
+
+    return Polygon(coordinates[0], coordinates[1:])
 
 
 def calculate_shadow_overlap(
     target_building_footprint: Dict[str, Any],
-    surrounding_shadows: List[Dict[str, Any]]
+    surrounding_shadows: List[Dict[str, Any]],
+    shadow_building_ids: Optional[List[str]] = None
 ) -> Dict[str, Any]:
     """
     Calculate shadow overlap on target building
@@ -98,6 +822,8 @@ def calculate_shadow_overlap(
     Args:
         target_building_footprint: GeoJSON Polygon of target building
         surrounding_shadows: List of shadow polygons (GeoJSON)
+        shadow_building_ids: IDs of the buildings casting each shadow
+            (default: "building_{i}" labels)
 
     Returns:
         Dictionary containing overlap analysis
@@ -105,58 +831,128 @@ def calculate_shadow_overlap(
     if not SHAPELY_AVAILABLE:
         raise Exception("Shapely library is required for shadow overlap calculations")
 
-    # Parse target building
-    target_coords = target_building_footprint.get("coordinates", [])
-    target_poly = Polygon(target_coords[0])
+    if shadow_building_ids is None:
+        shadow_building_ids = [f"building_{i}" for i in range(len(surrounding_shadows))]
+
+    # Parse target building and shadows
+    target = to_polygon(target_building_footprint)
+    shadows = []
+    ids = []
+    for building_id, shadow in zip(shadow_building_ids, surrounding_shadows):
+        if shadow and shadow.get("type") in ("Polygon", "MultiPolygon") and shadow.get("coordinates"):
+            shadows.append(shape(shadow))
+            ids.append(building_id)
+
+    # Work in the site's local metric plane so areas are in square meters
+    centroid = target.centroid
+    projection = get_site_projection(centroid.y, centroid.x)
+
+    return _calculate_overlap(
+        projection.to_local(target),
+        projection.to_local(np.array(shadows, dtype=object)),
+        ids
+    )
+
+
+def calculate_building_shadow_overlap(
+    target_building_footprint: Union[Dict[str, Any], "Polygon"],
+    building_footprints: Sequence[Union[Dict[str, Any], "Polygon"]],
+    building_heights: Sequence[float],
+    building_ids: List[str],
+    lat: float,
+    lng: float,
+    analysis_date: Optional[str] = None,
+    hour: int = 12,
+    minute: int = 0
+) -> Dict[str, Any]:
+    """
+    Calculate shadows of surrounding buildings and their overlap on a target
+
+    Shadows stay in the local metric plane between the two steps, so there
+    is no GeoJSON round trip.
 
+    Args:
+        target_building_footprint: Target footprint (GeoJSON or shapely, lng/lat)
+        building_footprints: Surrounding footprints (GeoJSON or shapely, lng/lat)
+        building_heights: Surrounding building heights in meters
+        building_ids: Surrounding building IDs
+        lat: Site latitude
+        lng: Site longitude
+        analysis_date: Analysis date (YYYY-MM-DD)
+        hour: Hour (0-23)
+        minute: Minute (0-59)
+
+    Returns:
+        Dictionary containing overlap analysis
+    """
+    projection, shadows = calculate_local_shadows(
+        building_footprints, building_heights, lat, lng, analysis_date, hour, minute
+    )
+    has_shadow = ~shapely.is_missing(shadows)
+
+    return _calculate_overlap(
+        projection.to_local(to_polygon(target_building_footprint)),
+        shadows[has_shadow],
+        [building_id for building_id, keep in zip(building_ids, has_shadow) if keep]
+    )
+
+
+def _calculate_overlap(
+    target: "Polygon",
+    shadows: np.ndarray,
+    building_ids: List[str]
+) -> Dict[str, Any]:
+    """
+    Overlap of shadows on a target footprint (all geometries in meters)
+
+    Shadows are indexed with an STRtree and only those whose bounding boxes
+    meet the prepared target are intersected.
+
+    Args:
+        target: Target footprint polygon
+        shadows: Array of shadow polygons
+        building_ids: ID of the building casting each shadow
+
+    Returns:
+        Dictionary containing overlap analysis
+    """
     # Calculate self-shadow area
     # (This would be the building's own shadow on itself - simplified as 0 for now)
     self_shadow_area = 0.0
 
-    # Union all surrounding shadows
-    shadow_polys = []
-    for shadow in surrounding_shadows:
-        if shadow.get("type") == "Polygon":
-            coords = shadow.get("coordinates", [])
-            if coords:
-                shadow_polys.append(Polygon(coords[0]))
-
-    if not shadow_polys:
-        return {
-            "self_shadow_area": 0.0,
-            "projected_shadow_area": 0.0,
-            "overlap_area": 0.0,
-            "overlap_details": []
-        }
+    result = {
+        "self_shadow_area": round(self_shadow_area, 2),
+        "projected_shadow_area": 0.0,
+        "overlap_area": 0.0,
+        "overlap_details": []
+    }
+    if len(shadows) == 0:
+        return result
 
-    # Merge all shadows
-    merged_shadows = unary_union(shadow_polys)
+    shapely.prepare(target)
+    tree = shapely.STRtree(shadows)
+    candidates = tree.query(target, predicate="intersects")
+    if len(candidates) == 0:
+        return result
 
-    # Calculate projected shadow area on target building
-    intersection = target_poly.intersection(merged_shadows)
-    projected_shadow_area = intersection.area
+    overlaps = shapely.intersection(target, shadows[candidates])
+    overlap_areas = shapely.area(overlaps)
 
-    # Calculate overlap area (in square meters, approximation)
-    meters_per_degree = 111320  # rough approximation
-    overlap_area_sqm = projected_shadow_area * (meters_per_degree ** 2)
+    # Shadow area on the target (overlapping shadows counted once)
+    projected_shadow_area = shapely.union_all(overlaps).area
 
-    # Calculate individual overlaps
     overlap_details = []
-    for i, shadow_poly in enumerate(shadow_polys):
-        overlap = target_poly.intersection(shadow_poly)
-        if not overlap.is_empty:
-            overlap_area_sqm = overlap.area * (meters_per_degree ** 2)
+    for index, area in sorted(zip(candidates, overlap_areas)):
+        if area > 0:
             overlap_details.append({
-                "building_id": f"building_{i}",
-                "overlap_area": round(overlap_area_sqm, 2)
+                "building_id": building_ids[index],
+                "overlap_area": round(float(area), 2)
             })
 
-    return {
-        "self_shadow_area": round(self_shadow_area, 2),
-        "projected_shadow_area": round(projected_shadow_area, 2),
-        "overlap_area": round(overlap_area_sqm, 2),
-        "overlap_details": overlap_details
-    }
+    result["projected_shadow_area"] = round(projected_shadow_area, 2)
+    result["overlap_area"] = round(float(overlap_areas.sum()), 2)
+    result["overlap_details"] = overlap_details
+    return result
 
 
 def calculate_shadow_comparison(
@@ -202,8 +998,8 @@ def calculate_shadow_comparison(
     )
 
     # Calculate shadow length coefficients
-    solar_pos_winter = calculate_solar_position(lat, lng, "2024-12-22", hour, 0)
-    solar_pos_summer = calculate_solar_position(lat, lng, "2024-06-21", hour, 0)
+    solar_pos_winter = calculate_solar_position(lat, lng, "2024-12-22", hour, 0, timezone=settings.tz, include_sun_times=False)
+    solar_pos_summer = calculate_solar_position(lat, lng, "2024-06-21", hour, 0, timezone=settings.tz, include_sun_times=False)
 
     winter_coefficient = calculate_shadow_coefficient(
         solar_pos_winter["solar_altitude"],
@@ -234,59 +1030,43 @@ def calculate_shadow_comparison(
     }
 
 
-def _project_shadow(
-    building_poly: Polygon,
-    height: float,
-    solar_altitude: float,
-    solar_azimuth: float
-) -> Polygon:
+def _polygons_to_geojson(geometries: np.ndarray) -> List[Dict[str, Any]]:
     """
-    Project building shadow based on solar position
+    Convert an array of (Multi)Polygons to GeoJSON dictionaries in one pass
+
+    Coordinates of all rings are extracted with a single call and split per
+    ring instead of walking each geometry's rings in Python.
 
     Args:
-        building_poly: Building footprint polygon
-        height: Building height
-        solar_altitude: Solar altitude angle in degrees
-        solar_azimuth: Solar azimuth angle in degrees
+        geometries: Array of non-empty shapely Polygons/MultiPolygons
 
     Returns:
-        Shadow polygon
+        List of GeoJSON dictionaries
     """
-    # Convert angles to radians
-    alt_rad = np.radians(solar_altitude)
-    az_rad = np.radians(solar_azimuth)
+    if len(geometries) == 0:
+        return []
+
+    parts, part_owner = shapely.get_parts(geometries, return_index=True)
+    rings, ring_owner = shapely.get_rings(parts, return_index=True)
+    coords, coord_owner = shapely.get_coordinates(rings, return_index=True)
+
+    ring_coords = np.split(coords, np.cumsum(np.bincount(coord_owner, minlength=len(rings)))[:-1])
+
+    part_rings = [[] for _ in range(len(parts))]
+    for owner, ring in zip(ring_owner, ring_coords):
+        part_rings[owner].append(ring.tolist())
+
+    geometry_parts = [[] for _ in range(len(geometries))]
+    for owner, rings_of_part in zip(part_owner, part_rings):
+        geometry_parts[owner].append(rings_of_part)
 
-    # Calculate shadow length
-    # shadow_length = height / tan(altitude)
-    shadow_length = height / np.tan(alt_rad)
-
-    # Calculate shadow offset in x and y directions
-    # Azimuth is measured from north clockwise
-    # x offset = shadow_length * sin(azimuth)
-    # y offset = shadow_length * cos(azimuth)
-    dx = shadow_length * np.sin(az_rad)
-    dy = shadow_length * np.cos(az_rad)
-
-    # Get building coordinates
-    coords = list(building_poly.exterior.coords)
-
-    # Project each vertex
-    shadow_coords = []
-    for x, y in coords:
-        # Shift coordinate in shadow direction
-        shadow_x = x + dx
-        shadow_y = y + dy
-        shadow_coords.append((shadow_x, shadow_y))
-
-    # Create shadow polygon by connecting original vertices to projected vertices
-    # This creates a "side" of the shadow volume
-    original_len = len(coords)
-
-    # Combine original and projected vertices to create shadow polygon
-    # The shadow polygon is the projection of the top vertices
-    shadow_poly = Polygon(shadow_coords)
-
-    return shadow_poly
+    result = []
+    for geometry, polygons in zip(geometries, geometry_parts):
+        if geometry.geom_type == "Polygon":
+            result.append({"type": "Polygon", "coordinates": polygons[0]})
+        else:
+            result.append({"type": "MultiPolygon", "coordinates": polygons})
+    return result
 
 
 def _shapely_to_geojson(geometry: Polygon) -> Dict[str, Any]:
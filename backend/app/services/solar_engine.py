@@ -0,0 +1,812 @@
+"""
+Solar Position Engine
+
+Vectorized NumPy implementation of the NREL Solar Position Algorithm
+(Reda & Andreas, 2004) plus a faster NOAA approximation. All functions
+operate on arrays of UNIX timestamps and broadcast over arrays of
+latitudes/longitudes, so whole timelines or point grids are evaluated
+in a single pass without pandas.
+"""
+from typing import Dict, Union
+import numpy as np
+
+# Precision tiers
+PRECISION_SPA = "spa"
+PRECISION_NOAA = "noaa"
+PRECISION_TIERS = (PRECISION_SPA, PRECISION_NOAA)
+
+# Default atmospheric parameters (match the previous pvlib call)
+DEFAULT_PRESSURE_MBAR = 1013.25
+DEFAULT_TEMPERATURE_C = 12.0
+DEFAULT_DELTA_T = 67.0
+ATMOS_REFRACT = 0.5667
+
+# Apparent sun altitude at sunrise/sunset (refraction plus solar radius)
+SUNRISE_HORIZON = -0.833
+
+# Number of timestamps evaluated per chunk of the periodic term sums
+_CHUNK_SIZE = 65536
+
+ArrayLike = Union[float, np.ndarray]
+
+
+# ---------------------------------------------------------------------------
+# Periodic term tables (A, B, C) for heliocentric longitude, latitude and
+# radius vector, and nutation coefficients (Reda & Andreas, Tables A4.2/A4.3)
+# ---------------------------------------------------------------------------
+
+_L0 = np.array([
+    [175347046.0, 0.0, 0.0],
+    [3341656.0, 4.6692568, 6283.07585],
+    [34894.0, 4.6261, 12566.1517],
+    [3497.0, 2.7441, 5753.3849],
+    [3418.0, 2.8289, 3.5231],
+    [3136.0, 3.6277, 77713.7715],
+    [2676.0, 4.4181, 7860.4194],
+    [2343.0, 6.1352, 3930.2097],
+    [1324.0, 0.7425, 11506.7698],
+    [1273.0, 2.0371, 529.691],
+    [1199.0, 1.1096, 1577.3435],
+    [990.0, 5.233, 5884.927],
+    [902.0, 2.045, 26.298],
+    [857.0, 3.508, 398.149],
+    [780.0, 1.179, 5223.694],
+    [753.0, 2.533, 5507.553],
+    [505.0, 4.583, 18849.228],
+    [492.0, 4.205, 775.523],
+    [357.0, 2.92, 0.067],
+    [317.0, 5.849, 11790.629],
+    [284.0, 1.899, 796.298],
+    [271.0, 0.315, 10977.079],
+    [243.0, 0.345, 5486.778],
+    [206.0, 4.806, 2544.314],
+    [205.0, 1.869, 5573.143],
+    [202.0, 2.458, 6069.777],
+    [156.0, 0.833, 213.299],
+    [132.0, 3.411, 2942.463],
+    [126.0, 1.083, 20.775],
+    [115.0, 0.645, 0.98],
+    [103.0, 0.636, 4694.003],
+    [102.0, 0.976, 15720.839],
+    [102.0, 4.267, 7.114],
+    [99.0, 6.21, 2146.17],
+    [98.0, 0.68, 155.42],
+    [86.0, 5.98, 161000.69],
+    [85.0, 1.3, 6275.96],
+    [85.0, 3.67, 71430.7],
+    [80.0, 1.81, 17260.15],
+    [79.0, 3.04, 12036.46],
+    [75.0, 1.76, 5088.63],
+    [74.0, 3.5, 3154.69],
+    [74.0, 4.68, 801.82],
+    [70.0, 0.83, 9437.76],
+    [62.0, 3.98, 8827.39],
+    [61.0, 1.82, 7084.9],
+    [57.0, 2.78, 6286.6],
+    [56.0, 4.39, 14143.5],
+    [56.0, 3.47, 6279.55],
+    [52.0, 0.19, 12139.55],
+    [52.0, 1.33, 1748.02],
+    [51.0, 0.28, 5856.48],
+    [49.0, 0.49, 1194.45],
+    [41.0, 5.37, 8429.24],
+    [41.0, 2.4, 19651.05],
+    [39.0, 6.17, 10447.39],
+    [37.0, 6.04, 10213.29],
+    [37.0, 2.57, 1059.38],
+    [36.0, 1.71, 2352.87],
+    [36.0, 1.78, 6812.77],
+    [33.0, 0.59, 17789.85],
+    [30.0, 0.44, 83996.85],
+    [30.0, 2.74, 1349.87],
+    [25.0, 3.16, 4690.48],
+])
+
+_L1 = np.array([
+    [628331966747.0, 0.0, 0.0],
+    [206059.0, 2.678235, 6283.07585],
+    [4303.0, 2.6351, 12566.1517],
+    [425.0, 1.59, 3.523],
+    [119.0, 5.796, 26.298],
+    [109.0, 2.966, 1577.344],
+    [93.0, 2.59, 18849.23],
+    [72.0, 1.14, 529.69],
+    [68.0, 1.87, 398.15],
+    [67.0, 4.41, 5507.55],
+    [59.0, 2.89, 5223.69],
+    [56.0, 2.17, 155.42],
+    [45.0, 0.4, 796.3],
+    [36.0, 0.47, 775.52],
+    [29.0, 2.65, 7.11],
+    [21.0, 5.34, 0.98],
+    [19.0, 1.85, 5486.78],
+    [19.0, 4.97, 213.3],
+    [17.0, 2.99, 6275.96],
+    [16.0, 0.03, 2544.31],
+    [16.0, 1.43, 2146.17],
+    [15.0, 1.21, 10977.08],
+    [12.0, 2.83, 1748.02],
+    [12.0, 3.26, 5088.63],
+    [12.0, 5.27, 1194.45],
+    [12.0, 2.08, 4694.0],
+    [11.0, 0.77, 553.57],
+    [10.0, 1.3, 6286.6],
+    [10.0, 4.24, 1349.87],
+    [9.0, 2.7, 242.73],
+    [9.0, 5.64, 951.72],
+    [8.0, 5.3, 2352.87],
+    [6.0, 2.65, 9437.76],
+    [6.0, 4.67, 4690.48],
+])
+
+_L2 = np.array([
+    [52919.0, 0.0, 0.0],
+    [8720.0, 1.0721, 6283.0758],
+    [309.0, 0.867, 12566.152],
+    [27.0, 0.05, 3.52],
+    [16.0, 5.19, 26.3],
+    [16.0, 3.68, 155.42],
+    [10.0, 0.76, 18849.23],
+    [9.0, 2.06, 77713.77],
+    [7.0, 0.83, 775.52],
+    [5.0, 4.66, 1577.34],
+    [4.0, 1.03, 7.11],
+    [4.0, 3.44, 5573.14],
+    [3.0, 5.14, 796.3],
+    [3.0, 6.05, 5507.55],
+    [3.0, 1.19, 242.73],
+    [3.0, 6.12, 529.69],
+    [3.0, 0.31, 398.15],
+    [3.0, 2.28, 553.57],
+    [2.0, 4.38, 5223.69],
+    [2.0, 3.75, 0.98],
+])
+
+_L3 = np.array([
+    [289.0, 5.844, 6283.076],
+    [35.0, 0.0, 0.0],
+    [17.0, 5.49, 12566.15],
+    [3.0, 5.2, 155.42],
+    [1.0, 4.72, 3.52],
+    [1.0, 5.3, 18849.23],
+    [1.0, 5.97, 242.73],
+])
+
+_L4 = np.array([
+    [114.0, 3.142, 0.0],
+    [8.0, 4.13, 6283.08],
+    [1.0, 3.84, 12566.15],
+])
+
+_L5 = np.array([
+    [1.0, 3.14, 0.0],
+])
+
+_B0 = np.array([
+    [280.0, 3.199, 84334.662],
+    [102.0, 5.422, 5507.553],
+    [80.0, 3.88, 5223.69],
+    [44.0, 3.7, 2352.87],
+    [32.0, 4.0, 1577.34],
+])
+
+_B1 = np.array([
+    [9.0, 3.9, 5507.55],
+    [6.0, 1.73, 5223.69],
+])
+
+_R0 = np.array([
+    [100013989.0, 0.0, 0.0],
+    [1670700.0, 3.0984635, 6283.07585],
+    [13956.0, 3.05525, 12566.1517],
+    [3084.0, 5.1985, 77713.7715],
+    [1628.0, 1.1739, 5753.3849],
+    [1576.0, 2.8469, 7860.4194],
+    [925.0, 5.453, 11506.77],
+    [542.0, 4.564, 3930.21],
+    [472.0, 3.661, 5884.927],
+    [346.0, 0.964, 5507.553],
+    [329.0, 5.9, 5223.694],
+    [307.0, 0.299, 5573.143],
+    [243.0, 4.273, 11790.629],
+    [212.0, 5.847, 1577.344],
+    [186.0, 5.022, 10977.079],
+    [175.0, 3.012, 18849.228],
+    [110.0, 5.055, 5486.778],
+    [98.0, 0.89, 6069.78],
+    [86.0, 5.69, 15720.84],
+    [86.0, 1.27, 161000.69],
+    [65.0, 0.27, 17260.15],
+    [63.0, 0.92, 529.69],
+    [57.0, 2.01, 83996.85],
+    [56.0, 5.24, 71430.7],
+    [49.0, 3.25, 2544.31],
+    [47.0, 2.58, 775.52],
+    [45.0, 5.54, 9437.76],
+    [43.0, 6.01, 6275.96],
+    [39.0, 5.36, 4694.0],
+    [38.0, 2.39, 8827.39],
+    [37.0, 0.83, 19651.05],
+    [37.0, 4.9, 12139.55],
+    [36.0, 1.67, 12036.46],
+    [35.0, 1.84, 2942.46],
+    [33.0, 0.24, 7084.9],
+    [32.0, 0.18, 5088.63],
+    [32.0, 1.78, 398.15],
+    [28.0, 1.21, 6286.6],
+    [28.0, 1.9, 6279.55],
+    [26.0, 4.59, 10447.39],
+])
+
+_R1 = np.array([
+    [103019.0, 1.10749, 6283.07585],
+    [1721.0, 1.0644, 12566.1517],
+    [702.0, 3.142, 0.0],
+    [32.0, 1.02, 18849.23],
+    [31.0, 2.84, 5507.55],
+    [25.0, 1.32, 5223.69],
+    [18.0, 1.42, 1577.34],
+    [10.0, 5.91, 10977.08],
+    [9.0, 1.42, 6275.96],
+    [9.0, 0.27, 5486.78],
+])
+
+_R2 = np.array([
+    [4359.0, 5.7846, 6283.0758],
+    [124.0, 5.579, 12566.152],
+    [12.0, 3.14, 0.0],
+    [9.0, 3.63, 77713.77],
+    [6.0, 1.87, 5573.14],
+    [3.0, 5.47, 18849.23],
+])
+
+_R3 = np.array([
+    [145.0, 4.273, 6283.076],
+    [7.0, 3.92, 12566.15],
+])
+
+_R4 = np.array([
+    [4.0, 2.56, 6283.08],
+])
+
+_NUTATION_Y = np.array([
+    [0, 0, 0, 0, 1],
+    [-2, 0, 0, 2, 2],
+    [0, 0, 0, 2, 2],
+    [0, 0, 0, 0, 2],
+    [0, 1, 0, 0, 0],
+    [0, 0, 1, 0, 0],
+    [-2, 1, 0, 2, 2],
+    [0, 0, 0, 2, 1],
+    [0, 0, 1, 2, 2],
+    [-2, -1, 0, 2, 2],
+    [-2, 0, 1, 0, 0],
+    [-2, 0, 0, 2, 1],
+    [0, 0, -1, 2, 2],
+    [2, 0, 0, 0, 0],
+    [0, 0, 1, 0, 1],
+    [2, 0, -1, 2, 2],
+    [0, 0, -1, 0, 1],
+    [0, 0, 1, 2, 1],
+    [-2, 0, 2, 0, 0],
+    [0, 0, -2, 2, 1],
+    [2, 0, 0, 2, 2],
+    [0, 0, 2, 2, 2],
+    [0, 0, 2, 0, 0],
+    [-2, 0, 1, 2, 2],
+    [0, 0, 0, 2, 0],
+    [-2, 0, 0, 2, 0],
+    [0, 0, -1, 2, 1],
+    [0, 2, 0, 0, 0],
+    [2, 0, -1, 0, 1],
+    [-2, 2, 0, 2, 2],
+    [0, 1, 0, 0, 1],
+    [-2, 0, 1, 0, 1],
+    [0, -1, 0, 0, 1],
+    [0, 0, 2, -2, 0],
+    [2, 0, -1, 2, 1],
+    [2, 0, 1, 2, 2],
+    [0, 1, 0, 2, 2],
+    [-2, 1, 1, 0, 0],
+    [0, -1, 0, 2, 2],
+    [2, 0, 0, 2, 1],
+    [2, 0, 1, 0, 0],
+    [-2, 0, 2, 2, 2],
+    [-2, 0, 1, 2, 1],
+    [2, 0, -2, 0, 1],
+    [2, 0, 0, 0, 1],
+    [0, -1, 1, 0, 0],
+    [-2, -1, 0, 2, 1],
+    [-2, 0, 0, 0, 1],
+    [0, 0, 2, 2, 1],
+    [-2, 0, 2, 0, 1],
+    [-2, 1, 0, 2, 1],
+    [0, 0, 1, -2, 0],
+    [-1, 0, 1, 0, 0],
+    [-2, 1, 0, 0, 0],
+    [1, 0, 0, 0, 0],
+    [0, 0, 1, 2, 0],
+    [0, 0, -2, 2, 2],
+    [-1, -1, 1, 0, 0],
+    [0, 1, 1, 0, 0],
+    [0, -1, 1, 2, 2],
+    [2, -1, -1, 2, 2],
+    [0, 0, 3, 2, 2],
+    [2, -1, 0, 2, 2],
+])
+
+_NUTATION_ABCD = np.array([
+    [-171996.0, -174.2, 92025.0, 8.9],
+    [-13187.0, -1.6, 5736.0, -3.1],
+    [-2274.0, -0.2, 977.0, -0.5],
+    [2062.0, 0.2, -895.0, 0.5],
+    [1426.0, -3.4, 54.0, -0.1],
+    [712.0, 0.1, -7.0, 0.0],
+    [-517.0, 1.2, 224.0, -0.6],
+    [-386.0, -0.4, 200.0, 0.0],
+    [-301.0, 0.0, 129.0, -0.1],
+    [217.0, -0.5, -95.0, 0.3],
+    [-158.0, 0.0, 0.0, 0.0],
+    [129.0, 0.1, -70.0, 0.0],
+    [123.0, 0.0, -53.0, 0.0],
+    [63.0, 0.0, 0.0, 0.0],
+    [63.0, 0.1, -33.0, 0.0],
+    [-59.0, 0.0, 26.0, 0.0],
+    [-58.0, -0.1, 32.0, 0.0],
+    [-51.0, 0.0, 27.0, 0.0],
+    [48.0, 0.0, 0.0, 0.0],
+    [46.0, 0.0, -24.0, 0.0],
+    [-38.0, 0.0, 16.0, 0.0],
+    [-31.0, 0.0, 13.0, 0.0],
+    [29.0, 0.0, 0.0, 0.0],
+    [29.0, 0.0, -12.0, 0.0],
+    [26.0, 0.0, 0.0, 0.0],
+    [-22.0, 0.0, 0.0, 0.0],
+    [21.0, 0.0, -10.0, 0.0],
+    [17.0, -0.1, 0.0, 0.0],
+    [16.0, 0.0, -8.0, 0.0],
+    [-16.0, 0.1, 7.0, 0.0],
+    [-15.0, 0.0, 9.0, 0.0],
+    [-13.0, 0.0, 7.0, 0.0],
+    [-12.0, 0.0, 6.0, 0.0],
+    [11.0, 0.0, 0.0, 0.0],
+    [-10.0, 0.0, 5.0, 0.0],
+    [-8.0, 0.0, 3.0, 0.0],
+    [7.0, 0.0, -3.0, 0.0],
+    [-7.0, 0.0, 0.0, 0.0],
+    [-7.0, 0.0, 3.0, 0.0],
+    [-7.0, 0.0, 3.0, 0.0],
+    [6.0, 0.0, 0.0, 0.0],
+    [6.0, 0.0, -3.0, 0.0],
+    [6.0, 0.0, -3.0, 0.0],
+    [-6.0, 0.0, 3.0, 0.0],
+    [-6.0, 0.0, 3.0, 0.0],
+    [5.0, 0.0, 0.0, 0.0],
+    [-5.0, 0.0, 3.0, 0.0],
+    [-5.0, 0.0, 3.0, 0.0],
+    [-5.0, 0.0, 3.0, 0.0],
+    [4.0, 0.0, 0.0, 0.0],
+    [4.0, 0.0, 0.0, 0.0],
+    [4.0, 0.0, 0.0, 0.0],
+    [-4.0, 0.0, 0.0, 0.0],
+    [-4.0, 0.0, 0.0, 0.0],
+    [-4.0, 0.0, 0.0, 0.0],
+    [3.0, 0.0, 0.0, 0.0],
+    [-3.0, 0.0, 0.0, 0.0],
+    [-3.0, 0.0, 0.0, 0.0],
+    [-3.0, 0.0, 0.0, 0.0],
+    [-3.0, 0.0, 0.0, 0.0],
+    [-3.0, 0.0, 0.0, 0.0],
+    [-3.0, 0.0, 0.0, 0.0],
+    [-3.0, 0.0, 0.0, 0.0],
+])
+
+
+def solar_position(
+    unixtime: ArrayLike,
+    lat: ArrayLike,
+    lng: ArrayLike,
+    elevation: ArrayLike = 0.0,
+    pressure: float = DEFAULT_PRESSURE_MBAR,
+    temperature: float = DEFAULT_TEMPERATURE_C,
+    delta_t: float = DEFAULT_DELTA_T,
+    precision: str = PRECISION_SPA
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate solar position for arrays of times and locations
+
+    Time-dependent terms are evaluated once per timestamp and then broadcast
+    against the location arrays, so passing times with shape (T,) and
+    locations with shape (N, 1) yields (N, T) results.
+
+    Args:
+        unixtime: Seconds since 1970-01-01 UTC
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        elevation: Observer elevation in meters
+        pressure: Annual average local pressure in millibars
+        temperature: Annual average local temperature in degrees Celsius
+        delta_t: Difference between terrestrial time and UT1 in seconds
+        precision: Precision tier ("spa" or "noaa"); the interpolated
+            "ephemeris" tier lives in solar_ephemeris
+
+    Returns:
+        Dictionary of arrays: altitude (geometric), apparent_elevation
+        (refraction corrected), azimuth (clockwise from north), declination
+        and equation_of_time (minutes)
+    """
+    unixtime = np.asarray(unixtime, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    lng = np.asarray(lng, dtype=float)
+
+    if precision == PRECISION_SPA:
+        return _spa_position(unixtime, lat, lng, np.asarray(elevation, dtype=float),
+                             pressure, temperature, delta_t)
+    if precision == PRECISION_NOAA:
+        return _noaa_position(unixtime, lat, lng, pressure, temperature)
+
+    raise ValueError(f"Unsupported precision tier: {precision}")
+
+
+def _spa_position(
+    unixtime: np.ndarray,
+    lat: np.ndarray,
+    lng: np.ndarray,
+    elevation: np.ndarray,
+    pressure: float,
+    temperature: float,
+    delta_t: float
+) -> Dict[str, np.ndarray]:
+    """Full NREL SPA evaluation (time terms first, then location terms)"""
+    return spa_topocentric(spa_sun_terms(unixtime, delta_t), lat, lng, elevation, pressure, temperature)
+
+
+def spa_topocentric(
+    sun: Dict[str, np.ndarray],
+    lat: ArrayLike,
+    lng: ArrayLike,
+    elevation: ArrayLike = 0.0,
+    pressure: float = DEFAULT_PRESSURE_MBAR,
+    temperature: float = DEFAULT_TEMPERATURE_C
+) -> Dict[str, np.ndarray]:
+    """
+    Convert geocentric sun terms into topocentric angles for observers
+
+    Args:
+        sun: Location-independent terms as returned by spa_sun_terms
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        elevation: Observer elevation in meters
+        pressure: Local pressure in millibars
+        temperature: Local temperature in degrees Celsius
+
+    Returns:
+        Dictionary of arrays as returned by solar_position
+    """
+    lat = np.asarray(lat, dtype=float)
+    lng = np.asarray(lng, dtype=float)
+    elevation = np.asarray(elevation, dtype=float)
+
+    # Observer local hour angle (degrees, westward from south)
+    hour_angle = (sun["sidereal_time"] + lng - sun["right_ascension"]) % 360
+
+    # Equatorial horizontal parallax and observer terms
+    xi = np.radians(8.794 / (3600 * sun["radius"]))
+    lat_rad = np.radians(lat)
+    u = np.arctan(0.99664719 * np.tan(lat_rad))
+    x = np.cos(u) + elevation / 6378140 * np.cos(lat_rad)
+    y = 0.99664719 * np.sin(u) + elevation / 6378140 * np.sin(lat_rad)
+
+    hour_angle_rad = np.radians(hour_angle)
+    declination_rad = np.radians(sun["declination"])
+
+    delta_alpha = np.arctan2(
+        -x * np.sin(xi) * np.sin(hour_angle_rad),
+        np.cos(declination_rad) - x * np.sin(xi) * np.cos(hour_angle_rad)
+    )
+    topo_declination = np.arctan2(
+        (np.sin(declination_rad) - y * np.sin(xi)) * np.cos(delta_alpha),
+        np.cos(declination_rad) - x * np.sin(xi) * np.cos(hour_angle_rad)
+    )
+    topo_hour_angle = hour_angle_rad - delta_alpha
+
+    altitude = np.degrees(np.arcsin(
+        np.sin(lat_rad) * np.sin(topo_declination)
+        + np.cos(lat_rad) * np.cos(topo_declination) * np.cos(topo_hour_angle)
+    ))
+
+    azimuth = (np.degrees(np.arctan2(
+        np.sin(topo_hour_angle),
+        np.cos(topo_hour_angle) * np.sin(lat_rad) - np.tan(topo_declination) * np.cos(lat_rad)
+    )) + 180) % 360
+
+    apparent_elevation = altitude + refraction_correction(altitude, pressure, temperature)
+
+    return {
+        "altitude": altitude,
+        "apparent_elevation": apparent_elevation,
+        "azimuth": azimuth,
+        "declination": np.broadcast_to(sun["declination"], altitude.shape),
+        "equation_of_time": np.broadcast_to(sun["equation_of_time"], altitude.shape)
+    }
+
+
+def spa_sun_terms(unixtime: ArrayLike, delta_t: float = DEFAULT_DELTA_T) -> Dict[str, np.ndarray]:
+    """
+    Calculate the location-independent SPA terms for an array of timestamps
+
+    Args:
+        unixtime: Seconds since 1970-01-01 UTC
+        delta_t: Difference between terrestrial time and UT1 in seconds
+
+    Returns:
+        Dictionary of arrays: radius (AU), sidereal_time, right_ascension,
+        declination (degrees) and equation_of_time (minutes)
+    """
+    unixtime = np.asarray(unixtime, dtype=float)
+    shape = unixtime.shape
+    flat = unixtime.ravel()
+
+    jd = flat / 86400.0 + 2440587.5
+    jde = jd + delta_t / 86400.0
+    jc = (jd - 2451545.0) / 36525.0
+    jce = (jde - 2451545.0) / 36525.0
+    jme = jce / 10.0
+
+    # Heliocentric longitude, latitude and radius vector
+    L = np.degrees(_polynomial_terms((_L0, _L1, _L2, _L3, _L4, _L5), jme)) % 360
+    B = np.degrees(_polynomial_terms((_B0, _B1), jme))
+    R = _polynomial_terms((_R0, _R1, _R2, _R3, _R4), jme)
+
+    # Geocentric longitude and latitude
+    theta = (L + 180.0) % 360
+    beta = -B
+
+    # Nutation in longitude and obliquity
+    delta_psi, delta_epsilon = _nutation(jce)
+
+    # True obliquity of the ecliptic
+    U = jme / 10.0
+    epsilon0 = (84381.448 - 4680.93 * U - 1.55 * U ** 2 + 1999.25 * U ** 3
+                - 51.38 * U ** 4 - 249.67 * U ** 5 - 39.05 * U ** 6 + 7.12 * U ** 7
+                + 27.87 * U ** 8 + 5.79 * U ** 9 + 2.45 * U ** 10)
+    epsilon = epsilon0 / 3600.0 + delta_epsilon
+
+    # Apparent sun longitude (aberration corrected)
+    lamd = theta + delta_psi - 20.4898 / (3600 * R)
+
+    # Apparent sidereal time at Greenwich
+    v0 = (280.46061837 + 360.98564736629 * (jd - 2451545.0)
+          + 0.000387933 * jc ** 2 - jc ** 3 / 38710000) % 360.0
+    v = v0 + delta_psi * np.cos(np.radians(epsilon))
+
+    # Geocentric sun right ascension and declination
+    lamd_rad = np.radians(lamd)
+    epsilon_rad = np.radians(epsilon)
+    beta_rad = np.radians(beta)
+    alpha = np.degrees(np.arctan2(
+        np.sin(lamd_rad) * np.cos(epsilon_rad) - np.tan(beta_rad) * np.sin(epsilon_rad),
+        np.cos(lamd_rad)
+    )) % 360
+    delta = np.degrees(np.arcsin(
+        np.sin(beta_rad) * np.cos(epsilon_rad)
+        + np.cos(beta_rad) * np.sin(epsilon_rad) * np.sin(lamd_rad)
+    ))
+
+    # Equation of time (minutes), limited to +/- 20 minutes
+    M = (280.4664567 + 360007.6982779 * jme + 0.03032028 * jme ** 2
+         + jme ** 3 / 49931 - jme ** 4 / 15300 - jme ** 5 / 2000000)
+    eot = ((M - 0.0057183 - alpha + delta_psi * np.cos(epsilon_rad)) % 360) * 4
+    eot = np.where(eot > 20, eot - 1440, eot)
+
+    return {
+        "radius": R.reshape(shape),
+        "sidereal_time": v.reshape(shape),
+        "right_ascension": alpha.reshape(shape),
+        "declination": delta.reshape(shape),
+        "equation_of_time": eot.reshape(shape)
+    }
+
+
+def _noaa_position(
+    unixtime: np.ndarray,
+    lat: np.ndarray,
+    lng: np.ndarray,
+    pressure: float,
+    temperature: float
+) -> Dict[str, np.ndarray]:
+    """NOAA solar calculator approximation (about 0.01 degree accuracy)"""
+    declination, eot = noaa_sun_terms(unixtime)
+
+    # True solar time in minutes and hour angle in degrees
+    minutes_utc = np.mod(unixtime, 86400.0) / 60.0
+    true_solar_time = np.mod(minutes_utc + eot + 4.0 * lng, 1440.0)
+    hour_angle_rad = np.radians(true_solar_time / 4.0 - 180.0)
+
+    lat_rad = np.radians(lat)
+    declination_rad = np.radians(declination)
+
+    altitude = np.degrees(np.arcsin(np.clip(
+        np.sin(lat_rad) * np.sin(declination_rad)
+        + np.cos(lat_rad) * np.cos(declination_rad) * np.cos(hour_angle_rad),
+        -1.0, 1.0
+    )))
+
+    azimuth = (np.degrees(np.arctan2(
+        np.sin(hour_angle_rad),
+        np.cos(hour_angle_rad) * np.sin(lat_rad) - np.tan(declination_rad) * np.cos(lat_rad)
+    )) + 180) % 360
+
+    apparent_elevation = altitude + refraction_correction(altitude, pressure, temperature)
+
+    return {
+        "altitude": altitude,
+        "apparent_elevation": apparent_elevation,
+        "azimuth": azimuth,
+        "declination": np.broadcast_to(declination, altitude.shape),
+        "equation_of_time": np.broadcast_to(eot, altitude.shape)
+    }
+
+
+def noaa_sun_terms(unixtime: ArrayLike) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate sun declination and equation of time with the NOAA formulas
+
+    Args:
+        unixtime: Seconds since 1970-01-01 UTC
+
+    Returns:
+        Tuple of (declination_degrees, equation_of_time_minutes)
+    """
+    unixtime = np.asarray(unixtime, dtype=float)
+    jc = (unixtime / 86400.0 + 2440587.5 - 2451545.0) / 36525.0
+
+    mean_long = np.radians((280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360)
+    mean_anom = np.radians(357.52911 + jc * (35999.05029 - 0.0001537 * jc))
+    eccent = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+
+    center = np.radians(
+        np.sin(mean_anom) * (1.914602 - jc * (0.004817 + 0.000014 * jc))
+        + np.sin(2 * mean_anom) * (0.019993 - 0.000101 * jc)
+        + np.sin(3 * mean_anom) * 0.000289
+    )
+    omega = np.radians(125.04 - 1934.136 * jc)
+    apparent_long = mean_long + center - np.radians(0.00569 + 0.00478 * np.sin(omega))
+
+    mean_obliq = 23 + (26 + (21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813))) / 60) / 60
+    obliq = np.radians(mean_obliq + 0.00256 * np.cos(omega))
+
+    declination = np.degrees(np.arcsin(np.sin(obliq) * np.sin(apparent_long)))
+
+    var_y = np.tan(obliq / 2) ** 2
+    eot = 4 * np.degrees(
+        var_y * np.sin(2 * mean_long)
+        - 2 * eccent * np.sin(mean_anom)
+        + 4 * eccent * var_y * np.sin(mean_anom) * np.cos(2 * mean_long)
+        - 0.5 * var_y ** 2 * np.sin(4 * mean_long)
+        - 1.25 * eccent ** 2 * np.sin(2 * mean_anom)
+    )
+
+    return declination, eot
+
+
+def sun_rise_set_transit(
+    day_unixtime: ArrayLike,
+    lat: ArrayLike,
+    lng: ArrayLike,
+    horizon: float = SUNRISE_HORIZON,
+    iterations: int = 2
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate sunrise, sunset and solar transit for arrays of days
+
+    Uses the NOAA hour-angle formulation, re-evaluating declination and
+    equation of time at each event time for ``iterations`` rounds, which
+    converges to well under a minute. Polar day/night yields NaN.
+
+    Args:
+        day_unixtime: UNIX timestamps of 00:00 UTC on each calendar date;
+            events are those of the solar day whose transit falls near
+            12:00 local mean time on that date
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        horizon: Sun altitude at rise/set in degrees (default: -0.833)
+        iterations: Number of refinement rounds
+
+    Returns:
+        Dictionary of UNIX timestamp arrays: sunrise, sunset, transit
+    """
+    day_unixtime = np.asarray(day_unixtime, dtype=float)
+    lat_rad = np.radians(np.asarray(lat, dtype=float))
+    lng = np.asarray(lng, dtype=float)
+    cos_horizon = np.cos(np.radians(90.0 - horizon))
+
+    def event_minutes(guess_minutes: np.ndarray, sign: float) -> np.ndarray:
+        declination, eot = noaa_sun_terms(day_unixtime + guess_minutes * 60.0)
+        declination_rad = np.radians(declination)
+        transit = 720.0 - 4.0 * lng - eot
+        if sign == 0:
+            return transit
+        with np.errstate(invalid="ignore"):
+            hour_angle = np.degrees(np.arccos(
+                cos_horizon / (np.cos(lat_rad) * np.cos(declination_rad))
+                - np.tan(lat_rad) * np.tan(declination_rad)
+            ))
+        return transit + sign * 4.0 * hour_angle
+
+    transit = event_minutes(np.full(np.broadcast(day_unixtime, lng).shape, 720.0), 0)
+    sunrise = event_minutes(transit, -1.0)
+    sunset = event_minutes(transit, 1.0)
+    for _ in range(iterations):
+        transit = event_minutes(transit, 0)
+        sunrise = event_minutes(np.where(np.isnan(sunrise), transit, sunrise), -1.0)
+        sunset = event_minutes(np.where(np.isnan(sunset), transit, sunset), 1.0)
+
+    return {
+        "sunrise": day_unixtime + sunrise * 60.0,
+        "sunset": day_unixtime + sunset * 60.0,
+        "transit": day_unixtime + transit * 60.0
+    }
+
+
+def refraction_correction(
+    altitude: ArrayLike,
+    pressure: float = DEFAULT_PRESSURE_MBAR,
+    temperature: float = DEFAULT_TEMPERATURE_C
+) -> np.ndarray:
+    """
+    Atmospheric refraction correction (zero below the horizon)
+
+    Args:
+        altitude: Geometric solar altitude in degrees
+        pressure: Local pressure in millibars
+        temperature: Local temperature in degrees Celsius
+
+    Returns:
+        Correction in degrees to add to the geometric altitude
+    """
+    altitude = np.asarray(altitude, dtype=float)
+    above = altitude >= -1.0 * (0.26667 + ATMOS_REFRACT)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correction = ((pressure / 1010.0) * (283.0 / (273 + temperature))
+                      * 1.02 / (60 * np.tan(np.radians(altitude + 10.3 / (altitude + 5.11)))))
+    return np.where(above, correction, 0.0)
+
+
+def _polynomial_terms(tables: tuple, jme: np.ndarray) -> np.ndarray:
+    """Evaluate sum_i(T_i(jme) * jme**i) / 1e8 for a series of periodic tables"""
+    result = np.zeros_like(jme)
+    for start in range(0, jme.size, _CHUNK_SIZE):
+        chunk = jme[start:start + _CHUNK_SIZE]
+        total = np.zeros_like(chunk)
+        for power, table in enumerate(tables):
+            terms = table[:, 0] @ np.cos(table[:, 1:2] + table[:, 2:3] * chunk)
+            total += terms * chunk ** power
+        result[start:start + _CHUNK_SIZE] = total / 1e8
+    return result
+
+
+def _nutation(jce: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Nutation in longitude and obliquity (degrees)"""
+    x = np.stack([
+        297.85036 + 445267.111480 * jce - 0.0019142 * jce ** 2 + jce ** 3 / 189474,
+        357.52772 + 35999.050340 * jce - 0.0001603 * jce ** 2 - jce ** 3 / 300000,
+        134.96298 + 477198.867398 * jce + 0.0086972 * jce ** 2 + jce ** 3 / 56250,
+        93.27191 + 483202.017538 * jce - 0.0036825 * jce ** 2 + jce ** 3 / 327270,
+        125.04452 - 1934.136261 * jce + 0.0020708 * jce ** 2 + jce ** 3 / 450000,
+    ])
+
+    delta_psi = np.empty_like(jce)
+    delta_epsilon = np.empty_like(jce)
+    a, b, c, d = _NUTATION_ABCD.T
+
+    for start in range(0, jce.size, _CHUNK_SIZE):
+        stop = start + _CHUNK_SIZE
+        arg = np.radians(_NUTATION_Y @ x[:, start:stop])
+        sin_arg = np.sin(arg)
+        cos_arg = np.cos(arg)
+        t = jce[start:stop]
+        delta_psi[start:stop] = (a @ sin_arg + (b @ sin_arg) * t) / 36000000
+        delta_epsilon[start:stop] = (c @ cos_arg + (d @ cos_arg) * t) / 36000000
+
+    return delta_psi, delta_epsilon
@@ -0,0 +1,164 @@
+"""
+Solar Ephemeris Interpolation Table
+
+Declination, right ascension, sidereal time, Earth-Sun distance and the
+equation of time vary smoothly, so they are evaluated once per year on a
+uniform grid with the full SPA and linearly interpolated afterwards. Any
+(lat, lng, time) then costs a few array operations instead of the periodic
+term sums. With the default hourly grid the interpolation error stays below
+0.001 degrees.
+"""
+from functools import lru_cache
+from typing import Dict
+import threading
+
+import numpy as np
+
+from app.services.solar_engine import (
+    ArrayLike,
+    DEFAULT_DELTA_T,
+    DEFAULT_PRESSURE_MBAR,
+    DEFAULT_TEMPERATURE_C,
+    spa_sun_terms,
+    spa_topocentric
+)
+
+# Precision tier served by the interpolation table
+PRECISION_EPHEMERIS = "ephemeris"
+
+# Grid spacing of the yearly table in seconds
+DEFAULT_STEP_SECONDS = 3600
+
+# Angles that wrap at 360 degrees and must be unwrapped before interpolation
+_ANGULAR_TERMS = ("sidereal_time", "right_ascension")
+
+
+class EphemerisTable:
+    """
+    Year-long table of location-independent sun terms on a uniform time grid
+
+    The grid starts one day before January 1 and ends one day after
+    December 31 (UTC) so that local times near the year boundary are covered.
+    """
+
+    def __init__(
+        self,
+        year: int,
+        step_seconds: int = DEFAULT_STEP_SECONDS,
+        delta_t: float = DEFAULT_DELTA_T
+    ):
+        self.year = year
+        self.step_seconds = step_seconds
+        self.start = _year_start(year) - 86400.0
+        end = _year_start(year + 1) + 86400.0
+
+        grid = np.arange(self.start, end + step_seconds, step_seconds, dtype=float)
+        self.end = float(grid[-1])
+
+        # One vectorized SPA pass over the whole year
+        terms = spa_sun_terms(grid, delta_t)
+        for name in _ANGULAR_TERMS:
+            terms[name] = np.degrees(np.unwrap(np.radians(terms[name])))
+        self.terms = terms
+
+    def sun_terms(self, unixtime: ArrayLike) -> Dict[str, np.ndarray]:
+        """
+        Interpolate sun terms at the given timestamps
+
+        Args:
+            unixtime: Seconds since 1970-01-01 UTC (must be covered by the table)
+
+        Returns:
+            Dictionary of arrays with the same keys as spa_sun_terms
+        """
+        unixtime = np.asarray(unixtime, dtype=float)
+        position = (unixtime - self.start) / self.step_seconds
+        index = np.clip(np.floor(position).astype(np.int64), 0, len(self.terms["radius"]) - 2)
+        weight = position - index
+
+        result = {}
+        for name, values in self.terms.items():
+            lower = values[index]
+            result[name] = lower + (values[index + 1] - lower) * weight
+
+        for name in _ANGULAR_TERMS:
+            result[name] = result[name] % 360
+        return result
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the table arrays"""
+        return sum(values.nbytes for values in self.terms.values())
+
+
+_table_lock = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def _cached_table(year: int, step_seconds: int) -> EphemerisTable:
+    """Build and memoize a yearly table"""
+    return EphemerisTable(year, step_seconds)
+
+
+def get_ephemeris_table(year: int, step_seconds: int = DEFAULT_STEP_SECONDS) -> EphemerisTable:
+    """
+    Get (building on first use) the ephemeris table for a year
+
+    Args:
+        year: Calendar year (UTC)
+        step_seconds: Grid spacing in seconds
+
+    Returns:
+        Cached EphemerisTable
+    """
+    with _table_lock:
+        return _cached_table(year, step_seconds)
+
+
+def ephemeris_solar_position(
+    unixtime: ArrayLike,
+    lat: ArrayLike,
+    lng: ArrayLike,
+    elevation: ArrayLike = 0.0,
+    pressure: float = DEFAULT_PRESSURE_MBAR,
+    temperature: float = DEFAULT_TEMPERATURE_C
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate solar position by interpolating the yearly ephemeris tables
+
+    Accepts the same broadcasting inputs as solar_engine.solar_position and
+    returns the same keys. Timestamps spanning several years use one table
+    per year.
+
+    Args:
+        unixtime: Seconds since 1970-01-01 UTC
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        elevation: Observer elevation in meters
+        pressure: Local pressure in millibars
+        temperature: Local temperature in degrees Celsius
+
+    Returns:
+        Dictionary of arrays: altitude, apparent_elevation, azimuth,
+        declination and equation_of_time
+    """
+    unixtime = np.asarray(unixtime, dtype=float)
+    years = unixtime.astype("datetime64[s]").astype("datetime64[Y]").astype(int) + 1970
+
+    unique_years = np.unique(years)
+    if unique_years.size == 1:
+        sun = get_ephemeris_table(int(unique_years[0])).sun_terms(unixtime)
+    else:
+        sun = {}
+        for year in unique_years:
+            mask = years == year
+            terms = get_ephemeris_table(int(year)).sun_terms(unixtime[mask])
+            for name, values in terms.items():
+                sun.setdefault(name, np.empty(unixtime.shape))[mask] = values
+
+    return spa_topocentric(sun, lat, lng, elevation, pressure, temperature)
+
+
+def _year_start(year: int) -> float:
+    """UNIX timestamp of 00:00 UTC on January 1"""
+    return float((np.datetime64(f"{year:04d}-01-01", "s") - np.datetime64(0, "s")).astype(np.int64))
@@ -0,0 +1,119 @@
+"""
+Solar Position Pre-calculation Service
+"""
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+import logging
+import uuid
+
+import numpy as np
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.cache import quantize
+from app.core.time_utils import build_local_time_grid
+from app.models.solar_position import SolarPositionPrecalc
+from app.services.solar_service import calculate_solar_positions_batch
+
+logger = logging.getLogger(__name__)
+
+
+def precompute_site_year(
+    db: Session,
+    lat: float,
+    lng: float,
+    year: int,
+    chunk_size: int = 5000
+) -> int:
+    """
+    Fill solar_positions_precalc with hourly positions for one site and year
+
+    All hours of the year are computed in one vectorized pass and written
+    with chunked bulk inserts. Existing rows for the site/year are replaced in
+    the same transaction, so the job is safe to re-run.
+
+    Coordinates are snapped to ``solar_cache_coord_step`` (the step the read
+    path looks rows up with) and hours are local to ``settings.tz``, the only
+    timezone the read path serves from the table.
+
+    Args:
+        db: Database session
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        year: Calendar year
+        chunk_size: Rows per bulk insert
+
+    Returns:
+        Number of rows inserted
+    """
+    first_date = date(year, 1, 1)
+    last_date = date(year, 12, 31)
+
+    # One sample per local wall-clock hour; DST days keep all 24 labels
+    grid = build_local_time_grid(first_date, last_date, 60, settings.tz)
+    lat = quantize(lat, settings.solar_cache_coord_step)
+    lng = quantize(lng, settings.solar_cache_coord_step)
+    batch = calculate_solar_positions_batch(lat, lng, grid["unixtime"])
+
+    latitude = Decimal(f"{lat:.6f}")
+    longitude = Decimal(f"{lng:.6f}")
+    altitudes = np.round(batch["altitude"], 6)
+    azimuths = np.round(batch["azimuth"], 6)
+
+    rows = []
+    for i, (day, minute_of_day) in enumerate(zip(grid["date"].tolist(), grid["minute"].tolist())):
+        rows.append({
+            "id": str(uuid.uuid4()),
+            "latitude": latitude,
+            "longitude": longitude,
+            "date": day,
+            "hour": minute_of_day // 60,
+            "altitude_angle": float(altitudes[i]),
+            "azimuth_angle": float(azimuths[i])
+        })
+
+    # Replace the year in one transaction so readers never see a partial table
+    try:
+        db.query(SolarPositionPrecalc).filter(
+            SolarPositionPrecalc.latitude == latitude,
+            SolarPositionPrecalc.longitude == longitude,
+            SolarPositionPrecalc.date >= first_date,
+            SolarPositionPrecalc.date <= last_date
+        ).delete(synchronize_session=False)
+        for i in range(0, len(rows), chunk_size):
+            db.bulk_insert_mappings(SolarPositionPrecalc, rows[i:i + chunk_size])
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+
+    logger.info(f"Pre-calculated {len(rows)} solar positions for ({lat}, {lng}) in {year}")
+    return len(rows)
+
+
+def precompute_sites(
+    db: Session,
+    sites: Optional[List[Tuple[float, float]]] = None,
+    years: Optional[List[int]] = None
+) -> Dict[str, int]:
+    """
+    Pre-calculate solar tables for a set of sites and years
+
+    Args:
+        db: Database session
+        sites: List of (lat, lng) (default: settings.solar_precalc_sites)
+        years: List of years (default: settings.solar_precalc_years)
+
+    Returns:
+        Mapping of "lat,lng:year" to rows inserted
+    """
+    sites = sites if sites is not None else settings.solar_precalc_sites_list
+    years = years if years is not None else settings.solar_precalc_years_list
+
+    results = {}
+    for lat, lng in sites:
+        for year in years:
+            results[f"{lat},{lng}:{year}"] = precompute_site_year(db, lat, lng, year)
+    return results
@@ -2,35 +2,70 @@
 Solar Position Calculation Service
 """
 from datetime import datetime, date, timedelta
-from typing import Optional, List, Dict, Any
+from decimal import Decimal
+from typing import Optional, List, Dict, Any, Tuple
+import logging
 import pytz
 import numpy as np
-
-try:
-    import pvlib
-    from pvlib import solarposition
-    PVLIB_AVAILABLE = True
-except ImportError:
-    PVLIB_AVAILABLE = False
-    print("Warning: pvlib not available. Using simplified calculations.")
-
-
-try:
-    from astral import LocationInfo
-    from astral.sun import sun
-    ASTRAL_AVAILABLE = True
-except ImportError:
-    ASTRAL_AVAILABLE = False
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.config import settings
+from app.core.cache import LRUCache, quantize
+from app.core.lazy_imports import is_available, optional_import
+from app.core.time_utils import (
+    build_local_time_grid,
+    datetimes_to_unixtime,
+    format_local_iso,
+    get_timezone,
+    local_to_unixtime,
+    parse_date,
+    utc_offsets
+)
+from app.models.solar_position import SolarPositionPrecalc
+from app.services.solar_engine import (
+    PRECISION_SPA,
+    refraction_correction,
+    solar_position,
+    sun_rise_set_transit
+)
+from app.services.solar_ephemeris import PRECISION_EPHEMERIS, ephemeris_solar_position
+
+logger = logging.getLogger(__name__)
+
+# pvlib, astral and pandas are loaded on first use (see core.lazy_imports)
+PVLIB_AVAILABLE = is_available("pvlib") and is_available("pandas")
+if not PVLIB_AVAILABLE:
+    print("Warning: pvlib not available. Sunrise/sunset fallback will be limited.")
+
+ASTRAL_AVAILABLE = is_available("astral")
+if not ASTRAL_AVAILABLE:
     print("Warning: astral not available. Sunrise/sunset times may be inaccurate.")
 
 
+# In-process memoization of solar angles keyed by quantized site and time
+_solar_cache = LRUCache(
+    max_size=settings.solar_cache_size,
+    ttl_seconds=settings.solar_cache_ttl_seconds
+)
+
+# Sunrise/sunset memoization keyed by quantized site, date and timezone
+_sun_times_cache = LRUCache(
+    max_size=settings.solar_cache_size,
+    ttl_seconds=settings.solar_cache_ttl_seconds
+)
+
+
 def calculate_solar_position(
     lat: float,
     lng: float,
     date: Optional[str] = None,
     hour: Optional[int] = None,
     minute: Optional[int] = 0,
-    timezone: str = "Asia/Shanghai"
+    timezone: str = "Asia/Shanghai",
+    precision: str = PRECISION_SPA,
+    db: Optional[Session] = None,
+    include_sun_times: bool = True
 ) -> Dict[str, Any]:
     """
     Calculate solar position (altitude and azimuth angles)
@@ -42,55 +77,36 @@ def calculate_solar_position(
         hour: Hour (0-23, default: current hour)
         minute: Minute (0-59, default: 0)
         timezone: Timezone string (default: Asia/Shanghai)
+        precision: Solar engine precision tier ("spa", "noaa" or "ephemeris")
+        db: Optional database session for the pre-calculated table read-through
+        include_sun_times: Also compute sunrise/sunset/day length; callers that
+            only need the angles (e.g. shadow projection) should pass False
 
     Returns:
         Dictionary containing solar position data
     """
-    # Parse date
-    if date:
-        analysis_date = datetime.strptime(date, "%Y-%m-%d").date()
-    else:
-        analysis_date = date.today()
+    # Parse date (default: today in the requested timezone)
+    analysis_date = parse_date(date, timezone)
 
     # Set time
     if hour is None:
-        now = datetime.now(pytz.timezone(timezone))
+        now = datetime.now(get_timezone(timezone))
         hour = now.hour
         minute = now.minute
 
-    # Create datetime object
-    tz = pytz.timezone(timezone)
-    analysis_time = tz.localize(datetime.combine(analysis_date, datetime.min.time()))
-    analysis_time = analysis_time.replace(hour=hour, minute=minute)
-
-    # Convert to UTC
-    analysis_time_utc = analysis_time.astimezone(pytz.UTC)
-
-    # Calculate solar position using pvlib
-    if PVLIB_AVAILABLE:
-        solpos = solarposition.get_solarposition(
-            analysis_time_utc,
-            lat,
-            lng,
-            altitude=0,
-            pressure=101325,
-            temperature=12,
-            delta_t=67.0
-        )
+    # Resolve the local wall-clock time to a UTC instant (DST aware)
+    unixtime, utc_offset = local_to_unixtime(analysis_date, (hour * 60 + minute) * 60, timezone)
 
-        # Extract values
-        solar_altitude = float(solpos['elevation'].iloc[0])
-        solar_azimuth = float(solpos['azimuth'].iloc[0])
-        apparent_elevation = float(solpos['apparent_elevation'].iloc[0])
-    else:
-        # Simplified calculation (less accurate)
-        # This is a fallback when pvlib is not available
-        solar_altitude = _calculate_simplified_altitude(analysis_time, lat, lng)
-        solar_azimuth = _calculate_simplified_azimuth(analysis_time, lat, lng)
-        apparent_elevation = solar_altitude
+    # Look up (or compute) solar angles through the memoization layer
+    solar_altitude, solar_azimuth, apparent_elevation = _get_solar_angles(
+        lat, lng, analysis_date, hour, minute, timezone, precision, db
+    )
 
-    # Calculate sunrise/sunset times
-    sunrise_time, sunset_time, day_length = get_sunrise_sunset(lat, lng, analysis_date, timezone)
+    # Calculate sunrise/sunset times only when requested
+    if include_sun_times:
+        sunrise_time, sunset_time, day_length = get_sunrise_sunset(lat, lng, analysis_date, timezone)
+    else:
+        sunrise_time, sunset_time, day_length = None, None, None
 
     return {
         "solar_altitude": round(solar_altitude, 6),
@@ -99,15 +115,155 @@ def calculate_solar_position(
         "sunrise_time": sunrise_time,
         "sunset_time": sunset_time,
         "day_length": day_length,
-        "timestamp": analysis_time.isoformat()
+        "timestamp": format_local_iso(unixtime.reshape(1), utc_offset.reshape(1))[0]
     }
 
 
+def _get_solar_angles(
+    lat: float,
+    lng: float,
+    analysis_date: date,
+    hour: int,
+    minute: int,
+    timezone: str,
+    precision: str,
+    db: Optional[Session] = None
+) -> Tuple[float, float, float]:
+    """
+    Get solar angles for a quantized site and time, using the LRU cache
+
+    Coordinates are snapped to ``solar_cache_coord_step`` and the time of day
+    is floored to ``solar_cache_time_step_minutes`` so that near-identical
+    requests share one cache entry. The angles are computed for the quantized
+    inputs, so results never depend on which caller populated the entry.
+    On a cache miss the pre-calculated table is consulted (when a session is
+    given) before falling back to live computation.
+
+    Returns:
+        Tuple of (altitude, azimuth, apparent_elevation) in degrees
+    """
+    step = max(settings.solar_cache_time_step_minutes, 1)
+    minute_of_day = (hour * 60 + minute) // step * step
+    q_lat = quantize(lat, settings.solar_cache_coord_step)
+    q_lng = quantize(lng, settings.solar_cache_coord_step)
+
+    key = (q_lat, q_lng, analysis_date, minute_of_day, timezone, precision)
+    angles = _solar_cache.get(key)
+    if angles is not None:
+        return angles
+
+    if db is not None and _can_use_precalc(minute_of_day, timezone, precision):
+        day = get_precalculated_day(db, q_lat, q_lng, analysis_date)
+        # Warm the cache with the whole day so later hours skip the query
+        for precalc_hour, precalc_angles in day.items():
+            _solar_cache.set(
+                (q_lat, q_lng, analysis_date, precalc_hour * 60, timezone, precision),
+                precalc_angles
+            )
+        if minute_of_day // 60 in day:
+            return day[minute_of_day // 60]
+
+    unixtime, _ = local_to_unixtime(analysis_date, minute_of_day * 60, timezone)
+    solpos = _engine_position(unixtime, q_lat, q_lng, precision)
+    angles = (
+        float(solpos["altitude"]),
+        float(solpos["azimuth"]),
+        float(solpos["apparent_elevation"])
+    )
+
+    _solar_cache.set(key, angles)
+    return angles
+
+
+def _engine_position(
+    unixtime: Any,
+    lat: Any,
+    lng: Any,
+    precision: str
+) -> Dict[str, np.ndarray]:
+    """Dispatch a solar position evaluation to the engine for a precision tier"""
+    if precision == PRECISION_EPHEMERIS:
+        return ephemeris_solar_position(unixtime, lat, lng)
+    return solar_position(unixtime, lat, lng, precision=precision)
+
+
+def _can_use_precalc(minute_of_day: int, timezone: str, precision: str) -> bool:
+    """Check whether a lookup can be served by the hourly pre-calculated table"""
+    return (
+        settings.solar_precalc_enabled
+        and minute_of_day % 60 == 0
+        and timezone == settings.tz
+        and precision == PRECISION_SPA
+    )
+
+
+def get_precalculated_day(
+    db: Session,
+    lat: float,
+    lng: float,
+    analysis_date: date
+) -> Dict[int, Tuple[float, float, float]]:
+    """
+    Read one day of pre-calculated solar positions for a site
+
+    Args:
+        db: Database session
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        analysis_date: Local date (hours are in the configured timezone)
+
+    Returns:
+        Mapping of hour to (altitude, azimuth, apparent_elevation); empty if
+        the site/date has not been pre-calculated
+    """
+    try:
+        rows = db.query(
+            SolarPositionPrecalc.hour,
+            SolarPositionPrecalc.altitude_angle,
+            SolarPositionPrecalc.azimuth_angle
+        ).filter(
+            SolarPositionPrecalc.latitude == Decimal(f"{lat:.6f}"),
+            SolarPositionPrecalc.longitude == Decimal(f"{lng:.6f}"),
+            SolarPositionPrecalc.date == analysis_date
+        ).all()
+    except SQLAlchemyError as e:
+        logger.warning(f"Solar pre-calculation lookup failed: {e}")
+        db.rollback()
+        return {}
+
+    day = {}
+    for hour, altitude, azimuth in rows:
+        altitude = float(altitude)
+        apparent = altitude + float(refraction_correction(altitude))
+        day[int(hour)] = (altitude, float(azimuth), apparent)
+    return day
+
+
+def get_solar_cache_stats() -> Dict[str, Any]:
+    """
+    Get solar position cache statistics
+
+    Returns:
+        Dictionary with size, hit/miss counters and hit rate
+    """
+    stats = _solar_cache.stats()
+    stats["sun_times"] = _sun_times_cache.stats()
+    return stats
+
+
+def clear_solar_cache() -> None:
+    """Clear the solar position and sunrise/sunset caches"""
+    _solar_cache.clear()
+    _sun_times_cache.clear()
+
+
 def calculate_daily_solar_positions(
     lat: float,
     lng: float,
     date: Optional[str] = None,
-    timezone: str = "Asia/Shanghai"
+    timezone: str = "Asia/Shanghai",
+    precision: str = PRECISION_SPA,
+    db: Optional[Session] = None
 ) -> Dict[str, Any]:
     """
     Calculate solar positions for all 24 hours of a day
@@ -117,25 +273,41 @@ def calculate_daily_solar_positions(
         lng: Longitude in degrees
         date: Date string in YYYY-MM-DD format (default: today)
         timezone: Timezone string (default: Asia/Shanghai)
+        precision: Solar engine precision tier ("spa", "noaa" or "ephemeris")
+        db: Optional database session for the pre-calculated table read-through
 
     Returns:
         Dictionary containing hourly solar positions
     """
-    # Parse date
-    if date:
-        analysis_date = datetime.strptime(date, "%Y-%m-%d").date()
-    else:
-        analysis_date = date.today()
+    analysis_date = parse_date(date, timezone)
+
+    # Serve the whole day from the pre-calculated table when available
+    if db is not None and _can_use_precalc(0, timezone, precision):
+        day = get_precalculated_day(
+            db,
+            quantize(lat, settings.solar_cache_coord_step),
+            quantize(lng, settings.solar_cache_coord_step),
+            analysis_date
+        )
+        if len(day) == 24:
+            return {
+                "date": analysis_date.isoformat(),
+                "positions": [
+                    {"hour": hour, "altitude": round(day[hour][0], 6), "azimuth": round(day[hour][1], 6)}
+                    for hour in range(24)
+                ]
+            }
+
+    # Calculate all 24 hours in a single vectorized pass
+    grid = build_local_time_grid(analysis_date, analysis_date, 60, timezone)
+    batch = calculate_solar_positions_batch(lat, lng, grid["unixtime"], precision)
 
     positions = []
-
-    # Calculate for each hour
-    for hour in range(24):
-        pos = calculate_solar_position(lat, lng, date, hour, 0, timezone)
+    for i, minute_of_day in enumerate(grid["minute"]):
         positions.append({
-            "hour": hour,
-            "altitude": pos["solar_altitude"],
-            "azimuth": pos["solar_azimuth"]
+            "hour": int(minute_of_day) // 60,
+            "altitude": round(float(batch["altitude"][i]), 6),
+            "azimuth": round(float(batch["azimuth"][i]), 6)
         })
 
     return {
@@ -144,6 +316,111 @@ def calculate_daily_solar_positions(
     }
 
 
+def calculate_range_solar_positions(
+    lat: float,
+    lng: float,
+    start_date: str,
+    end_date: str,
+    step_minutes: int = 60,
+    timezone: str = "Asia/Shanghai",
+    precision: str = PRECISION_SPA
+) -> Dict[str, Any]:
+    """
+    Calculate solar positions over a date range at a fixed time step
+
+    Args:
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        start_date: First date in YYYY-MM-DD format
+        end_date: Last date in YYYY-MM-DD format (inclusive)
+        step_minutes: Sampling step in minutes
+        timezone: Timezone string (default: Asia/Shanghai)
+        precision: Solar engine precision tier ("spa", "noaa" or "ephemeris")
+
+    Returns:
+        Dictionary containing columnar timestamps, altitudes and azimuths
+    """
+    first_date = parse_date(start_date)
+    last_date = parse_date(end_date)
+
+    if last_date < first_date:
+        raise ValueError("end_date must not be earlier than start_date")
+
+    grid = build_local_time_grid(first_date, last_date, step_minutes, timezone)
+    batch = calculate_solar_positions_batch(lat, lng, grid["unixtime"], precision)
+
+    return {
+        "start_date": first_date.isoformat(),
+        "end_date": last_date.isoformat(),
+        "step_minutes": step_minutes,
+        "timestamps": format_local_iso(grid["unixtime"], grid["utc_offset"]),
+        "altitude": np.round(batch["altitude"], 6).tolist(),
+        "azimuth": np.round(batch["azimuth"], 6).tolist()
+    }
+
+
+def calculate_multi_location_positions(
+    lats: List[float],
+    lngs: List[float],
+    timestamps: List[datetime],
+    timezone: str = "Asia/Shanghai",
+    precision: str = PRECISION_SPA
+) -> Dict[str, Any]:
+    """
+    Calculate solar positions for many locations and timestamps in one call
+
+    Args:
+        lats: Latitudes in degrees
+        lngs: Longitudes in degrees (same length as lats)
+        timestamps: Datetimes; naive values are interpreted in ``timezone``
+        timezone: Timezone string (default: Asia/Shanghai)
+        precision: Solar engine precision tier ("spa", "noaa" or "ephemeris")
+
+    Returns:
+        Dictionary with ISO timestamps and (points x timestamps) altitude and
+        azimuth arrays
+    """
+    unixtime = datetimes_to_unixtime(timestamps, timezone)
+
+    # Locations as a column, times as a row: one broadcasted engine call
+    lat_col = np.asarray(lats, dtype=float)[:, None]
+    lng_col = np.asarray(lngs, dtype=float)[:, None]
+    solpos = _engine_position(unixtime[None, :], lat_col, lng_col, precision)
+
+    return {
+        "timestamps": format_local_iso(unixtime, utc_offsets(unixtime, timezone)),
+        "altitude": np.round(solpos["altitude"], 6).tolist(),
+        "azimuth": np.round(solpos["azimuth"], 6).tolist()
+    }
+
+
+def calculate_solar_positions_batch(
+    lat: float,
+    lng: float,
+    unixtime: np.ndarray,
+    precision: str = PRECISION_SPA
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate solar positions for a whole timeline in one vectorized pass
+
+    Args:
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        unixtime: Seconds since 1970-01-01 UTC (see core.time_utils)
+        precision: Solar engine precision tier ("spa", "noaa" or "ephemeris")
+
+    Returns:
+        Dictionary of columnar arrays (altitude, azimuth, apparent_elevation)
+    """
+    solpos = _engine_position(unixtime, lat, lng, precision)
+
+    return {
+        "altitude": solpos["altitude"],
+        "azimuth": solpos["azimuth"],
+        "apparent_elevation": solpos["apparent_elevation"]
+    }
+
+
 def get_sunrise_sunset(
     lat: float,
     lng: float,
@@ -163,13 +440,81 @@ def get_sunrise_sunset(
         Tuple of (sunrise_time, sunset_time, day_length_hours)
     """
     if date is None:
-        date = date.today()
+        date = parse_date(None, timezone)
+
+    key = (
+        quantize(lat, settings.solar_cache_coord_step),
+        quantize(lng, settings.solar_cache_coord_step),
+        date,
+        timezone
+    )
+    sun_times = _sun_times_cache.get(key)
+    if sun_times is None:
+        sun_times = _compute_sunrise_sunset(key[0], key[1], date, timezone)
+        _sun_times_cache.set(key, sun_times)
+
+    return sun_times
+
+
+def calculate_yearly_sunrise_sunset(
+    lat: float,
+    lng: float,
+    year: int,
+    timezone: str = "Asia/Shanghai"
+) -> Dict[str, Any]:
+    """
+    Calculate sunrise/sunset for every day of a year in one vectorized pass
+
+    Args:
+        lat: Latitude in degrees
+        lng: Longitude in degrees
+        year: Calendar year
+        timezone: Timezone string (default: Asia/Shanghai)
+
+    Returns:
+        Dictionary of columnar dates, sunrise/sunset local times and day
+        lengths in hours (None on polar day/night)
+    """
+    dates = np.arange(np.datetime64(f"{year:04d}-01-01"), np.datetime64(f"{year + 1:04d}-01-01"))
+    day_unixtime = (dates - np.datetime64("1970-01-01", "D")).astype(np.int64) * 86400.0
+
+    events = sun_rise_set_transit(day_unixtime, lat, lng)
+    sunrise = events["sunrise"]
+    sunset = events["sunset"]
+    valid = ~(np.isnan(sunrise) | np.isnan(sunset))
+
+    def to_local_strings(unixtime: np.ndarray) -> List[Optional[str]]:
+        safe = np.where(valid, unixtime, 0)
+        seconds = (np.floor(safe).astype(np.int64) + utc_offsets(safe, timezone)) % 86400
+        return [
+            f"{s // 3600:02d}:{s % 3600 // 60:02d}:{s % 60:02d}" if ok else None
+            for s, ok in zip(seconds.tolist(), valid)
+        ]
+
+    day_length = np.round((sunset - sunrise) / 3600.0, 2)
+
+    return {
+        "year": year,
+        "dates": np.datetime_as_string(dates).tolist(),
+        "sunrise": to_local_strings(sunrise),
+        "sunset": to_local_strings(sunset),
+        "day_length": [float(v) if ok else None for v, ok in zip(day_length, valid)]
+    }
+
 
+def _compute_sunrise_sunset(
+    lat: float,
+    lng: float,
+    date: date,
+    timezone: str
+) -> tuple[Optional[str], Optional[str], Optional[float]]:
+    """Compute sunrise and sunset times without caching"""
     if ASTRAL_AVAILABLE:
         try:
             # Use astral for accurate sunrise/sunset
-            location = LocationInfo(latitude=lat, longitude=lng)
-            s = sun(location.observer, date=date, tzinfo=timezone)
+            astral = optional_import("astral")
+            astral_sun = optional_import("astral.sun")
+            s = astral_sun.sun(astral.Observer(latitude=lat, longitude=lng), date=date, tzinfo=timezone)
 
             sunrise = s["sunrise"].strftime("%H:%M:%S")
             sunset = s["sunset"].strftime("%H:%M:%S")
@@ -184,13 +529,15 @@ def get_sunrise_sunset(
     # Fallback to pvlib or simplified calculation
     try:
         if PVLIB_AVAILABLE:
-            tz = pytz.timezone(timezone)
+            pd = optional_import("pandas")
+            solarposition = optional_import("pvlib.solarposition")
+            tz = get_timezone(timezone)
             # Calculate for the entire day
             times = tz.localize(datetime.combine(date, datetime.min.time())) + timedelta(hours=12)
             times_utc = times.astimezone(pytz.UTC)
 
-            solpos = solarposition.get_sun_rise_set_transit(
-                times_utc,
+            solpos = solarposition.sun_rise_set_transit_spa(
+                pd.DatetimeIndex([times_utc]),
                 lat,
                 lng
             )
@@ -212,102 +559,3 @@ def get_sunrise_sunset(
 
     # Ultimate fallback
     return None, None, None
-
-
-def _calculate_simplified_altitude(dt: datetime, lat: float, lng: float) -> float:
-    """
-    Simplified solar altitude calculation (fallback)
-
-    Args:
-        dt: Datetime object
-        lat: Latitude
-        lng: Longitude
-
-    Returns:
-        Solar altitude angle in degrees
-    """
-    # This is a very simplified approximation
-    # For accurate results, use pvlib
-
-    # Day of year
-    day_of_year = dt.timetuple().tm_yday
-
-    # Declination angle (approximate)
-    declination = 23.45 * np.sin(np.radians(360 / 365 * (day_of_year - 81)))
-
-    # Hour angle
-    hour_angle = 15 * (dt.hour - 12)
-
-    # Latitude in radians
-    lat_rad = np.radians(lat)
-    dec_rad = np.radians(declination)
-    hour_rad = np.radians(hour_angle)
-
-    # Altitude angle
-    altitude = np.arcsin(
-        np.sin(lat_rad) * np.sin(dec_rad) +
-        np.cos(lat_rad) * np.cos(dec_rad) * np.cos(hour_rad)
-    )
-
-    return np.degrees(altitude)
-
-
-def _calculate_simplified_azimuth(dt: datetime, lat: float, lng: float) -> float:
-    """
-    Simplified solar azimuth calculation (fallback)
-
-    Args:
-        dt: Datetime object
-        lat: Latitude
-        lng: Longitude
-
-    Returns:
-        Solar azimuth angle in degrees
-    """
-    # This is a very simplified approximation
-    # For accurate results, use pvlib
-
-    # Day of year
-    day_of_year = dt.timetuple().tm_yday
-
-    # Declination angle
-    declination = 23.45 * np.sin(np.radians(360 / 365 * (day_of_year - 81)))
-
-    # Hour angle
-    hour_angle = 15 * (dt.hour - 12)
-
-    # Get altitude first
-    altitude = _calculate_simplified_altitude(dt, lat, lng)
-    altitude_rad = np.radians(altitude)
-
-    # Calculate azimuth
-    lat_rad = np.radians(lat)
-    dec_rad = np.radians(declination)
-    hour_rad = np.radians(hour_angle)
-
-    if np.cos(altitude_rad) == 0:
-        return 180.0
-
-    azimuth = np.arcsin(
-        -np.sin(hour_rad) * np.cos(dec_rad) / np.cos(altitude_rad)
-    )
-
-    azimuth_deg = np.degrees(azimuth)
-
-    # Adjust quadrant
-    if hour_angle > 0:
-        azimuth_deg = 360 - azimuth_deg
-
-    return azimuth_deg
-
-
-# Import pandas for pvlib operations
-try:
-    import pandas as pd
-except ImportError:
-    # Create a dummy pd.notna if pandas not available
-    class DummyPd:
-        @staticmethod
-        def notna(val):
-            return val is not None
-    pd = DummyPd()
@@ -0,0 +1,303 @@
+"""
+Spatial Building Queries and Indexes
+"""
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import shapely
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.building import Building
+
+
+def query_buildings_in_bbox(
+    db: Session,
+    bounds: Tuple[float, float, float, float]
+) -> List[Building]:
+    """
+    Load all buildings whose footprint MBR intersects a bounding box
+
+    Runs a single spatial-index query (MBRIntersects on the footprint).
+
+    Args:
+        db: Database session
+        bounds: (min_lng, min_lat, max_lng, max_lat) in degrees
+
+    Returns:
+        List of Building rows
+    """
+    min_lng, min_lat, max_lng, max_lat = bounds
+
+    # MySQL spatial functions use (lat, lng) axis order for SRID 4326
+    envelope = (
+        f"POLYGON(({min_lat} {min_lng}, {min_lat} {max_lng}, {max_lat} {max_lng}, "
+        f"{max_lat} {min_lng}, {min_lat} {min_lng}))"
+    )
+
+    return db.query(Building).filter(
+        text("MBRIntersects(footprint, ST_GeomFromText(:envelope, 4326))")
+    ).params(envelope=envelope).all()
+
+
+class BuildingIndex:
+    """
+    Extruded building footprints in a local metric plane, indexed for ray casting
+
+    Footprints are kept in an STRtree and their ring edges in flat arrays
+    grouped by building, so rays are tested against all candidate edges in
+    one vectorized pass.
+    """
+
+    def __init__(
+        self,
+        building_ids: Sequence[str],
+        footprints: Sequence["shapely.Polygon"],
+        heights: Sequence[float]
+    ):
+        """
+        Args:
+            building_ids: Building IDs
+            footprints: Footprint Polygons in local meters (x east, y north)
+            heights: Building heights in meters
+        """
+        if not (len(building_ids) == len(footprints) == len(heights)):
+            raise ValueError("building_ids, footprints and heights must have the same length")
+
+        self.building_ids = list(building_ids)
+        self.footprints = np.array(footprints, dtype=object)
+        self.heights = np.asarray(heights, dtype=float)
+        self.tree = shapely.STRtree(self.footprints)
+
+        # Ring edges, grouped by building: edges of building i are
+        # edge_start[edge_offsets[i]:edge_offsets[i + 1]]
+        rings, ring_owner = shapely.get_rings(self.footprints, return_index=True)
+        coords, coord_ring = shapely.get_coordinates(rings, return_index=True)
+        same_ring = coord_ring[:-1] == coord_ring[1:]
+        self.edge_start = coords[:-1][same_ring]
+        self.edge_end = coords[1:][same_ring]
+        edge_building = ring_owner[coord_ring[:-1][same_ring]]
+        self.edge_offsets = np.concatenate([[0], np.cumsum(np.bincount(edge_building, minlength=len(self.footprints)))])
+
+    @classmethod
+    def from_buildings(cls, buildings: Sequence[Building], projection) -> "BuildingIndex":
+        """
+        Build an index from Building rows
+
+        Args:
+            buildings: Building rows
+            projection: LocalProjection of the site
+
+        Returns:
+            BuildingIndex with footprints projected to local meters
+        """
+        from geoalchemy2.shape import to_shape
+
+        footprints = np.array([to_shape(building.footprint) for building in buildings], dtype=object)
+        return cls(
+            [building.id for building in buildings],
+            projection.to_local(footprints),
+            [float(building.total_height) for building in buildings]
+        )
+
+    def __len__(self) -> int:
+        return len(self.building_ids)
+
+    def __reduce__(self):
+        # Rebuild the tree when unpickled (e.g. in process pool workers)
+        return (BuildingIndex, (self.building_ids, self.footprints, self.heights))
+
+    def within_shadow_reach(self, geometry: "shapely.Geometry", min_solar_altitude: float) -> np.ndarray:
+        """
+        Select the buildings whose shadow can reach a geometry
+
+        Args:
+            geometry: Geometry in local meters
+            min_solar_altitude: Lowest solar altitude considered, in degrees (> 0)
+
+        Returns:
+            Sorted building indices
+        """
+        if not len(self) or min_solar_altitude <= 0:
+            return np.array([], dtype=np.int64)
+
+        reach = self.heights / np.tan(np.radians(min_solar_altitude))
+        candidates = self.tree.query(geometry, predicate="dwithin", distance=float(reach.max()))
+        within = shapely.distance(geometry, self.footprints[candidates]) <= reach[candidates]
+        return np.sort(candidates[within])
+
+    def cast_sun_rays(
+        self,
+        origin: Tuple[float, float],
+        solar_altitudes: np.ndarray,
+        solar_azimuths: np.ndarray,
+        origin_height: float = 0.0
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the first building blocking each ray from a point towards the sun
+
+        A ray climbs with tan(altitude), so it is blocked by a building when
+        it is still below the roof where it first enters the footprint.
+
+        Args:
+            origin: (x, y) of the point in local meters
+            solar_altitudes: Solar altitude per ray in degrees
+            solar_azimuths: Solar azimuth per ray in degrees (clockwise from north)
+            origin_height: Height of the point above ground in meters
+
+        Returns:
+            Tuple of (index of the blocking building or -1 per ray, horizontal
+            distance to it in meters or inf); rays with the sun at or below
+            the horizon are reported as unblocked
+        """
+        altitudes = np.asarray(solar_altitudes, dtype=float)
+        return self.cast_rays(
+            np.broadcast_to(np.asarray(origin, dtype=float), (len(altitudes), 2)),
+            np.full(len(altitudes), float(origin_height)),
+            altitudes,
+            solar_azimuths
+        )
+
+    def cast_rays(
+        self,
+        origins: np.ndarray,
+        origin_heights: np.ndarray,
+        solar_altitudes: np.ndarray,
+        solar_azimuths: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the first building blocking each of a batch of sun rays
+
+        Every ray has its own origin, height and sun position, so rays from
+        many points and times are tested in one vectorized pass.
+
+        Args:
+            origins: (x, y) of each ray origin in local meters, shape (n, 2)
+            origin_heights: Height of each ray origin above ground in meters
+            solar_altitudes: Solar altitude per ray in degrees
+            solar_azimuths: Solar azimuth per ray in degrees (clockwise from north)
+
+        Returns:
+            Tuple of (index of the blocking building or -1 per ray, horizontal
+            distance to it in meters or inf); rays with the sun at or below
+            the horizon are reported as unblocked
+        """
+        origins = np.asarray(origins, dtype=float).reshape(-1, 2)
+        origin_heights = np.asarray(origin_heights, dtype=float)
+        altitudes = np.asarray(solar_altitudes, dtype=float)
+        azimuths = np.radians(np.asarray(solar_azimuths, dtype=float))
+        blocker = np.full(len(altitudes), -1, dtype=np.int64)
+        distance = np.full(len(altitudes), np.inf)
+        if not len(self):
+            return blocker, distance
+
+        # Rays starting above the tallest roof cannot be blocked
+        rays = np.flatnonzero((altitudes > 0) & (origin_heights < self.heights.max()))
+        if not len(rays):
+            return blocker, distance
+
+        origin = origins[rays]
+        direction = np.column_stack([np.sin(azimuths[rays]), np.cos(azimuths[rays])])
+        slope = np.tan(np.radians(altitudes[rays]))
+        heights = origin_heights[rays]
+
+        # Beyond this distance the ray is above the tallest roof
+        reach = (self.heights.max() - heights) / slope
+        segments = shapely.linestrings(np.stack([origin, origin + direction * reach[:, None]], axis=1))
+        ray_index, building = self.tree.query(segments, predicate="intersects")
+        if not len(ray_index):
+            return blocker, distance
+
+        entry = self._entry_distances(origin[ray_index], direction[ray_index], building)
+
+        blocked = heights[ray_index] + entry * slope[ray_index] < self.heights[building]
+        if not blocked.any():
+            return blocker, distance
+
+        order = np.lexsort((entry[blocked], ray_index[blocked]))
+        blocked_rays = ray_index[blocked][order]
+        first = np.r_[True, blocked_rays[1:] != blocked_rays[:-1]]
+
+        blocker[rays[blocked_rays[first]]] = building[blocked][order][first]
+        distance[rays[blocked_rays[first]]] = entry[blocked][order][first]
+        return blocker, distance
+
+    def occludes(
+        self,
+        origin: Tuple[float, float],
+        origin_height: float,
+        solar_altitudes: np.ndarray,
+        solar_azimuths: np.ndarray,
+        buildings: np.ndarray
+    ) -> np.ndarray:
+        """
+        Test whether given buildings block the sun as seen from a point
+
+        Each sun position is tested against its own building only, so one
+        call can evaluate any mix of (building, time) pairs.
+
+        Args:
+            origin: (x, y) of the point in local meters
+            origin_height: Height of the point above ground in meters
+            solar_altitudes: Solar altitude per pair in degrees
+            solar_azimuths: Solar azimuth per pair in degrees (clockwise from north)
+            buildings: Building index per pair
+
+        Returns:
+            Boolean array, True where the building blocks the sun
+        """
+        altitudes, azimuths, buildings = np.broadcast_arrays(
+            np.asarray(solar_altitudes, dtype=float),
+            np.radians(np.asarray(solar_azimuths, dtype=float)),
+            np.asarray(buildings, dtype=np.int64)
+        )
+        altitudes, azimuths, buildings = altitudes.ravel(), azimuths.ravel(), buildings.ravel()
+        if not len(buildings):
+            return np.zeros(0, dtype=bool)
+
+        origins = np.broadcast_to(np.asarray(origin, dtype=float), (len(buildings), 2))
+        direction = np.column_stack([np.sin(azimuths), np.cos(azimuths)])
+        entry = self._entry_distances(origins, direction, buildings)
+
+        with np.errstate(invalid="ignore"):
+            rise = entry * np.tan(np.radians(np.clip(altitudes, 0.0, 90.0)))
+        return (altitudes > 0) & (origin_height + rise < self.heights[buildings])
+
+    def _entry_distances(
+        self,
+        origins: np.ndarray,
+        directions: np.ndarray,
+        buildings: np.ndarray
+    ) -> np.ndarray:
+        """
+        Horizontal distance at which each ray first enters a building footprint
+
+        Args:
+            origins: (x, y) ray origins, shape (n, 2)
+            directions: Unit ray directions, shape (n, 2)
+            buildings: Building index per ray
+
+        Returns:
+            Distance per ray; 0 when the origin is inside the footprint and
+            inf when the ray misses it
+        """
+        # Expand (ray, building) pairs to (ray, edge) pairs
+        edge_counts = np.diff(self.edge_offsets)[buildings]
+        pair = np.repeat(np.arange(len(buildings)), edge_counts)
+        edge = self.edge_offsets[buildings][pair] + np.arange(len(pair)) - np.repeat(np.cumsum(edge_counts) - edge_counts, edge_counts)
+
+        # Ray origin + t * d meets edge a + u * (b - a)
+        d = directions[pair]
+        a = self.edge_start[edge]
+        e = self.edge_end[edge] - a
+        w = a - origins[pair]
+        denom = d[:, 0] * e[:, 1] - d[:, 1] * e[:, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (w[:, 0] * e[:, 1] - w[:, 1] * e[:, 0]) / denom
+            u = (w[:, 0] * d[:, 1] - w[:, 1] * d[:, 0]) / denom
+        hit = (denom != 0) & (t >= 0) & (u >= 0) & (u <= 1)
+
+        entry = np.full(len(buildings), np.inf)
+        np.minimum.at(entry, pair[hit], t[hit])
+        entry[shapely.contains_xy(self.footprints[buildings], origins[:, 0], origins[:, 1])] = 0.0
+        return entry
@@ -0,0 +1,249 @@
+"""
+Event-Driven Sunlight Intervals
+
+Solves the sunlit intervals of a point for one day as events on the sun
+path instead of fixed samples. The sun path is sampled coarsely, with extra
+samples where the sun's azimuth passes the directions in which a candidate
+occluder rises highest (its vertices and the feet of its edges). Every
+change of occlusion state between samples, per occluder and for the horizon,
+is then bracketed and bisected down to the time tolerance.
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from shapely.geometry import Point
+
+from app.config import settings
+from app.core.time_utils import format_local_iso, local_to_unixtime
+from app.services.solar_service import calculate_solar_positions_batch
+from app.services.spatial_index import BuildingIndex
+
+
+def solve_sunlit_intervals(
+    index: BuildingIndex,
+    origin: Tuple[float, float],
+    lat: float,
+    lng: float,
+    analysis_date: date,
+    origin_height: float = 0.0,
+    start_seconds: float = 0.0,
+    end_seconds: float = 86400.0,
+    coarse_minutes: Optional[float] = None,
+    tolerance_seconds: Optional[float] = None,
+    timezone: str = "Asia/Shanghai"
+) -> Dict[str, Any]:
+    """
+    Find the sunlit intervals of a point within a window of a day
+
+    Args:
+        index: Surrounding buildings (local meters)
+        origin: (x, y) of the point in local meters
+        lat: Latitude of the point
+        lng: Longitude of the point
+        analysis_date: Local date
+        origin_height: Height of the point above ground in meters
+        start_seconds: Window start, seconds after local midnight
+        end_seconds: Window end, seconds after local midnight
+        coarse_minutes: Spacing of the coarse sun-path samples
+            (default: sunlight_event_coarse_minutes)
+        tolerance_seconds: Accuracy of the interval boundaries
+            (default: sunlight_event_tolerance_seconds)
+        timezone: Timezone string (default: Asia/Shanghai)
+
+    Returns:
+        Dictionary with "intervals" (list of (start, end) seconds after local
+        midnight, sunlit in between), "blocked_by" (per interval, the index of
+        the building that ends it, or -1 when the horizon or the end of the
+        window does) and "evaluations" (number of sun positions computed)
+    """
+    if end_seconds <= start_seconds:
+        raise ValueError("end_seconds must be greater than start_seconds")
+
+    coarse = (coarse_minutes or settings.sunlight_event_coarse_minutes) * 60.0
+    tolerance = tolerance_seconds or settings.sunlight_event_tolerance_seconds
+    solver = _Solver(index, origin, origin_height, lat, lng, analysis_date, timezone)
+
+    times = np.unique(np.r_[np.arange(start_seconds, end_seconds, coarse), end_seconds])
+    altitudes, azimuths = solver.sun(times)
+
+    # Only buildings taller than the point whose shadow can reach it can
+    # block it; the sun is lowest at an end of the window, which is sampled
+    candidates = np.array([], dtype=np.int64)
+    if len(index) and (altitudes > 0).any():
+        lowest = max(altitudes[altitudes > 0].min(), settings.shadow_min_sun_altitude)
+        candidates = index.within_shadow_reach(Point(origin), lowest)
+        candidates = candidates[index.heights[candidates] > origin_height]
+    crossings = np.setdiff1d(_azimuth_crossings(index, origin, candidates, times, altitudes, azimuths), times)
+    if len(crossings):
+        crossing_altitudes, crossing_azimuths = solver.sun(crossings)
+        order = np.argsort(np.r_[times, crossings])
+        times = np.r_[times, crossings][order]
+        altitudes = np.r_[altitudes, crossing_altitudes][order]
+        azimuths = np.r_[azimuths, crossing_azimuths][order]
+
+    # Occlusion state per row (candidate buildings, then the horizon) and time
+    state = np.vstack([
+        solver.occluded(candidates, altitudes, azimuths),
+        altitudes[None, :] <= 0
+    ])
+    rows = np.r_[candidates, -1]
+
+    # Bisect every state change between neighbouring samples
+    row, step = np.nonzero(state[:, 1:] != state[:, :-1])
+    low = times[step]
+    high = times[step + 1]
+    low_state = state[row, step]
+    bracket_rows = rows[row]
+    while len(low) and (high - low).max() > tolerance:
+        middle = (low + high) / 2
+        mid_altitudes, mid_azimuths = solver.sun(middle)
+        mid_state = mid_altitudes <= 0
+        building = bracket_rows >= 0
+        mid_state[building] = solver.occluded_pairs(
+            bracket_rows[building], mid_altitudes[building], mid_azimuths[building]
+        )
+        same = mid_state == low_state
+        low = np.where(same, middle, low)
+        high = np.where(same, high, middle)
+
+    # Between consecutive events the state is constant; test each segment once
+    events = np.unique(np.r_[start_seconds, (low + high) / 2, end_seconds])
+    middle = (events[:-1] + events[1:]) / 2
+    mid_altitudes, mid_azimuths = solver.sun(middle)
+    segment_state = np.vstack([
+        solver.occluded(candidates, mid_altitudes, mid_azimuths),
+        mid_altitudes[None, :] <= 0
+    ])
+    sunlit = ~segment_state.any(axis=0)
+
+    # First blocker of each segment (buildings before the horizon)
+    blocker = np.where(segment_state.any(axis=0), rows[np.argmax(segment_state, axis=0)], -1)
+
+    # Merge sunlit segments; each interval is ended by the next segment's blocker
+    intervals = []
+    last_segments = []
+    for segment in np.flatnonzero(sunlit):
+        if intervals and intervals[-1][1] == events[segment]:
+            intervals[-1][1] = events[segment + 1]
+            last_segments[-1] = segment
+        else:
+            intervals.append([events[segment], events[segment + 1]])
+            last_segments.append(segment)
+    blocked_by = [int(blocker[segment + 1]) if segment + 1 < len(blocker) else -1 for segment in last_segments]
+
+    return {
+        "intervals": [(float(start), float(end)) for start, end in intervals],
+        "blocked_by": blocked_by,
+        "evaluations": solver.evaluations
+    }
+
+
+def summarize_intervals(
+    intervals: List[Tuple[float, float]],
+    analysis_date: date,
+    timezone: str = "Asia/Shanghai"
+) -> Dict[str, Any]:
+    """
+    Describe sunlit intervals with local timestamps and totals
+
+    Args:
+        intervals: (start, end) seconds after local midnight
+        analysis_date: Local date
+        timezone: Timezone string (default: Asia/Shanghai)
+
+    Returns:
+        Dictionary with total and longest continuous sunlight in hours and
+        the intervals as local ISO start/end times with minutes
+    """
+    bounds = np.asarray(intervals, dtype=float).reshape(-1, 2)
+    unixtime, offsets = local_to_unixtime(analysis_date, np.round(bounds.ravel()), timezone)
+    stamps = format_local_iso(unixtime, offsets)
+    minutes = (bounds[:, 1] - bounds[:, 0]) / 60.0
+
+    return {
+        "sunlight_hours": round(float(minutes.sum()) / 60.0, 3),
+        "longest_continuous_hours": round(float(minutes.max()) / 60.0, 3) if len(minutes) else 0.0,
+        "intervals": [
+            {"start": stamps[2 * i], "end": stamps[2 * i + 1], "minutes": round(float(minutes[i]), 2)}
+            for i in range(len(minutes))
+        ]
+    }
+
+
+class _Solver:
+    """Sun positions and occlusion tests for one point and day"""
+
+    def __init__(self, index, origin, origin_height, lat, lng, analysis_date, timezone):
+        self.index = index
+        self.origin = origin
+        self.origin_height = origin_height
+        self.lat = lat
+        self.lng = lng
+        self.analysis_date = analysis_date
+        self.timezone = timezone
+        self.evaluations = 0
+
+    def sun(self, seconds: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Solar altitude and azimuth at seconds after local midnight"""
+        unixtime, _ = local_to_unixtime(self.analysis_date, seconds, self.timezone)
+        sun = calculate_solar_positions_batch(self.lat, self.lng, unixtime)
+        self.evaluations += len(seconds)
+        return sun["altitude"], sun["azimuth"]
+
+    def occluded(self, buildings: np.ndarray, altitudes: np.ndarray, azimuths: np.ndarray) -> np.ndarray:
+        """Occlusion of every sun position by every building, shape (buildings, times)"""
+        if not len(buildings):
+            return np.zeros((0, len(altitudes)), dtype=bool)
+        return self.occluded_pairs(
+            np.repeat(buildings, len(altitudes)),
+            np.tile(altitudes, len(buildings)),
+            np.tile(azimuths, len(buildings))
+        ).reshape(len(buildings), len(altitudes))
+
+    def occluded_pairs(self, buildings: np.ndarray, altitudes: np.ndarray, azimuths: np.ndarray) -> np.ndarray:
+        """Occlusion of each sun position by its own building"""
+        return self.index.occludes(self.origin, self.origin_height, altitudes, azimuths, buildings)
+
+
+def _azimuth_crossings(
+    index: BuildingIndex,
+    origin: Tuple[float, float],
+    buildings: np.ndarray,
+    times: np.ndarray,
+    altitudes: np.ndarray,
+    azimuths: np.ndarray
+) -> np.ndarray:
+    """
+    Daytime times at which the sun's azimuth passes a candidate's key directions
+
+    Key directions are the building's vertices and the feet of the
+    perpendiculars from the point to its edges, where its skyline peaks.
+    Times are interpolated linearly between the coarse samples.
+    """
+    if not len(buildings) or len(times) < 2:
+        return np.array([])
+
+    edge = np.concatenate([np.arange(index.edge_offsets[b], index.edge_offsets[b + 1]) for b in buildings])
+    start = index.edge_start[edge] - origin
+    vector = index.edge_end[edge] - index.edge_start[edge]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        along = -(start * vector).sum(axis=1) / (vector * vector).sum(axis=1)
+    foot = start + vector * along[:, None]
+    points = np.vstack([start, foot[(along > 0) & (along < 1)]])
+    directions = np.degrees(np.arctan2(points[:, 0], points[:, 1])) % 360.0
+
+    # Unwrapped sun azimuth is monotonic between samples for the crossing test
+    path = np.degrees(np.unwrap(np.radians(azimuths)))
+    low = np.minimum(path[:-1], path[1:])
+    high = np.maximum(path[:-1], path[1:])
+    # Steps entirely below the horizon cannot cross an occluder
+    night = (altitudes[:-1] <= 0) & (altitudes[1:] <= 0)
+    high[night] = low[night]
+    crossings = []
+    for turn in range(int(np.floor(path.min() / 360.0)), int(np.floor(path.max() / 360.0)) + 1):
+        target = directions + 360.0 * turn
+        step, direction = np.nonzero((low[:, None] <= target[None, :]) & (target[None, :] < high[:, None]))
+        fraction = (target[direction] - path[step]) / (path[step + 1] - path[step])
+        crossings.append(times[step] + fraction * (times[step + 1] - times[step]))
+    return np.concatenate(crossings) if crossings else np.array([])
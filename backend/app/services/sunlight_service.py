@@ -0,0 +1,282 @@
+"""
+Grid and Facade Sunlight Analysis
+
+Sunlight duration for every sample point of a regular grid over a site. A
+point is in the sun when it lies outside every building's shadow, which is
+exactly the test of its sun ray against the extruded footprints, so the grid
+is evaluated with the shadow raster engine. All tiles share one
+BuildingIndex and one array of sun vectors; tiles are processed in-process
+unless more workers are configured.
+
+Facade sample points sit on the walls of a building, one row per floor.
+Their sun rays are cast in one batch after dropping the rays of walls that
+face away from the sun.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+from shapely.geometry.polygon import orient
+
+from app.config import settings
+from app.services.shadow_raster import rasterize_shadow_minutes
+from app.services.spatial_index import BuildingIndex
+
+# Shared state of pool workers, set once per process by _init_worker
+_worker_state = {}
+
+# Facade points sit this far (meters) outside their wall so that rays leaving
+# the wall do not start on the building's own edge
+FACADE_POINT_OFFSET = 0.05
+
+# Sun rays cast per vectorized batch of facade sunlight
+FACADE_RAY_BATCH = 200000
+
+
+def sample_grid(
+    area: "shapely.Polygon",
+    spacing: float
+) -> Tuple[Tuple[float, float, float, float], np.ndarray]:
+    """
+    Lay a grid of sample points over an area
+
+    Points sit at the cell centers of a grid aligned to the area's bounding
+    box; only points inside the area are sampled.
+
+    Args:
+        area: Analysis area in local meters
+        spacing: Distance between points in meters
+
+    Returns:
+        Tuple of (grid bounds (min_x, min_y, max_x, max_y), boolean mask of
+        shape (rows, cols) marking the points inside the area; row 0 is the
+        southernmost row)
+    """
+    if spacing <= 0:
+        raise ValueError("spacing must be positive")
+
+    min_x, min_y, max_x, max_y = area.bounds
+    cols = max(int(np.ceil((max_x - min_x) / spacing)), 1)
+    rows = max(int(np.ceil((max_y - min_y) / spacing)), 1)
+    x, y = np.meshgrid(min_x + (np.arange(cols) + 0.5) * spacing, min_y + (np.arange(rows) + 0.5) * spacing)
+
+    shapely.prepare(area)
+    inside = shapely.contains_xy(area, x, y)
+    return (min_x, min_y, min_x + cols * spacing, min_y + rows * spacing), inside
+
+
+def calculate_grid_sunlight(
+    index: BuildingIndex,
+    bounds: Tuple[float, float, float, float],
+    spacing: float,
+    solar_altitudes: np.ndarray,
+    solar_azimuths: np.ndarray,
+    step_minutes: float,
+    tile_size: Optional[int] = None,
+    workers: Optional[int] = None
+) -> np.ndarray:
+    """
+    Calculate sunlit minutes at every cell center of a grid
+
+    Args:
+        index: Buildings around the grid (local meters)
+        bounds: (min_x, min_y, max_x, max_y) of the grid in local meters
+        spacing: Cell size in meters
+        solar_altitudes: Solar altitude per time step in degrees (> 0)
+        solar_azimuths: Solar azimuth per time step in degrees
+        step_minutes: Minutes represented by each time step
+        tile_size: Tile edge in cells (default: grid_sunlight_tile_size)
+        workers: Worker processes (default: grid_sunlight_workers, 1 = in-process,
+            0 = CPU count); each request then starts its own pool
+
+    Returns:
+        Array of shape (rows, cols) with sunlit minutes; row 0 is the
+        southernmost row
+    """
+    tile_size = tile_size or settings.grid_sunlight_tile_size
+    min_x, min_y, max_x, max_y = bounds
+    cols = max(int(round((max_x - min_x) / spacing)), 1)
+    rows = max(int(round((max_y - min_y) / spacing)), 1)
+
+    altitudes = np.asarray(solar_altitudes, dtype=float)
+    daylight_minutes = len(altitudes) * step_minutes
+    sunlit = np.full((rows, cols), float(daylight_minutes))
+    if not len(altitudes) or not len(index):
+        return sunlit
+
+    tiles = _split_tiles(rows, cols, tile_size)
+    if workers is None:
+        workers = settings.grid_sunlight_workers
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(tiles))
+
+    tile_bounds = [
+        (min_x + c0 * spacing, min_y + r0 * spacing, min_x + c1 * spacing, min_y + r1 * spacing)
+        for r0, r1, c0, c1 in tiles
+    ]
+    shared = (index, altitudes, np.asarray(solar_azimuths, dtype=float), spacing, step_minutes)
+
+    if workers <= 1:
+        _init_worker(*shared)
+        results = [_shaded_minutes(tile) for tile in tile_bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=shared) as pool:
+            results = list(pool.map(_shaded_minutes, tile_bounds))
+
+    for (r0, r1, c0, c1), shaded in zip(tiles, results):
+        sunlit[r0:r1, c0:c1] -= shaded
+    return sunlit
+
+
+def generate_facade_points(
+    footprint: "shapely.Polygon",
+    height: float,
+    floor_count: Optional[int] = None,
+    spacing: Optional[float] = None
+) -> Dict[str, np.ndarray]:
+    """
+    Generate sample points on every wall of a building
+
+    Each ring edge of the footprint is a facade (courtyard walls included).
+    Points are spread along each facade at about the given spacing and
+    repeated at mid-height of every floor.
+
+    Args:
+        footprint: Building footprint in local meters
+        height: Building height in meters
+        floor_count: Number of floors (default: height / facade_default_floor_height_m)
+        spacing: Distance between points along a facade in meters
+            (default: facade_sample_spacing_m)
+
+    Returns:
+        Dict of per-point arrays "xy" (n, 2), "z", "normal" (n, 2, outward
+        unit vector), "facade" and "floor" (0-based), and per-facade arrays
+        "facade_azimuth" (direction the facade faces, degrees clockwise from
+        north) and "facade_length" (meters)
+    """
+    spacing = spacing or settings.facade_sample_spacing_m
+    if spacing <= 0:
+        raise ValueError("spacing must be positive")
+    if not floor_count or floor_count < 1:
+        floor_count = max(int(round(height / settings.facade_default_floor_height_m)), 1)
+
+    # Counter-clockwise shells and clockwise holes: the outward normal of
+    # every edge lies to its right
+    oriented = orient(footprint, sign=1.0)
+    coords, ring = shapely.get_coordinates(shapely.get_rings(oriented), return_index=True)
+    same_ring = ring[:-1] == ring[1:]
+    start = coords[:-1][same_ring]
+    vector = coords[1:][same_ring] - start
+    length = np.hypot(vector[:, 0], vector[:, 1])
+    start, vector, length = start[length > 0], vector[length > 0], length[length > 0]
+    normal = np.column_stack([vector[:, 1], -vector[:, 0]]) / length[:, None]
+
+    # Points at the centers of equal sections of each facade
+    counts = np.maximum(np.ceil(length / spacing).astype(np.int64), 1)
+    facade = np.repeat(np.arange(len(length)), counts)
+    section = np.arange(len(facade)) - np.repeat(np.cumsum(counts) - counts, counts)
+    fraction = (section + 0.5) / counts[facade]
+    xy = start[facade] + vector[facade] * fraction[:, None] + normal[facade] * FACADE_POINT_OFFSET
+
+    floor_height = height / floor_count
+    floors = np.arange(floor_count)
+    return {
+        "xy": np.tile(xy, (floor_count, 1)),
+        "z": np.repeat((floors + 0.5) * floor_height, len(xy)),
+        "normal": np.tile(normal[facade], (floor_count, 1)),
+        "facade": np.tile(facade, floor_count),
+        "floor": np.repeat(floors, len(xy)),
+        "facade_azimuth": np.degrees(np.arctan2(normal[:, 0], normal[:, 1])) % 360.0,
+        "facade_length": length
+    }
+
+
+def calculate_facade_sunlight(
+    index: BuildingIndex,
+    points: Dict[str, np.ndarray],
+    solar_altitudes: np.ndarray,
+    solar_azimuths: np.ndarray,
+    step_minutes: float
+) -> np.ndarray:
+    """
+    Calculate direct-sun minutes of facade sample points
+
+    A point is sunlit at a time step when its wall faces the sun and its
+    sun ray is not blocked by any building in the index (the point's own
+    building included, which shades its other wings).
+
+    Args:
+        index: Buildings around the facade (local meters)
+        points: Facade sample points from generate_facade_points
+        solar_altitudes: Solar altitude per time step in degrees
+        solar_azimuths: Solar azimuth per time step in degrees
+        step_minutes: Minutes represented by each time step
+
+    Returns:
+        Sunlit minutes per point
+    """
+    altitudes = np.asarray(solar_altitudes, dtype=float)
+    azimuths = np.asarray(solar_azimuths, dtype=float)
+    sun = np.column_stack([np.sin(np.radians(azimuths)), np.cos(np.radians(azimuths))])
+
+    # Back-face culling: only walls facing the sun receive it
+    facing = (points["normal"] @ sun.T > 0) & (altitudes > 0)
+    point, step = np.nonzero(facing)
+
+    sunlit = np.zeros(len(points["z"]))
+    for batch in range(0, len(point), FACADE_RAY_BATCH):
+        ray_point = point[batch:batch + FACADE_RAY_BATCH]
+        ray_step = step[batch:batch + FACADE_RAY_BATCH]
+        blocker, _ = index.cast_rays(
+            points["xy"][ray_point],
+            points["z"][ray_point],
+            altitudes[ray_step],
+            azimuths[ray_step]
+        )
+        sunlit += np.bincount(ray_point[blocker < 0], minlength=len(sunlit))
+    return sunlit * step_minutes
+
+
+def _split_tiles(rows: int, cols: int, tile_size: int) -> List[Tuple[int, int, int, int]]:
+    """Split a grid into (row_start, row_end, col_start, col_end) tiles"""
+    return [
+        (r0, min(r0 + tile_size, rows), c0, min(c0 + tile_size, cols))
+        for r0 in range(0, rows, tile_size)
+        for c0 in range(0, cols, tile_size)
+    ]
+
+
+def _init_worker(
+    index: BuildingIndex,
+    solar_altitudes: np.ndarray,
+    solar_azimuths: np.ndarray,
+    spacing: float,
+    step_minutes: float
+) -> None:
+    """Store the shared building index and sun vectors in this process"""
+    _worker_state.update(
+        index=index,
+        altitudes=solar_altitudes,
+        azimuths=solar_azimuths,
+        spacing=spacing,
+        step_minutes=step_minutes
+    )
+
+
+def _shaded_minutes(tile_bounds: Tuple[float, float, float, float]) -> np.ndarray:
+    """Shaded minutes of a tile's cells from the buildings whose shadows reach it"""
+    index = _worker_state["index"]
+    altitudes = _worker_state["altitudes"]
+
+    candidates = index.within_shadow_reach(shapely.box(*tile_bounds), float(altitudes.min()))
+    return rasterize_shadow_minutes(
+        index.footprints[candidates],
+        index.heights[candidates],
+        altitudes,
+        _worker_state["azimuths"],
+        tile_bounds,
+        _worker_state["spacing"],
+        _worker_state["step_minutes"]
+    )
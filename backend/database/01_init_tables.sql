@@ -131,7 +131,7 @@ CREATE TABLE IF NOT EXISTS shadow_analysis_cache (
     FOREIGN KEY (building_id) REFERENCES buildings(id) ON DELETE CASCADE,
 
     -- 索引
-    INDEX idx_building_datetime (building_id, analysis_date, analysis_hour),
+    UNIQUE KEY idx_building_datetime (building_id, analysis_date, analysis_hour),
     INDEX idx_expires (expires_at),
     SPATIAL INDEX idx_shadow (shadow_polygon)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='阴影分析缓存表';
@@ -242,6 +242,34 @@ CREATE TABLE IF NOT EXISTS user_settings (
     INDEX idx_user_id (user_id)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='用户配置表';
 
+-- ============================================
+-- 10. 建筑遮挡关系图
+-- ============================================
+CREATE TABLE IF NOT EXISTS building_shading_edges (
+    source_building_id VARCHAR(36) NOT NULL COMMENT '遮挡源建筑ID',
+    target_building_id VARCHAR(36) NOT NULL COMMENT '被遮挡建筑ID',
+    distance DECIMAL(10, 2) NOT NULL COMMENT '底面最近距离(米)',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (source_building_id, target_building_id),
+
+    -- 外键
+    FOREIGN KEY (source_building_id) REFERENCES buildings(id) ON DELETE CASCADE,
+    FOREIGN KEY (target_building_id) REFERENCES buildings(id) ON DELETE CASCADE,
+
+    -- 索引
+    INDEX idx_target (target_building_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='建筑遮挡关系表（全年可能遮挡）';
+
+CREATE TABLE IF NOT EXISTS building_shading_nodes (
+    building_id VARCHAR(36) PRIMARY KEY COMMENT '建筑ID',
+    building_updated_at DATETIME COMMENT '计算时建筑的更新时间',
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '计算时间',
+
+    -- 外键
+    FOREIGN KEY (building_id) REFERENCES buildings(id) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='建筑遮挡关系图节点表（记录已计算的建筑）';
+
 -- ============================================
 -- 完成初始化
 -- ============================================
@@ -8,6 +8,8 @@ SET FOREIGN_KEY_CHECKS = 0;
 -- ============================================
 -- 0. 清空现有数据（避免重复键错误）
 -- ============================================
+TRUNCATE TABLE building_shading_edges;
+TRUNCATE TABLE building_shading_nodes;
 TRUNCATE TABLE building_scores;
 TRUNCATE TABLE analysis_reports;
 TRUNCATE TABLE projects;
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+SolarArc Pro Solar Position Pre-calculation Script
+功能：为配置的站点和年份批量预计算太阳位置表（solar_positions_precalc）
+"""
+
+import os
+import sys
+import argparse
+from typing import List, Tuple
+
+# 添加 backend 目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.core.db_utils import get_db_context
+from app.services.solar_precalc_service import precompute_sites
+
+
+# ANSI颜色代码
+class Colors:
+    RED = '\033[0;31m'
+    GREEN = '\033[0;32m'
+    YELLOW = '\033[1;33m'
+    BLUE = '\033[0;34m'
+    NC = '\033[0m'  # No Color
+
+
+def print_colored(message: str, color: str = Colors.NC):
+    """打印彩色消息"""
+    print(f"{color}{message}{Colors.NC}")
+
+
+def parse_site(value: str) -> Tuple[float, float]:
+    """解析 lat,lng 格式的站点参数"""
+    lat, lng = value.split(",")
+    return float(lat), float(lng)
+
+
+def parse_years(value: str) -> List[int]:
+    """解析 2024 / 2024,2025 / 2024-2026 格式的年份参数"""
+    years = []
+    for part in value.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            years.extend(range(int(first), int(last) + 1))
+        elif part.strip():
+            years.append(int(part))
+    return years
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description='SolarArc Pro 太阳位置预计算脚本'
+    )
+    parser.add_argument(
+        '--site',
+        action='append',
+        type=parse_site,
+        help='站点坐标 lat,lng（可重复，默认读取 SOLAR_PRECALC_SITES）'
+    )
+    parser.add_argument(
+        '--years',
+        type=parse_years,
+        help='年份，如 2024 或 2024-2026（默认读取 SOLAR_PRECALC_YEARS）'
+    )
+
+    args = parser.parse_args()
+
+    sites = args.site or settings.solar_precalc_sites_list
+    years = args.years or settings.solar_precalc_years_list
+
+    if not sites or not years:
+        print_colored("✗ 未配置站点或年份，请使用 --site/--years 或设置 SOLAR_PRECALC_SITES/SOLAR_PRECALC_YEARS", Colors.RED)
+        sys.exit(1)
+
+    print_colored("========================================", Colors.BLUE)
+    print_colored("太阳位置预计算", Colors.BLUE)
+    print_colored("========================================", Colors.BLUE)
+    print(f"站点: {sites}")
+    print(f"年份: {years}")
+    print(f"时区: {settings.tz}")
+    print()
+
+    try:
+        with get_db_context() as db:
+            results = precompute_sites(db, sites, years)
+    except Exception as e:
+        print_colored(f"✗ 预计算失败: {e}", Colors.RED)
+        sys.exit(1)
+
+    for key, count in results.items():
+        print(f"  {key}: {count} 条记录")
+
+    print()
+    print_colored("✓ 预计算完成", Colors.GREEN)
+    if not settings.solar_precalc_enabled:
+        print_colored("提示：设置 SOLAR_PRECALC_ENABLED=true 以启用预计算表读取", Colors.YELLOW)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+SolarArc Pro Import-Time Report
+功能：测量 app.main 的冷启动导入耗时，列出最慢的模块，并检查重量级依赖是否被延迟加载
+"""
+
+import os
+import re
+import subprocess
+import sys
+import argparse
+
+from app.core.lazy_imports import HEAVY_MODULES
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# python -X importtime 输出格式：import time: self [us] | cumulative | imported package
+IMPORTTIME_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(target: str):
+    """在独立子进程中导入目标模块并解析 -X importtime 输出"""
+    check = "; ".join(
+        f"print('{name}', '{name}' in sys.modules)" for name in HEAVY_MODULES
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; import {target}; {check}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    modules = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules.append((name, int(self_us), int(cumulative_us)))
+        # 顶层导入（无缩进）的累计耗时之和即总耗时
+        if len(indent) == 1:
+            total_us += int(cumulative_us)
+
+    loaded = {}
+    for line in result.stdout.splitlines():
+        name, flag = line.rsplit(" ", 1)
+        loaded[name] = flag == "True"
+
+    return total_us, modules, loaded
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='SolarArc Pro 导入耗时报告')
+    parser.add_argument('--target', default='app.main', help='要测量的模块（默认：app.main）')
+    parser.add_argument('--top', type=int, default=20, help='显示最慢的 N 个模块（默认：20）')
+    parser.add_argument('--budget-ms', type=float, default=None, help='启动耗时预算（毫秒），超出时返回非零退出码')
+    args = parser.parse_args()
+
+    total_us, modules, loaded = measure(args.target)
+
+    print(f"导入 {args.target} 总耗时: {total_us / 1000:.1f} ms（共 {len(modules)} 个模块）")
+    print()
+    print(f"{'累计(ms)':>10} {'自身(ms)':>10}  模块")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>10.1f} {self_us / 1000:>10.1f}  {name}")
+
+    print()
+    print("延迟加载检查:")
+    eager = [name for name, is_loaded in loaded.items() if is_loaded]
+    for name, is_loaded in loaded.items():
+        print(f"  {'✗ 启动时已加载' if is_loaded else '✓ 延迟加载'}  {name}")
+
+    over_budget = args.budget_ms is not None and total_us / 1000 > args.budget_ms
+    if over_budget:
+        print(f"\n✗ 超出启动耗时预算 {args.budget_ms:.0f} ms")
+    if eager or over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,419 @@
+"""
+Shadow Calculation Tests
+"""
+from datetime import date
+
+import numpy as np
+import shapely
+from shapely.affinity import translate
+from shapely.geometry import Polygon, box, shape
+from shapely.ops import unary_union
+
+from app.services.shadow_service import (
+    calculate_building_shadow,
+    calculate_building_shadow_overlap,
+    calculate_building_shadows_batch,
+    calculate_building_shadows_cached,
+    calculate_daily_shadow_sweep,
+    calculate_shadow_overlap,
+    clear_shadow_memo,
+    filter_shading_candidates,
+    get_shadow_memo_stats,
+    get_sun_vector,
+    project_shadows,
+    shading_search_bounds
+)
+from app.services.shadow_raster import calculate_shadow_heatmap, rasterize_shadow_minutes
+from app.services.height_field import cast_height_field_shadows, rasterize_heights
+from app.services.shading_graph import annual_shadow_sectors, build_shading_edges
+from app.services.spatial_index import BuildingIndex
+from app.services.projection import LocalProjection, get_site_projection
+
+LAT = 39.9042
+LNG = 116.4074
+
+
+def _square(lng: float, lat: float, size: float = 0.0002) -> Polygon:
+    """Axis-aligned square footprint with its south-west corner at (lng, lat)"""
+    return box(lng, lat, lng + size, lat + size)
+
+
+def test_batch_shadows_match_single_building():
+    """
+    Test that the batch engine returns the same shadows as single calls
+    """
+    footprints = [_square(LNG, LAT), _square(LNG + 0.001, LAT), _square(LNG, LAT + 0.001)]
+    heights = [30.0, 60.0, 15.0]
+
+    batch = calculate_building_shadows_batch(footprints, heights, LAT, LNG, "2024-12-21", 10, 0)
+
+    assert len(batch) == 3
+    for footprint, height, (shadow, area) in zip(footprints, heights, batch):
+        footprint_geojson = {"type": "Polygon", "coordinates": [list(footprint.exterior.coords)]}
+        single_shadow, single_area = calculate_building_shadow(
+            footprint_geojson, height, LAT, LNG, "2024-12-21", 10, 0
+        )
+        assert np.allclose(shadow["coordinates"][0], single_shadow["coordinates"][0])
+        assert area == single_area
+
+
+def test_cached_shadows_skip_database_for_partial_hours():
+    """
+    Test that frames off the hour bypass shadow_analysis_cache entirely
+    """
+    footprints = [_square(LNG, LAT), _square(LNG + 0.001, LAT)]
+    heights = [30.0, 60.0]
+
+    # db=None would fail on any query
+    results, new_entries = calculate_building_shadows_cached(
+        None, ["a", "b"], footprints, heights, LAT, LNG, date(2024, 12, 21), 10, 30
+    )
+
+    assert results == calculate_building_shadows_batch(footprints, heights, LAT, LNG, "2024-12-21", 10, 30)
+    assert new_entries == []
+
+
+def test_batch_shadows_point_away_from_sun():
+    """
+    Test shadow direction and extent for a morning winter sun
+    """
+    altitude, azimuth = get_sun_vector(LAT, LNG, "2024-12-21", 10, 0)
+    footprint = _square(LNG, LAT)
+
+    (shadow, area), = calculate_building_shadows_batch([footprint], [30.0], LAT, LNG, "2024-12-21", 10, 0)
+    shadow_poly = shape(shadow)
+
+    # Sun in the south-east, shadow towards the north-west
+    projection = get_site_projection(LAT, LNG)
+    length = 30.0 / np.tan(np.radians(altitude))
+    dx = -length * np.sin(np.radians(azimuth)) / projection.meters_per_degree_lng
+    dy = -length * np.cos(np.radians(azimuth)) / projection.meters_per_degree_lat
+    roof = translate(footprint, dx, dy)
+
+    assert 90 < azimuth < 180
+    assert dx < 0 and dy > 0
+    assert shadow_poly.buffer(1e-12).contains(footprint)
+    assert shadow_poly.buffer(1e-12).contains(roof)
+    assert np.isclose(shadow_poly.area, footprint.union(roof).convex_hull.area)
+    assert np.isclose(area, projection.to_local(shadow_poly).area, rtol=1e-6)
+
+
+def test_project_shadows_sweeps_concave_footprints():
+    """
+    Test swept shadows of concave and courtyard footprints against a dense union of translations
+    """
+    l_shape = Polygon([(0, 0), (30, 0), (30, 10), (10, 10), (10, 30), (0, 30)])
+    courtyard = Polygon([(0, 0), (40, 0), (40, 40), (0, 40)], [[(10, 10), (30, 10), (30, 30), (10, 30)]])
+    footprints = np.array([l_shape, courtyard, box(0, 0, 20, 10)], dtype=object)
+    heights = np.array([30.0, 10.0, 20.0])
+
+    shadows = project_shadows(footprints, heights, 35.0, 140.0)
+
+    shadow_length = heights / np.tan(np.radians(35.0))
+    for footprint, length, shadow in zip(footprints, shadow_length, shadows):
+        dx = -length * np.sin(np.radians(140.0))
+        dy = -length * np.cos(np.radians(140.0))
+        expected = unary_union([translate(footprint, dx * t, dy * t) for t in np.linspace(0, 1, 2001)])
+        assert shadow.is_valid
+        assert shadow.symmetric_difference(expected).area / expected.area < 1e-3
+
+
+def test_batch_shadows_without_sun_or_height():
+    """
+    Test that night-time and zero-height buildings cast no shadow
+    """
+    footprints = [_square(LNG, LAT), _square(LNG + 0.001, LAT)]
+
+    night = calculate_building_shadows_batch(footprints, [30.0, 30.0], LAT, LNG, "2024-12-21", 23, 0)
+    flat = calculate_building_shadows_batch(footprints, [0.0, 30.0], LAT, LNG, "2024-12-21", 12, 0)
+
+    assert night == [(None, 0.0), (None, 0.0)]
+    assert flat[0] == (None, 0.0)
+    assert flat[1][0] is not None
+
+
+def test_local_projection_round_trip_and_scale():
+    """
+    Test the cached site projection against haversine distances
+    """
+    projection = get_site_projection(LAT, LNG)
+    assert projection is get_site_projection(LAT - 0.001, LNG + 0.001)
+
+    points = np.array([[LNG, LAT], [LNG + 0.01, LAT], [LNG, LAT + 0.01]])
+    local = projection.to_local_coords(points)
+    assert np.allclose(projection.to_geographic_coords(local), points)
+
+    # Haversine on the mean-radius sphere agrees to within 0.5%
+    radius = 6371008.8
+    east = radius * np.radians(0.01) * np.cos(np.radians(LAT))
+    north = radius * np.radians(0.01)
+    assert np.isclose(np.linalg.norm(local[1] - local[0]), east, rtol=5e-3)
+    assert np.isclose(np.linalg.norm(local[2] - local[0]), north, rtol=5e-3)
+    assert isinstance(projection, LocalProjection)
+
+
+def test_shadow_overlap_reports_real_building_ids():
+    """
+    Test STRtree overlap with explicit building IDs and metric areas
+    """
+    target = _square(LNG, LAT, 0.001)
+    shadows = [
+        _square(LNG + 0.0005, LAT + 0.0005, 0.001),
+        _square(LNG + 0.01, LAT + 0.01, 0.001),
+        _square(LNG + 0.0005, LAT, 0.0005),
+    ]
+    geojsons = [{"type": "Polygon", "coordinates": [list(poly.exterior.coords)]} for poly in shadows]
+    target_geojson = {"type": "Polygon", "coordinates": [list(target.exterior.coords)]}
+
+    result = calculate_shadow_overlap(target_geojson, geojsons, ["b-1", "b-far", "b-3"])
+
+    projection = get_site_projection(target.centroid.y, target.centroid.x)
+    quarter = projection.to_local(_square(LNG, LAT, 0.0005)).area
+    details = {detail["building_id"]: detail["overlap_area"] for detail in result["overlap_details"]}
+
+    assert set(details) == {"b-1", "b-3"}
+    assert np.isclose(details["b-1"], quarter, rtol=1e-4)
+    assert np.isclose(details["b-3"], quarter, rtol=1e-4)
+    assert np.isclose(result["projected_shadow_area"], 2 * quarter, rtol=1e-4)
+
+
+def test_building_shadow_overlap_from_footprints():
+    """
+    Test that a tall building south of the target shades it at winter noon
+    """
+    target = _square(LNG, LAT, 0.0003)
+    south = _square(LNG, LAT - 0.0005, 0.0003)
+    north = _square(LNG, LAT + 0.0010, 0.0003)
+
+    result = calculate_building_shadow_overlap(
+        target, [south, north], [80.0, 80.0], ["south", "north"], LAT, LNG, "2024-12-21", 12
+    )
+
+    assert [detail["building_id"] for detail in result["overlap_details"]] == ["south"]
+    assert result["projected_shadow_area"] > 0
+
+
+def test_filter_shading_candidates_by_reach():
+    """
+    Test pruning of buildings that cannot shade the target
+    """
+    target = _square(LNG, LAT, 0.0003)
+    projection = get_site_projection(LAT, LNG)
+    step = 100.0 / projection.meters_per_degree_lat
+
+    # 100 m south of the target: reachable by 100 m at 45 degrees, not by 20 m
+    footprints = [
+        _square(LNG, LAT - step - 0.0003, 0.0003),
+        _square(LNG, LAT - step - 0.0003, 0.0003),
+        _square(LNG, LAT + 0.01, 0.0003),
+    ]
+    keep = filter_shading_candidates(target, footprints, [120.0, 20.0, 600.0], 45.0)
+
+    assert keep.tolist() == [0]
+
+    min_lng, min_lat, max_lng, max_lat = shading_search_bounds(target, 120.0, 45.0)
+    assert np.isclose((target.bounds[1] - min_lat) * projection.meters_per_degree_lat, 120.0)
+    assert min_lng < target.bounds[0] and max_lng > target.bounds[2] and max_lat > target.bounds[3]
+
+
+def test_shadow_memo_reuses_sun_vectors_across_calls():
+    """
+    Test that memoized shadows are reused and keyed by building version
+    """
+    clear_shadow_memo()
+    footprints = [_square(LNG, LAT), _square(LNG + 0.001, LAT)]
+    heights = [30.0, 60.0]
+    keys = [("a", 1), ("b", 1)]
+
+    first = calculate_building_shadows_batch(footprints, heights, LAT, LNG, "2024-12-21", 10, 0, keys)
+    second = calculate_building_shadows_batch(footprints, heights, LAT, LNG, "2024-12-21", 10, 0, keys)
+    assert first == second
+    assert get_shadow_memo_stats()["hits"] == 2
+
+    # Memoized shadows agree with the unkeyed path up to the sun-vector quantization
+    for (memo_shadow, memo_area), (shadow, area) in zip(
+        first, calculate_building_shadows_batch(footprints, heights, LAT, LNG, "2024-12-21", 10, 0)
+    ):
+        assert abs(memo_area - area) / area < 0.01
+        assert shape(memo_shadow).symmetric_difference(shape(shadow)).area / shape(shadow).area < 0.01
+
+    # A new building version misses the memo
+    calculate_building_shadows_batch(footprints, heights, LAT, LNG, "2024-12-21", 10, 0, [("a", 2), ("b", 1)])
+    stats = get_shadow_memo_stats()
+    assert stats["hits"] == 3
+    assert stats["size"] == 3
+    assert stats["bytes"] > 0
+
+
+
+def test_daily_sweep_matches_single_frames():
+    """
+    Test that the whole-day sweep agrees with per-frame calculations
+    """
+    footprints = [_square(LNG, LAT), _square(LNG + 0.001, LAT)]
+    heights = [30.0, 0.0]
+
+    sweep = calculate_daily_shadow_sweep(
+        footprints, heights, LAT, LNG, "2024-12-21", 60, include_frame_polygons=True
+    )
+
+    frames = sweep["frames"]
+    assert [frame["timestamp"][11:16] for frame in frames] == [f"{hour:02d}:00" for hour in range(8, 17)]
+
+    casting, flat = sweep["buildings"]
+    assert flat["envelope"] is None
+    assert flat["frame_areas"] == [0.0] * len(frames)
+
+    envelope = shape(casting["envelope"])
+    for frame, area, polygon in zip(frames, casting["frame_areas"], casting["frame_polygons"]):
+        hour = int(frame["timestamp"][11:13])
+        shadow, expected_area = calculate_building_shadow(footprints[0], 30.0, LAT, LNG, "2024-12-21", hour, 0)
+        assert abs(area - expected_area) < 0.5
+        assert shape(polygon).symmetric_difference(shape(shadow)).area < 1e-12
+        assert envelope.buffer(1e-9).contains(shape(polygon))
+
+
+def test_raster_matches_shadow_polygons():
+    """
+    Test that rasterized shadows cover exactly the cells inside the swept polygons
+    """
+    footprints = np.array([
+        box(0, 0, 20, 10),
+        Polygon([(40, 0), (70, 0), (70, 30), (55, 30), (55, 12), (40, 12)]),
+        box(0, 40, 40, 80).difference(box(10, 50, 30, 70))
+    ], dtype=object)
+    heights = np.array([30.0, 20.0, 15.0])
+    altitudes = np.array([20.0, 45.0])
+    azimuths = np.array([135.0, 230.0])
+
+    minutes = rasterize_shadow_minutes(
+        footprints, heights, altitudes, azimuths, (-100, -100, 150, 150), 1.0, 10.0, max_cells=20000
+    )
+
+    centers = np.arange(-100, 150) + 0.5
+    x, y = np.meshgrid(centers, centers)
+    expected = np.zeros_like(minutes)
+    for altitude, azimuth in zip(altitudes, azimuths):
+        shadow = unary_union(list(project_shadows(footprints, heights, altitude, azimuth)))
+        expected += 10.0 * shapely.contains_xy(shadow, x, y)
+
+    assert np.array_equal(minutes, expected)
+
+
+def test_height_field_shadows_match_shadow_polygons():
+    """
+    Test the height raster and that line-sweep shadows agree with the swept polygons
+    """
+    footprints = np.array([
+        box(0, 0, 20, 10),
+        Polygon([(40, 0), (70, 0), (70, 30), (55, 30), (55, 12), (40, 12)]),
+        box(0, 40, 40, 80).difference(box(10, 50, 30, 70)),
+        shapely.affinity.rotate(box(80, 40, 83, 70), 35)
+    ], dtype=object)
+    heights = np.array([30.0, 20.0, 15.0, 40.0])
+
+    field = rasterize_heights(footprints, heights, (-100, -100, 150, 150), 1.0)
+
+    centers = np.arange(-100, 150) + 0.5
+    x, y = np.meshgrid(centers, centers)
+    expected = np.zeros_like(field)
+    for footprint, height in zip(footprints, heights):
+        expected[shapely.contains_xy(footprint, x, y)] = height
+    assert np.array_equal(field, expected)
+
+    for altitude, azimuth in [(20.0, 135.0), (45.0, 230.0), (30.0, 160.0), (25.0, 80.0)]:
+        shaded, top = cast_height_field_shadows(field, 1.0, altitude, azimuth)
+        shadow = unary_union(list(project_shadows(footprints, heights, altitude, azimuth)))
+
+        # Ground cells agree except within a cell and a half of a shadow edge
+        ground = field == 0
+        differs = ground & (shaded != shapely.contains_xy(shadow, x, y))
+        distance = shapely.distance(shadow.boundary, shapely.points(x[differs], y[differs]))
+        assert (distance < 1.5).all()
+        assert (top >= 0).all() and top.max() < heights.max()
+
+    # With the sun below the horizon everything is in shadow
+    assert cast_height_field_shadows(field, 1.0, -5.0, 180.0)[0].all()
+
+
+def test_shadow_heatmap_hours():
+    """
+    Test heatmap grid geometry and that shadow hours stay within daylight
+    """
+    footprints = [_square(LNG, LAT), _square(LNG + 0.001, LAT + 0.001)]
+
+    heatmap = calculate_shadow_heatmap(
+        footprints, [30.0, 60.0], LAT, LNG, [date(2024, 12, 21), date(2024, 6, 21)], 10, 5.0,
+        (LNG - 0.001, LAT - 0.001, LNG + 0.002, LAT + 0.002)
+    )
+
+    assert heatmap["rows"] == len(heatmap["shadow_hours"])
+    assert heatmap["cols"] == len(heatmap["shadow_hours"][0])
+    assert heatmap["cols"] == int(np.ceil(0.003 * get_site_projection(LAT, LNG).meters_per_degree_lng / 5.0))
+    assert 0 < heatmap["mean_shadow_hours"] < heatmap["max_shadow_hours"] <= 24
+
+    # Footprint cells are shaded all day; the south-west corner never is
+    assert heatmap["max_shadow_hours"] > 11
+    assert heatmap["shadow_hours"][-1][0] == 0
+
+    # Without bounds the grid covers the longest shadow around the buildings
+    padded = calculate_shadow_heatmap(footprints, [30.0, 60.0], LAT, LNG, [date(2024, 12, 21)], 10, 5.0)
+    reach = 60.0 / np.tan(np.radians(5.0))
+    projection = get_site_projection(LAT, LNG)
+    assert abs((LAT - padded["bounds"][1]) * projection.meters_per_degree_lat - reach) < 0.1
+    assert abs((padded["bounds"][2] - LNG - 0.0012) * projection.meters_per_degree_lng - reach) < 0.1
+
+
+def test_building_index_reports_first_blocking_building():
+    """
+    Test ray casting against extruded footprints in local meters
+    """
+    index = BuildingIndex(
+        ["near", "far", "low", "east"],
+        [box(-5, -30, 5, -20), box(-5, -80, 5, -70), box(-5, 20, 5, 30), box(40, -5, 50, 5)],
+        [30.0, 200.0, 50.0, 5.0]
+    )
+
+    # Sun due south at 30 degrees: the ray enters "near" at 20 m (11.5 m up),
+    # below its 30 m roof, before it reaches the taller "far"
+    altitudes = np.array([30.0, 60.0, 30.0, -5.0, 10.0])
+    azimuths = np.array([180.0, 180.0, 0.0, 180.0, 90.0])
+    blocker, distance = index.cast_sun_rays((0.0, 0.0), altitudes, azimuths)
+
+    assert [index.building_ids[i] if i >= 0 else None for i in blocker] == ["near", "far", "low", None, None]
+    assert abs(distance[0] - 20.0) < 1e-9
+    assert abs(distance[1] - 70.0) < 1e-9
+
+    # A raised point sees over the short northern building
+    blocker, _ = index.cast_sun_rays((0.0, 0.0), altitudes[2:3], azimuths[2:3], origin_height=45.0)
+    assert blocker[0] == -1
+
+    # A point inside a footprint is blocked by that building
+    blocker, distance = index.cast_sun_rays((45.0, 0.0), np.array([80.0]), np.array([0.0]))
+    assert index.building_ids[blocker[0]] == "east" and distance[0] == 0.0
+
+
+def test_shading_graph_links_buildings_in_the_annual_shadow_path():
+    """
+    Test the shading graph against the sun path of a northern site
+    """
+    sectors = annual_shadow_sectors(LAT, LNG)
+
+    # Summer sunrise and sunset cast shadows south-west and south-east at most
+    azimuths = np.degrees(np.arctan2(sectors[..., 0], sectors[..., 1])) % 360.0
+    assert not ((azimuths > 130) & (azimuths < 230)).any()
+
+    footprints = np.array([
+        box(-10, -10, 10, 10),      # 100 m tower
+        box(-10, 40, 10, 60),       # north of the tower
+        box(-10, -60, 10, -40),     # south of the tower
+        box(2000, 0, 2010, 10),     # out of reach
+        box(-10, 100, 10, 120)      # zero height, shaded only
+    ], dtype=object)
+    heights = np.array([100.0, 20.0, 20.0, 50.0, 0.0])
+
+    source, target, distance = build_shading_edges(footprints, heights, sectors)
+    edges = dict(zip(zip(source.tolist(), target.tolist()), distance.tolist()))
+
+    assert set(edges) == {(0, 1), (0, 4), (1, 4), (2, 0)}
+    assert abs(edges[(0, 1)] - 30.0) < 1e-9
@@ -1,10 +1,19 @@
 """
 Solar Position Calculation Tests
 """
+import subprocess
+import sys
+
 import pytest
+import numpy as np
+from datetime import date as date_cls, datetime, timezone
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.core.cache import LRUCache
+from app.core.time_utils import get_timezone, local_to_unixtime
+from app.services.solar_engine import solar_position
+from app.services.solar_service import calculate_solar_position, clear_solar_cache, get_solar_cache_stats
 
 
 @pytest.fixture
@@ -57,3 +66,346 @@ def test_calculate_daily_positions(client):
     assert data["code"] == 200
     assert "positions" in data["data"]
     assert len(data["data"]["positions"]) == 24
+
+
+def test_daily_positions_match_single_position(client):
+    """
+    Test batch daily positions agree with the single-position endpoint
+    """
+    daily = client.get(
+        "/api/v1/solar/daily-positions",
+        params={"lat": 39.9042, "lng": 116.4074, "date": "2024-06-21"}
+    ).json()["data"]["positions"]
+
+    single = client.get(
+        "/api/v1/solar/position",
+        params={"lat": 39.9042, "lng": 116.4074, "date": "2024-06-21", "hour": 15}
+    ).json()["data"]
+
+    assert daily[15]["hour"] == 15
+    assert abs(daily[15]["altitude"] - single["solar_altitude"]) < 1e-4
+    assert abs(daily[15]["azimuth"] - single["solar_azimuth"]) < 1e-4
+
+
+def test_calculate_range_positions(client):
+    """
+    Test columnar solar positions over a date range
+    """
+    response = client.get(
+        "/api/v1/solar/range-positions",
+        params={
+            "lat": 39.9042,
+            "lng": 116.4074,
+            "start_date": "2024-06-21",
+            "end_date": "2024-06-22",
+            "step_minutes": 30
+        }
+    )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert len(data["timestamps"]) == 96
+    assert len(data["altitude"]) == 96
+    assert len(data["azimuth"]) == 96
+
+
+def test_range_positions_rejects_reversed_dates(client):
+    """
+    Test range request with end date before start date
+    """
+    response = client.get(
+        "/api/v1/solar/range-positions",
+        params={
+            "lat": 39.9042,
+            "lng": 116.4074,
+            "start_date": "2024-06-22",
+            "end_date": "2024-06-21"
+        }
+    )
+
+    assert response.status_code == 400
+
+
+def test_local_to_unixtime_crosses_dst():
+    """
+    Test vectorized local time conversion against pytz around DST changes
+    """
+    tz = get_timezone("America/New_York")
+    days = np.repeat(np.array(["2024-03-10", "2024-11-03"], dtype="datetime64[D]"), 96)
+    seconds = np.tile(np.arange(0, 86400, 900), 2)
+
+    unixtime, offsets = local_to_unixtime(days, seconds, "America/New_York")
+
+    for day, second, value in zip(days.tolist(), seconds.tolist(), unixtime):
+        local = datetime(day.year, day.month, day.day, second // 3600, second % 3600 // 60)
+        assert value == tz.localize(local, is_dst=False).timestamp()
+    assert set(offsets.tolist()) == {-5 * 3600, -4 * 3600}
+
+
+def test_solar_position_defaults_to_today():
+    """
+    Test solar position without an explicit date
+    """
+    result = calculate_solar_position(39.9042, 116.4074, hour=12, include_sun_times=False)
+
+    assert result["timestamp"].endswith("T12:00:00+08:00")
+
+
+def test_spa_engine_reference_value():
+    """
+    Test SPA tier against the NREL SPA reference example (Reda & Andreas, 2004)
+    """
+    unixtime = datetime(2003, 10, 17, 19, 30, 30, tzinfo=timezone.utc).timestamp()
+
+    result = solar_position(
+        unixtime,
+        39.742476,
+        -105.1786,
+        elevation=1830.14,
+        pressure=820,
+        temperature=11,
+        delta_t=67
+    )
+
+    assert abs((90 - float(result["apparent_elevation"])) - 50.11162) < 1e-4
+    assert abs(float(result["azimuth"]) - 194.34024) < 1e-4
+
+
+def test_engine_broadcasts_times_and_locations():
+    """
+    Test NOAA tier against SPA tier over a grid of locations and times
+    """
+    unixtime = datetime(2024, 6, 21, tzinfo=timezone.utc).timestamp() + np.arange(24) * 3600.0
+    lats = np.array([[22.5], [31.2], [39.9]])
+    lngs = np.array([[114.1], [121.5], [116.4]])
+
+    spa = solar_position(unixtime, lats, lngs, precision="spa")
+    noaa = solar_position(unixtime, lats, lngs, precision="noaa")
+
+    assert spa["altitude"].shape == (3, 24)
+    assert np.abs(spa["altitude"] - noaa["altitude"]).max() < 0.05
+
+
+def test_calculate_solar_position_noaa_precision(client):
+    """
+    Test selecting the NOAA precision tier per request
+    """
+    response = client.get(
+        "/api/v1/solar/position",
+        params={
+            "lat": 39.9042,
+            "lng": 116.4074,
+            "date": "2024-06-21",
+            "hour": 12,
+            "precision": "noaa"
+        }
+    )
+
+    assert response.status_code == 200
+    assert response.json()["data"]["solar_altitude"] > 70
+
+
+def test_solar_position_cache_hits():
+    """
+    Test repeated solar position lookups are served from the cache
+    """
+    clear_solar_cache()
+
+    first = calculate_solar_position(39.9042, 116.4074, "2024-06-21", 9, 30)
+    second = calculate_solar_position(39.90421, 116.40741, "2024-06-21", 9, 30)
+
+    stats = get_solar_cache_stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert first["solar_altitude"] == second["solar_altitude"]
+
+
+def test_lru_cache_eviction_and_ttl():
+    """
+    Test LRU eviction order and TTL expiry
+    """
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+    expiring = LRUCache(max_size=2, ttl_seconds=1e-9)
+    expiring.set("a", 1)
+    assert expiring.get("a") is None
+
+def test_lru_cache_byte_budget():
+    """
+    Test that LRUCache evicts least-recently-used entries to fit max_bytes
+    """
+    cache = LRUCache(max_size=100, max_bytes=10, sizeof=len)
+    cache.set("a", "xxxx")
+    cache.set("b", "xxxx")
+    cache.get("a")
+    cache.set("c", "xxxx")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "xxxx"
+    assert cache.bytes == 8
+
+    # Values larger than the whole budget are not stored
+    cache.set("d", "x" * 11)
+    assert cache.get("d") is None
+    assert len(cache) == 2
+
+
+
+def test_precalc_table_read_through(monkeypatch):
+    """
+    Test pre-calculated rows are written in bulk and served before live computation
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.config import settings
+    from app.models.solar_position import SolarPositionPrecalc
+    from app.services.solar_precalc_service import precompute_site_year
+    from app.services.solar_service import calculate_daily_solar_positions
+
+    engine = create_engine("sqlite://")
+    SolarPositionPrecalc.__table__.create(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    inserted = precompute_site_year(db, 39.9042, 116.4074, 2024)
+    assert inserted == 366 * 24
+
+    monkeypatch.setattr(settings, "solar_precalc_enabled", True)
+    clear_solar_cache()
+
+    # Tamper with one stored row to prove the table is read first
+    row = db.query(SolarPositionPrecalc).filter(
+        SolarPositionPrecalc.hour == 12
+    ).filter(SolarPositionPrecalc.date == date_cls(2024, 6, 21)).one()
+    row.altitude_angle = 10
+    db.commit()
+
+    position = calculate_solar_position(39.9042, 116.4074, "2024-06-21", 12, 0, db=db)
+    assert position["solar_altitude"] == 10
+
+    daily = calculate_daily_solar_positions(39.9042, 116.4074, "2024-06-21", db=db)
+    assert daily["positions"][12]["altitude"] == 10
+    assert get_solar_cache_stats()["misses"] == 1
+
+    # Rows are keyed by the quantized site, so finer coordinates still match
+    clear_solar_cache()
+    db.query(SolarPositionPrecalc).delete()
+    db.commit()
+    precompute_site_year(db, 39.90421, 116.40739, 2024)
+    row = db.query(SolarPositionPrecalc).filter(
+        SolarPositionPrecalc.hour == 12
+    ).filter(SolarPositionPrecalc.date == date_cls(2024, 6, 21)).one()
+    row.altitude_angle = 10
+    db.commit()
+
+    position = calculate_solar_position(39.90422, 116.40741, "2024-06-21", 12, 0, db=db)
+    assert position["solar_altitude"] == 10
+
+    db.close()
+    clear_solar_cache()
+
+
+def test_yearly_sun_times_match_single_day(client):
+    """
+    Test vectorized yearly sunrise/sunset agrees with the per-day lookup
+    """
+    response = client.get(
+        "/api/v1/solar/sun-times/yearly",
+        params={"lat": 39.9042, "lng": 116.4074, "year": 2024}
+    )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert len(data["dates"]) == 366
+
+    index = data["dates"].index("2024-06-21")
+    single = client.get(
+        "/api/v1/solar/position",
+        params={"lat": 39.9042, "lng": 116.4074, "date": "2024-06-21", "hour": 12}
+    ).json()["data"]
+
+    def to_seconds(value):
+        hours, minutes, seconds = (int(part) for part in value.split(":"))
+        return hours * 3600 + minutes * 60 + seconds
+
+    assert abs(to_seconds(data["sunrise"][index]) - to_seconds(single["sunrise_time"])) < 60
+    assert abs(data["day_length"][index] - single["day_length"]) < 0.02
+
+
+def test_sun_times_are_lazy_and_cached():
+    """
+    Test sunrise/sunset is skipped when not requested and cached otherwise
+    """
+    clear_solar_cache()
+
+    lazy = calculate_solar_position(39.9042, 116.4074, "2024-06-21", 8, 0, include_sun_times=False)
+    assert lazy["sunrise_time"] is None
+    assert get_solar_cache_stats()["sun_times"]["misses"] == 0
+
+    for hour in (8, 9, 10):
+        calculate_solar_position(39.9042, 116.4074, "2024-06-21", hour, 0)
+
+    sun_stats = get_solar_cache_stats()["sun_times"]
+    assert sun_stats["misses"] == 1
+    assert sun_stats["hits"] == 2
+
+
+def test_batch_solar_positions(client):
+    """
+    Test multi-location batch endpoint returns one row per point
+    """
+    response = client.post(
+        "/api/v1/solar/batch",
+        json={
+            "points": [
+                {"lat": 39.9042, "lng": 116.4074},
+                {"lat": 31.2304, "lng": 121.4737},
+                {"lat": 22.5431, "lng": 114.0579}
+            ],
+            "timestamps": ["2024-06-21T09:00:00", "2024-06-21T12:00:00"]
+        }
+    )
+
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert len(data["altitude"]) == 3
+    assert len(data["altitude"][0]) == 2
+
+    single = calculate_solar_position(31.2304, 121.4737, "2024-06-21", 12, 0)
+    assert abs(data["altitude"][1][1] - single["solar_altitude"]) < 1e-4
+
+
+def test_ephemeris_interpolation_matches_spa():
+    """
+    Test ephemeris-table interpolation stays within its error bound of full SPA
+    """
+    from app.services.solar_ephemeris import ephemeris_solar_position
+
+    unixtime = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp() + np.arange(0, 366 * 86400, 7919.0)
+
+    spa = solar_position(unixtime, 39.9042, 116.4074)
+    interpolated = ephemeris_solar_position(unixtime, 39.9042, 116.4074)
+
+    assert np.abs(spa["altitude"] - interpolated["altitude"]).max() < 1e-3
+    assert np.abs((spa["azimuth"] - interpolated["azimuth"] + 180) % 360 - 180).max() < 1e-3
+
+
+def test_heavy_dependencies_are_lazy():
+    """
+    Test that importing the application does not load pandas or pvlib
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", "import sys, app.main; print('pandas' in sys.modules, 'pvlib' in sys.modules)"],
+        capture_output=True,
+        text=True
+    )
+
+    assert result.returncode == 0
+    assert result.stdout.strip() == "False False"
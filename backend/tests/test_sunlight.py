@@ -0,0 +1,186 @@
+"""
+Sunlight Analysis Tests
+"""
+from datetime import date
+
+import numpy as np
+import shapely
+from shapely.geometry import Polygon, box
+
+from app.services.horizon import HorizonMask
+from app.core.time_utils import local_to_unixtime
+from app.services.solar_service import calculate_solar_positions_batch
+from app.services.spatial_index import BuildingIndex
+from app.services.sunlight_events import solve_sunlit_intervals, summarize_intervals
+from app.services.sunlight_service import (
+    calculate_facade_sunlight,
+    calculate_grid_sunlight,
+    generate_facade_points,
+    sample_grid
+)
+
+
+def _district() -> BuildingIndex:
+    """A small district in local meters with a concave and a courtyard building"""
+    return BuildingIndex(
+        ["a", "b", "c", "d"],
+        [
+            box(0, 0, 20, 15),
+            Polygon([(40, 0), (70, 0), (70, 30), (55, 30), (55, 12), (40, 12)]),
+            box(0, 40, 40, 80).difference(box(10, 50, 30, 70)),
+            shapely.affinity.rotate(box(80, 40, 95, 60), 30)
+        ],
+        [30.0, 45.0, 20.0, 60.0]
+    )
+
+
+def test_sample_grid_masks_area():
+    """
+    Test that sample points are cell centers inside the area
+    """
+    area = Polygon([(0, 0), (100, 0), (0, 100)])
+    bounds, inside = sample_grid(area, 10.0)
+
+    assert bounds == (0.0, 0.0, 100.0, 100.0)
+    assert inside.shape == (10, 10)
+    # Row r, col c is inside the triangle when (c + 0.5) + (r + 0.5) < 10
+    assert inside.sum() == 45
+    assert inside[0, 0] and not inside[9, 9]
+
+
+def test_grid_sunlight_matches_ray_casting():
+    """
+    Test that grid sunlight agrees with ray casting each point, in-process and in a pool
+    """
+    index = _district()
+    altitudes = np.array([8.0, 20.0, 35.0, 25.0, 12.0])
+    azimuths = np.array([120.0, 150.0, 180.0, 210.0, 240.0])
+    bounds, inside = sample_grid(box(-60, -60, 140, 120), 4.0)
+
+    minutes = calculate_grid_sunlight(index, bounds, 4.0, altitudes, azimuths, 10.0, tile_size=16, workers=1)
+
+    rows, cols = inside.shape
+    for row in range(0, rows, 3):
+        for col in range(0, cols, 3):
+            point = (bounds[0] + (col + 0.5) * 4.0, bounds[1] + (row + 0.5) * 4.0)
+            blocker, _ = index.cast_sun_rays(point, altitudes, azimuths)
+            assert minutes[row, col] == 10.0 * (blocker < 0).sum()
+
+    pooled = calculate_grid_sunlight(index, bounds, 4.0, altitudes, azimuths, 10.0, tile_size=16, workers=2)
+    assert np.array_equal(pooled, minutes)
+
+
+def test_facade_points_follow_walls_and_floors():
+    """
+    Test facade points per floor with outward normals, courtyard walls included
+    """
+    footprint = box(0, 0, 20, 10).difference(box(5, 3, 15, 7))
+    points = generate_facade_points(footprint, 30.0, floor_count=10, spacing=5.0)
+
+    # Outer walls: 4 + 2 + 4 + 2 points; courtyard walls: 2 + 1 + 2 + 1
+    assert len(points["facade_length"]) == 8
+    assert len(points["z"]) == 18 * 10
+    assert np.allclose(np.unique(points["z"]), np.arange(10) * 3.0 + 1.5)
+
+    # Every point sits just outside the solid, on the side its normal points to
+    xy = points["xy"]
+    assert not shapely.contains_xy(footprint, xy[:, 0], xy[:, 1]).any()
+    inward = xy - points["normal"] * 0.1
+    assert shapely.contains_xy(footprint, inward[:, 0], inward[:, 1]).all()
+
+    # The south outer wall faces south, the courtyard's south wall faces north
+    south = points["facade"][np.isclose(xy[:, 1], -0.05)]
+    assert np.allclose(points["facade_azimuth"][np.unique(south)], 180.0)
+    courtyard_south = points["facade"][np.isclose(xy[:, 1], 3.05)]
+    assert np.allclose(points["facade_azimuth"][np.unique(courtyard_south)], 0.0)
+
+    # Without floor_count the default floor height sets the floors
+    assert len(np.unique(generate_facade_points(box(0, 0, 10, 10), 30.0)["floor"])) == 10
+
+
+def test_facade_sunlight_matches_ray_casting():
+    """
+    Test that batch facade sunlight agrees with per-point rays and culls back faces
+    """
+    index = _district()
+    altitudes = np.array([8.0, 20.0, 35.0, 25.0, 12.0])
+    azimuths = np.array([120.0, 150.0, 180.0, 210.0, 240.0])
+    points = generate_facade_points(index.footprints[1], 45.0, floor_count=15, spacing=4.0)
+
+    minutes = calculate_facade_sunlight(index, points, altitudes, azimuths, 10.0)
+
+    sun = np.column_stack([np.sin(np.radians(azimuths)), np.cos(np.radians(azimuths))])
+    for i in range(0, len(minutes), 7):
+        blocker, _ = index.cast_sun_rays(points["xy"][i], altitudes, azimuths, origin_height=points["z"][i])
+        facing = points["normal"][i] @ sun.T > 0
+        assert minutes[i] == 10.0 * (facing & (blocker < 0)).sum()
+
+    # North-facing walls never see a southern sun
+    north = np.isclose(points["facade_azimuth"][points["facade"]], 0.0)
+    assert north.any() and (minutes[north] == 0).all()
+    # The top floor of the south wall is unobstructed towards the south
+    south_top = np.isclose(points["facade_azimuth"][points["facade"]], 180.0) & (points["floor"] == 14)
+    assert (minutes[south_top] == 50.0).all()
+
+
+def test_horizon_mask_matches_ray_casting():
+    """
+    Test that horizon-mask lookups agree with casting each sun ray
+    """
+    index = _district()
+    origins = np.array([[30.0, 20.0], [-15.0, 30.0], [20.0, 60.0], [65.0, 10.0], [100.0, -20.0]])
+    heights = np.array([0.0, 5.0, 0.0, 10.0, 50.0])
+    mask = HorizonMask.build(index, origins, heights)
+
+    assert mask.elevations.shape == (5, 720) and mask.elevations.dtype == np.uint16
+    # Inside building b every direction is blocked
+    assert (mask.horizon([0.0, 90.0, 180.0, 270.0])[3] == 90.0).all()
+
+    rng = np.random.default_rng(7)
+    azimuths = (rng.integers(0, 720, 2000) + 0.5) * 0.5
+    altitudes = rng.uniform(0.5, 70.0, 2000)
+    sunlit = mask.is_sunlit(altitudes, azimuths)
+    horizon = mask.horizon(azimuths)
+
+    for point, (origin, height) in enumerate(zip(origins, heights)):
+        blocker, _ = index.cast_sun_rays(origin, altitudes, azimuths, origin_height=height)
+        # Stored elevations are rounded to 0.01 degrees
+        decided = np.abs(altitudes - horizon[point]) > 0.01
+        assert np.array_equal(sunlit[point][decided], (blocker < 0)[decided])
+
+
+def test_sunlit_intervals_match_dense_sampling():
+    """
+    Test that solved interval boundaries agree with ray casting every 10 seconds
+    """
+    index = _district()
+    lat, lng, day = 39.9042, 116.4074, date(2024, 1, 20)
+
+    seconds = np.arange(0, 86400, 10.0)
+    unixtime, _ = local_to_unixtime(day, seconds, "Asia/Shanghai")
+    sun = calculate_solar_positions_batch(lat, lng, unixtime)
+
+    for origin, height in [((30.0, 20.0), 0.0), ((20.0, 90.0), 0.0), ((50.0, -10.0), 3.0), ((75.0, 50.0), 12.0)]:
+        solved = solve_sunlit_intervals(index, origin, lat, lng, day, height, tolerance_seconds=2.0)
+
+        blocker, _ = index.cast_sun_rays(origin, sun["altitude"], sun["azimuth"], origin_height=height)
+        expected = (blocker < 0) & (sun["altitude"] > 0)
+        sunlit = np.zeros(len(seconds), dtype=bool)
+        for start, end in solved["intervals"]:
+            sunlit |= (seconds >= start) & (seconds < end)
+
+        # Only samples within the tolerance of a boundary may differ
+        assert (sunlit != expected).sum() <= 2 * len(solved["intervals"])
+        assert len(solved["blocked_by"]) == len(solved["intervals"])
+        for (start, end), building in zip(solved["intervals"], solved["blocked_by"]):
+            after = np.searchsorted(seconds, end + 30.0)
+            if building >= 0:
+                assert blocker[after] == building
+            elif after < len(seconds):
+                assert sun["altitude"][after] <= 0
+        assert solved["evaluations"] < len(seconds) / 10
+
+    summary = summarize_intervals([(8 * 3600.0, 10.5 * 3600.0), (12 * 3600.0, 13 * 3600.0)], day)
+    assert summary["sunlight_hours"] == 3.5
+    assert summary["longest_continuous_hours"] == 2.5
+    assert summary["intervals"][0]["start"] == "2024-01-20T08:00:00+08:00"